@@ -2,15 +2,17 @@ from flask import Flask, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from app.config import Config
+from app.services.replicas import SesionEnrutada
 
 # -------------------------------
 # extensiones globales
 # -------------------------------
-db = SQLAlchemy()
+# La sesión elige primario o réplica por consulta (ver services/replicas.py)
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
 login_manager = LoginManager()
 
 def create_app():
-    app = Flask(__name__, static_folder='app/static')
+    app = Flask(__name__)  # static/ relativo al paquete: app/static
     app.config.from_object(Config)
     app.config['UPLOAD_FOLDER'] = 'app/static/uploads'
     # -------------------------------
@@ -20,11 +22,114 @@ def create_app():
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
 
+    # -------------------------------
+    # métricas de rendimiento (antes que la compresión: mide la respuesta final)
+    # y diagnóstico de SQL lento / N+1 (solo con SQL_DIAGNOSTICS=1)
+    # -------------------------------
+    from app.services.metricas import configurar_metricas
+    configurar_metricas(app)
+    from app.services.diagnostico import configurar_diagnostico
+    configurar_diagnostico(app)
+
+    # -------------------------------
+    # caché de páginas públicas
+    # -------------------------------
+    from app.services.cache import configurar_cache
+    configurar_cache(app)
+
+    # -------------------------------
+    # paginación por cursor (helper para plantillas)
+    # -------------------------------
+    from app.services.paginacion import configurar_paginacion
+    configurar_paginacion(app)
+
+    # -------------------------------
+    # assets estáticos con huella y .gz (helper asset() + comando CLI)
+    # -------------------------------
+    from app.services.assets import configurar_assets
+    configurar_assets(app)
+
+    # -------------------------------
+    # compresión gzip/deflate de respuestas HTML/JSON/CSV
+    # -------------------------------
+    from app.services.compresion import configurar_compresion
+    configurar_compresion(app)
+
     # -------------------------------
     # Importar modelos *después* de inicializar db
     # -------------------------------
     from app.models.models import Usuario
 
+    # -------------------------------
+    # resumen diario de ventas/gastos (eventos + comando CLI)
+    # -------------------------------
+    from app.services.resumen import configurar_resumen
+    configurar_resumen(app)
+
+    # -------------------------------
+    # contadores de estadísticas (eventos ORM + comando CLI)
+    # -------------------------------
+    from app.services.contadores import configurar_contadores
+    configurar_contadores(app)
+
+    # -------------------------------
+    # índice de búsqueda de productos (eventos ORM + comando CLI)
+    # -------------------------------
+    from app.services.busqueda import configurar_busqueda
+    configurar_busqueda(app)
+
+    # -------------------------------
+    # variantes de imágenes de productos (helper para plantillas + comando CLI)
+    # -------------------------------
+    from app.services.imagenes import configurar_imagenes
+    configurar_imagenes(app)
+
+    # -------------------------------
+    # reportes PDF en segundo plano (pool de hilos + caché por filtros)
+    # -------------------------------
+    from app.services.reportes import configurar_reportes
+    configurar_reportes(app)
+
+    # -------------------------------
+    # carrito guardado en el servidor (contador para la navbar)
+    # -------------------------------
+    from app.services.carrito import configurar_carrito
+    configurar_carrito(app)
+
+    # -------------------------------
+    # navegación por facetas del catálogo (índice y conteos)
+    # -------------------------------
+    from app.services.facetas import configurar_facetas
+    configurar_facetas(app)
+
+    # -------------------------------
+    # réplica de lectura para reportes y listados (opcional)
+    # -------------------------------
+    from app.services.replicas import configurar_replicas
+    configurar_replicas(app)
+
+    # -------------------------------
+    # migraciones versionadas y verificación de índices (comandos CLI)
+    # -------------------------------
+    from app.services.migraciones import configurar_migraciones
+    configurar_migraciones(app)
+    from app.services.explicar import configurar_explicar
+    configurar_explicar(app)
+
+    # -------------------------------
+    # datos sintéticos y benchmarks de rutas (comandos CLI)
+    # -------------------------------
+    from app.services.generador import configurar_generador
+    configurar_generador(app)
+    from app.services.benchmark import configurar_benchmark
+    configurar_benchmark(app)
+
+    # -------------------------------
+    # importación masiva de productos por CSV (comando CLI)
+    # -------------------------------
+    from app.services.importacion import configurar_importacion
+    configurar_importacion(app)
+
     # -------------------------------
     # función para cargar usuarios (Flask-Login)
     # -------------------------------
@@ -45,6 +150,10 @@ def create_app():
     app.register_blueprint(admin_cp, url_prefix='/admin')
     app.register_blueprint(auth_cp)
 
+    # API JSON de solo lectura del catálogo
+    from app.controllers.api import api_cp
+    app.register_blueprint(api_cp, url_prefix='/api/v1')
+
     # -------------------------------
     # ruta principal
     # -------------------------------
@@ -11,5 +11,70 @@ class Config:
     # URI de conexión a la base de datos MySQL (usando PyMySQL)
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI")
 
+    # Réplica de solo lectura (opcional) para reportes y listados
+    DATABASE_REPLICA_URI = os.getenv('DATABASE_REPLICA_URI')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URI} if DATABASE_REPLICA_URI else {}
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))  # si se supera, se lee del primario
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', 10))
+    # SQL propio para medir el retraso (1.ª columna en segundos), p. ej. si no hay permiso de SHOW REPLICA STATUS
+    REPLICA_LAG_QUERY = os.getenv('REPLICA_LAG_QUERY')
+    # Tras una escritura, el mismo usuario lee del primario durante estos segundos
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SESSION_COOKIE_SECURE = False  # Cambia a True si usas HTTPS
+
+    # Caché de páginas públicas (HTML renderizado en memoria)
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', '1') == '1'
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 60))  # segundos
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 128))
+
+    # Contadores de estadísticas: cada cuánto se reconcilian con COUNT(*) reales
+    COUNTERS_RECONCILE_SECONDS = int(os.getenv('COUNTERS_RECONCILE_SECONDS', 3600))
+
+    # Paginación por cursor de los listados
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', 24))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 100))
+
+    # Servido de imágenes subidas
+    UPLOADS_MAX_AGE = int(os.getenv('UPLOADS_MAX_AGE', 300))  # URLs sin huella ?v=
+    # Prefijo de una location "internal" de nginx (p. ej. /_uploads/); si se
+    # define, Flask responde con X-Accel-Redirect y nginx envía el archivo.
+    UPLOADS_ACCEL_REDIRECT = os.getenv('UPLOADS_ACCEL_REDIRECT')
+    # Alternativa para Apache/lighttpd (mod_xsendfile): opción nativa de Flask
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', '0') == '1'
+
+    # Assets: usar las copias con huella de static/dist/ si existe el manifiesto
+    ASSETS_USE_MANIFEST = os.getenv('ASSETS_USE_MANIFEST', '1') == '1'
+
+    # Compresión de respuestas dinámicas (gzip/deflate según Accept-Encoding)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))  # bytes
+
+    # API del catálogo: segundos de caché pública de las respuestas
+    API_CACHE_SECONDS = int(os.getenv('API_CACHE_SECONDS', 60))
+
+    # Reportes PDF en segundo plano
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))  # hilos del pool
+    REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 300))  # segundos que se reutiliza un PDF
+    REPORT_MAX_JOBS = int(os.getenv('REPORT_MAX_JOBS', 64))
+    # Estado y PDFs compartidos por todos los workers (por defecto instance/reportes)
+    REPORT_STORAGE_DIR = os.getenv('REPORT_STORAGE_DIR')
+
+    # Métricas de rendimiento (/admin/metricas, formato Prometheus)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Bearer para el scraper; sin él, solo admins con sesión
+
+    # Diagnóstico de SQL para desarrollo/staging: consultas lentas con su
+    # EXPLAIN y detección de N+1 (recorre la pila en cada sentencia)
+    SQL_DIAGNOSTICS = os.getenv('SQL_DIAGNOSTICS', '0') == '1'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1'
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))  # repeticiones por petición
+
+    # Importación masiva de productos (CSV): filas por transacción
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 500))
+
+    # Benchmarks (`flask benchmark`): historial de resultados para comparar versiones
+    BENCHMARK_RESULTS = os.getenv('BENCHMARK_RESULTS', 'benchmarks/resultados.jsonl')
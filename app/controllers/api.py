@@ -0,0 +1,218 @@
+import json
+
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context, url_for
+from sqlalchemy import false, func, select
+
+from app import db
+from app.models.models import Categoria, Producto
+from app.services.busqueda import consulta_ranking
+from app.services.imagenes import url_imagen
+from app.services.paginacion import paginar_keyset
+from app.services.variantes import filtro_disponible
+
+# -------------------------------
+# API JSON de solo lectura del catálogo (/api/v1)
+# -------------------------------
+api_cp = Blueprint('api_v1', __name__)
+
+
+@api_cp.before_request
+def _usar_replica():
+    # API de solo lectura: todas sus consultas pueden ir a la réplica
+    g.leer_replica = True
+
+LOTE_EXPORTACION = 500
+
+
+class ErrorAPI(Exception):
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.estado = estado
+
+
+@api_cp.errorhandler(ErrorAPI)
+def _error_api(e):
+    return jsonify({'error': e.mensaje}), e.estado
+
+
+@api_cp.errorhandler(404)
+def _no_encontrado(e):
+    return jsonify({'error': 'No encontrado'}), 404
+
+
+def _lista(texto):
+    return [valor.strip() for valor in texto.split(',') if valor.strip()] if texto else []
+
+
+# Campos públicos de producto: nombre -> (columna, conversión del valor)
+CAMPOS_PRODUCTO = {
+    'id': (Producto.id, None),
+    'nombre': (Producto.nombre, None),
+    'descripcion': (Producto.descripcion, None),
+    'precio': (Producto.precio, float),
+    'stock': (func.coalesce(Producto.stock, 0), None),
+    'destacado': (Producto.destacado, bool),
+    'colores': (Producto.colores, _lista),
+    'tallas': (Producto.tallas, _lista),
+    'categoria_id': (Producto.categoria_id, None),
+    'categoria': (Categoria.nombre, None),
+    'imagen': (Producto.imagen, lambda v: url_imagen(v, externa=True) if v else None),
+    'creado': (Producto.created_at, lambda v: v.isoformat()),
+}
+
+
+def _campos(por_defecto=None):
+    """Proyección pedida con ?fields=a,b,c (el id siempre se incluye)."""
+    pedidos = _lista(request.args.get('fields')) or list(por_defecto or CAMPOS_PRODUCTO)
+    desconocidos = [c for c in pedidos if c not in CAMPOS_PRODUCTO]
+    if desconocidos:
+        raise ErrorAPI(f"Campos desconocidos: {', '.join(desconocidos)}. "
+                       f"Disponibles: {', '.join(CAMPOS_PRODUCTO)}")
+    return ['id'] + [c for c in dict.fromkeys(pedidos) if c != 'id']
+
+
+def _numero(nombre, tipo=float):
+    valor = request.args.get(nombre)
+    if valor in (None, ''):
+        return None
+    try:
+        return tipo(valor)
+    except ValueError:
+        raise ErrorAPI(f'Parámetro {nombre} inválido: {valor!r}') from None
+
+
+def _consulta_productos(campos):
+    """Consulta de columnas (sin objetos ORM) con los filtros de la URL."""
+    query = db.session.query(
+        *[CAMPOS_PRODUCTO[campo][0].label(campo) for campo in campos]
+    ).select_from(Producto)
+    if 'categoria' in campos:
+        query = query.outerjoin(Categoria, Categoria.id == Producto.categoria_id)
+
+    categoria_id = _numero('categoria', int)
+    if categoria_id is not None:
+        query = query.filter(Producto.categoria_id == categoria_id)
+    if request.args.get('destacado') in ('1', 'true'):
+        query = query.filter(Producto.destacado == True)  # noqa: E712
+    if request.args.get('disponible') in ('1', 'true'):
+        query = query.filter(Producto.stock > 0)
+    talla = request.args.get('talla', '').strip()
+    color = request.args.get('color', '').strip()
+    if talla or color:
+        query = query.filter(filtro_disponible(talla, color))
+    precio_min = _numero('precio_min')
+    if precio_min is not None:
+        query = query.filter(Producto.precio >= precio_min)
+    precio_max = _numero('precio_max')
+    if precio_max is not None:
+        query = query.filter(Producto.precio <= precio_max)
+
+    texto = request.args.get('buscar', '').strip()
+    if texto:
+        busqueda = consulta_ranking(texto)
+        if busqueda is None:
+            return query.filter(false())
+        _, ranking = busqueda
+        query = query.filter(Producto.id.in_(select(ranking.c.producto_id)))
+    return query
+
+
+def _serializar(fila, campos):
+    datos = {}
+    for campo in campos:
+        valor = getattr(fila, campo)
+        conversion = CAMPOS_PRODUCTO[campo][1]
+        datos[campo] = conversion(valor) if conversion and valor is not None else valor
+    return datos
+
+
+def _cacheable(respuesta):
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = current_app.config.get('API_CACHE_SECONDS', 60)
+    return respuesta
+
+
+def _url_cursor(cursor):
+    if not cursor:
+        return None
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    return url_for(request.endpoint, **args, _external=True)
+
+
+def _pagina_productos(campos):
+    pagina = paginar_keyset(
+        _consulta_productos(campos), [(Producto.id, 'asc', 'id')], request.args.get('cursor')
+    )
+    return _cacheable(jsonify({
+        'data': [_serializar(fila, campos) for fila in pagina],
+        'paginacion': {
+            'limite': pagina.limite,
+            'siguiente': pagina.siguiente,
+            'anterior': pagina.anterior,
+            'url_siguiente': _url_cursor(pagina.siguiente),
+            'url_anterior': _url_cursor(pagina.anterior),
+        },
+    }))
+
+
+# -------------------------------
+# Endpoints
+# -------------------------------
+@api_cp.route('/productos')
+def listar_productos():
+    """Productos por id ascendente; filtros: categoria, destacado, disponible, talla, color, precio_min, precio_max, buscar."""
+    return _pagina_productos(_campos())
+
+
+@api_cp.route('/productos/<int:producto_id>')
+def obtener_producto(producto_id):
+    campos = _campos()
+    query = db.session.query(
+        *[CAMPOS_PRODUCTO[campo][0].label(campo) for campo in campos]
+    ).select_from(Producto).outerjoin(Categoria, Categoria.id == Producto.categoria_id)
+    fila = query.filter(Producto.id == producto_id).first()
+    if fila is None:
+        raise ErrorAPI('Producto no encontrado', 404)
+    return _cacheable(jsonify({'data': _serializar(fila, campos)}))
+
+
+@api_cp.route('/stock')
+def listar_stock():
+    """Atajo de /productos?fields=stock para sincronizar inventario."""
+    return _pagina_productos(_campos(por_defecto=['stock']))
+
+
+@api_cp.route('/categorias')
+def listar_categorias():
+    productos_por_categoria = (
+        select(Producto.categoria_id, func.count(Producto.id).label('productos'))
+        .group_by(Producto.categoria_id)
+        .subquery()
+    )
+    filas = db.session.execute(
+        select(Categoria.id, Categoria.nombre, Categoria.descripcion,
+               func.coalesce(productos_por_categoria.c.productos, 0).label('productos'))
+        .outerjoin(productos_por_categoria, productos_por_categoria.c.categoria_id == Categoria.id)
+        .order_by(Categoria.nombre)
+    ).all()
+    return _cacheable(jsonify({'data': [dict(fila._mapping) for fila in filas]}))
+
+
+@api_cp.route('/productos/export')
+def exportar_productos():
+    """Todo el catálogo filtrado como NDJSON (una línea JSON por producto).
+
+    Se recorre con yield_per, así que la memoria no crece con el catálogo.
+    """
+    campos = _campos()
+    query = _consulta_productos(campos).order_by(Producto.id).yield_per(LOTE_EXPORTACION)
+
+    def generar():
+        for fila in query:
+            yield json.dumps(_serializar(fila, campos), ensure_ascii=False) + '\n'
+
+    respuesta = Response(stream_with_context(generar()), mimetype='application/x-ndjson')
+    respuesta.headers['Content-Disposition'] = 'attachment; filename=productos.ndjson'
+    return respuesta
@@ -1,16 +1,36 @@
 import datetime
-from io import BytesIO
 import traceback
-from flask import Blueprint, abort, flash, jsonify, redirect, render_template, request, send_file, send_from_directory, session, url_for
+from flask import Blueprint, Response, abort, current_app, flash, jsonify, make_response, redirect, render_template, request, send_file, session, url_for
 import os
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
-from sqlalchemy import extract, func
+from sqlalchemy import false, func, or_, select
 from app import db
 from datetime import datetime, date, time, timedelta
 from flask_login import current_user, login_required, login_user, logout_user
 from fpdf import FPDF  
 from app.models.models import Categoria, DetalleVenta, Gasto, Producto, Usuario, Venta
+from app.services.cache import cache_publica, invalidar_paginas_publicas
+from app.services.compresion import metricas_compresion
+from app.services.busqueda import consulta_ranking
+from app.services.carrito import (
+    agregar_item, cambiar_cantidad, eliminar_item, migrar_carrito_sesion, obtener_carrito,
+    vaciar_carrito as vaciar_carrito_usuario,
+)
+from app.services.contadores import obtener_contadores
+from app.services.exportacion import EXPORTACIONES, respuesta_csv, respuesta_xlsx
+from app.services.facetas import contar_facetas, filtro_facetas, seleccion_de
+from app.services.imagenes import eliminar_variantes, imagen_responsive, procesar_subida, servir_imagen
+from app.services.importacion import (
+    COLUMNAS as COLUMNAS_PRODUCTOS, filas_productos, importar_productos as importar_csv_productos,
+)
+from app.services.metricas import exportar_metricas, token_valido
+from app.services.paginacion import paginar_keyset
+from app.services.replicas import lectura_en_replica, leer_de_replica
+from app.services.reportes import clave_reporte, cola_reportes
+from app.services.resumen import rango_mes, totales_periodo, ventas_por_mes
+from app.services.ventas import ErrorVenta, registrar_venta
+from app.services.variantes import opciones_en_stock, sincronizar_variantes, variante_valida
 
 # Obtiene la ruta absoluta a la carpeta de plantillas dentro del módulo
 template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
@@ -26,15 +46,17 @@ auth_cp = Blueprint('auth_cp', __name__, template_folder=template_dir)
 # -------------------------------
 
 @inicio_cp.route('/inicio')
+@cache_publica()
 def inicio_publico():
     categorias = Categoria.query.all()
     productos_destacados = Producto.query.filter_by(destacado=True).limit(8).all()
     productos_recientes = Producto.query.order_by(Producto.created_at.desc()).limit(8).all()
     
     # Estadísticas para mostrar
-    total_productos = Producto.query.count()
-    total_categorias = Categoria.query.count()
-    total_clientes = Usuario.query.filter_by(is_admin=False).count()
+    contadores = obtener_contadores()
+    total_productos = contadores['productos']
+    total_categorias = contadores['categorias']
+    total_clientes = contadores['clientes']
     
     return render_template('auth/inicio.html',
                          categorias=categorias,
@@ -92,6 +114,7 @@ def register():
 
         db.session.add(nuevo_usuario)
         db.session.commit()
+        invalidar_paginas_publicas()
 
         flash('Registro exitoso. Ahora puedes iniciar sesión.', 'success')
         return redirect(url_for('auth.login'))
@@ -106,61 +129,49 @@ def logout():
     flash('Has cerrado sesión.', 'info')
     return redirect(url_for('inicio_cp.inicio_publico'))
 
-@usuario_cp.route('/uploads/productos/<filename>')
+@usuario_cp.route('/uploads/productos/<path:filename>')
 def serve_uploaded_file(filename):
-    # Ruta absoluta a la carpeta de uploads
-    uploads_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads', 'productos')
-    return send_from_directory(uploads_dir, filename)
+    # Caché inmutable con ?v=, 304 por ETag y opcionalmente X-Accel-Redirect
+    return servir_imagen(filename)
 #-------------------------------
 # Rutas de administración
 #-------------------------------
 @admin_cp.route('/dashboard')
 @login_required
+@lectura_en_replica
 def dashboard():
     if not current_user.is_admin:
         return redirect(url_for('inicio_cp.inicio_publico'))
 
     # Datos principales
-    total_usuarios = Usuario.query.count()
-    total_productos = Producto.query.count()
-    total_ventas = db.session.query(func.sum(Venta.total)).scalar() or 0
+    contadores = obtener_contadores()
+    total_usuarios = contadores['clientes'] + contadores['admins']
+    total_productos = contadores['productos']
+    total_ventas, total_ventas_count, _ = totales_periodo()
     
     # Datos adicionales para el nuevo dashboard
     productos_destacados = Producto.query.filter_by(destacado=True).all()
     usuarios_activos = Usuario.query.filter_by(is_active=True).all()
-    total_categorias = Categoria.query.count()
+    total_categorias = contadores['categorias']
     
-    # Ventas del mes actual
+    # Ventas del mes actual (desde el resumen diario)
     from datetime import datetime
-    mes_actual = datetime.now().month
-    ventas_mes_actual = Venta.query.filter(
-        extract('month', Venta.fecha) == mes_actual
-    ).count()
+    hoy = date.today()
+    _, ventas_mes_actual, _ = totales_periodo(desde=hoy.replace(day=1), hasta=hoy)
     
     # Productos con stock bajo (menos de 10 unidades)
-    productos_bajo_stock = Producto.query.filter(Producto.stock < 10).count()
+    productos_bajo_stock = contadores['productos_stock_bajo']
     
     # Ticket promedio
-    total_ventas_count = Venta.query.count()
     ticket_promedio = total_ventas / total_ventas_count if total_ventas_count > 0 else 0
 
-    # Datos para gráfico
-    ventas_por_mes = (
-        db.session.query(
-            extract('month', Venta.fecha).label('mes'),
-            func.sum(Venta.total).label('total_mes')
-        )
-        .group_by('mes')
-        .order_by('mes')
-        .all()
-    )
-
+    # Datos para gráfico: últimos 12 meses, separados por año
     meses = []
     montos = []
     nombres_meses = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
 
-    for mes, total in ventas_por_mes:
-        meses.append(nombres_meses[int(mes) - 1])
+    for anio, mes, total in ventas_por_mes(12, hoy):
+        meses.append(f"{nombres_meses[int(mes) - 1]} {int(anio)}")
         montos.append(round(total, 2))
 
     return render_template(
@@ -178,11 +189,28 @@ def dashboard():
         montos=montos,
         now=datetime.now()
     )
-@admin_cp.route('/uploads/productos/<filename>')
+
+@admin_cp.route('/metricas/compresion')
+@login_required
+def metricas_compresion_json():
+    if not current_user.is_admin:
+        abort(403)
+    return jsonify(metricas_compresion.resumen())
+
+@admin_cp.route('/metricas')
+def metricas_prometheus():
+    # El scraper se identifica con METRICS_TOKEN; en el navegador, sesión de admin
+    if not token_valido() and not (current_user.is_authenticated and current_user.is_admin):
+        abort(403)
+    respuesta = Response(exportar_metricas(), mimetype='text/plain')
+    respuesta.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    respuesta.cache_control.no_store = True
+    return respuesta
+
+@admin_cp.route('/uploads/productos/<path:filename>')
 def admin_serve_uploaded_file(filename):
-    # Ruta absoluta a la carpeta de uploads
-    uploads_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads', 'productos')
-    return send_from_directory(uploads_dir, filename)
+    # Caché inmutable con ?v=, 304 por ETag y opcionalmente X-Accel-Redirect
+    return servir_imagen(filename)
 # -------------------------------
 # Gestion de Usuarios
 # -------------------------------
@@ -192,18 +220,42 @@ def gestion_usuarios():
     if not current_user.is_admin:
         return redirect(url_for('inicio_cp.inicio_publico'))
 
-    usuarios = Usuario.query.order_by(Usuario.created_at.desc()).all()
+    # --- Filtros (aplicados en SQL) ---
+    texto = request.args.get('buscar', '').strip()
+    rol = request.args.get('rol', 'all')
+    estado = request.args.get('estado', 'all')
+
+    query = Usuario.query
+    if texto:
+        query = query.filter(or_(
+            Usuario.username.ilike(f"%{texto}%"),
+            Usuario.email.ilike(f"%{texto}%"),
+        ))
+    if rol == 'admin':
+        query = query.filter(Usuario.is_admin == True)  # noqa: E712
+    elif rol == 'user':
+        query = query.filter(Usuario.is_admin == False)  # noqa: E712
+    if estado == 'inactive':
+        # UserMixin considera activos a todos los usuarios
+        query = query.filter(false())
+    if request.args.get('recientes'):
+        query = query.filter(Usuario.created_at >= datetime.now() - timedelta(days=30))
+
+    usuarios = paginar_keyset(query, [
+        (Usuario.created_at, 'desc', 'created_at'),
+        (Usuario.id, 'desc', 'id'),
+    ], request.args.get('cursor'))
     
     # Estadísticas para mostrar
-    total_usuarios = Usuario.query.count()
-    total_admins = Usuario.query.filter_by(is_admin=True).count()
+    contadores = obtener_contadores()
+    total_usuarios = contadores['clientes'] + contadores['admins']
+    total_admins = contadores['admins']
     usuarios_activos = Usuario.query.filter_by(is_active=True).count()
     
-    # Usuarios nuevos este mes
-    from datetime import datetime
-    mes_actual = datetime.now().month
+    # Usuarios nuevos este mes (rango de fechas: usa ix_usuarios_creado)
+    inicio_mes, inicio_mes_siguiente = rango_mes(date.today())
     nuevos_este_mes = Usuario.query.filter(
-        extract('month', Usuario.created_at) == mes_actual
+        Usuario.created_at >= inicio_mes, Usuario.created_at < inicio_mes_siguiente
     ).count()
 
     return render_template('admin/users/usuarios.html', 
@@ -238,6 +290,7 @@ def nuevo_usuario():
         )
         db.session.add(nuevo)
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('Usuario creado exitosamente.', 'success')
         return redirect(url_for('admin.gestion_usuarios'))
 
@@ -263,6 +316,7 @@ def editar_usuario(id):
             usuario.password_hash = generate_password_hash(request.form['password'])
 
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('Usuario actualizado correctamente.', 'success')
         return redirect(url_for('admin.gestion_usuarios'))
 
@@ -279,6 +333,7 @@ def eliminar_usuario(id):
     usuario = Usuario.query.get_or_404(id)
     db.session.delete(usuario)
     db.session.commit()
+    invalidar_paginas_publicas()
     flash('Usuario eliminado correctamente.', 'success')
     return redirect(url_for('admin.gestion_usuarios'))
 
@@ -286,16 +341,54 @@ def eliminar_usuario(id):
 # =====================================================
 #  GESTIÓN DE PRODUCTOS
 # =====================================================
+# Orden disponible en la gestión de productos: (expresión, dirección, atributo)
+ORDENES_PRODUCTOS = {
+    'name': [(Producto.nombre, 'asc', 'nombre'), (Producto.id, 'asc', 'id')],
+    'price': [(Producto.precio, 'asc', 'precio'), (Producto.id, 'asc', 'id')],
+    'stock': [(func.coalesce(Producto.stock, 0), 'desc', lambda p: p.stock or 0), (Producto.id, 'desc', 'id')],
+    'recent': [(Producto.id, 'desc', 'id')],
+}
+
+
 @admin_cp.route('/admin/gestion_productos')
+@lectura_en_replica
 def gestion_productos():
-    productos = Producto.query.order_by(Producto.id.desc()).all()
+    # --- Filtros y orden (aplicados en SQL) ---
+    texto = request.args.get('buscar', '').strip()
+    estado = request.args.get('estado', 'all')
+    categoria_id = request.args.get('categoria', type=int)
+    precio_min = request.args.get('precio_min', type=float)
+    precio_max = request.args.get('precio_max', type=float)
+    orden = ORDENES_PRODUCTOS.get(request.args.get('orden'), ORDENES_PRODUCTOS['recent'])
+
+    query = Producto.query.options(db.joinedload(Producto.categoria))
+    if texto:
+        query = query.outerjoin(Categoria, Producto.categoria_id == Categoria.id).filter(or_(
+            Producto.nombre.ilike(f"%{texto}%"),
+            Categoria.nombre.ilike(f"%{texto}%"),
+        ))
+    if estado == 'featured':
+        query = query.filter(Producto.destacado == True)  # noqa: E712
+    elif estado == 'low-stock':
+        query = query.filter(Producto.stock > 0, Producto.stock < 3)
+    elif estado == 'no-stock':
+        query = query.filter(Producto.stock == 0)
+    if categoria_id:
+        query = query.filter(Producto.categoria_id == categoria_id)
+    if precio_min is not None:
+        query = query.filter(Producto.precio >= precio_min)
+    if precio_max is not None:
+        query = query.filter(Producto.precio <= precio_max)
+
+    productos = paginar_keyset(query, orden, request.args.get('cursor'))
     categorias = Categoria.query.order_by(Categoria.nombre.asc()).all()
     
     # Estadísticas para mostrar
-    total_productos = Producto.query.count()
-    productos_destacados = Producto.query.filter_by(destacado=True).count()
-    stock_bajo = Producto.query.filter(Producto.stock < 3).count()
-    total_categorias = Categoria.query.count()
+    contadores = obtener_contadores()
+    total_productos = contadores['productos']
+    productos_destacados = contadores['productos_destacados']
+    stock_bajo = contadores['productos_stock_critico']
+    total_categorias = contadores['categorias']
     
     return render_template('admin/productos/productos.html', 
                          productos=productos, 
@@ -340,6 +433,7 @@ def nuevo_producto():
             os.makedirs(UPLOAD_FOLDER, exist_ok=True)
             path = os.path.join(UPLOAD_FOLDER, filename)
             imagen_archivo.save(path)
+            procesar_subida(filename)
             nombre_imagen = filename
 
         nuevo = Producto(
@@ -355,7 +449,9 @@ def nuevo_producto():
         )
 
         db.session.add(nuevo)
+        sincronizar_variantes(nuevo)
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('✅ Producto creado correctamente.', 'success')
 
         return redirect(url_for('admin.gestion_productos'))
@@ -396,10 +492,15 @@ def editar_producto(id):
                 old_path = os.path.join(UPLOAD_FOLDER, producto.imagen)
                 if os.path.exists(old_path):
                     os.remove(old_path)
+                eliminar_variantes(producto.imagen)
 
+            # 🔹 Variantes redimensionadas (tarjeta, modal, carrito)
+            procesar_subida(filename)
             producto.imagen = filename
 
+        sincronizar_variantes(producto)
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('✅ Producto actualizado correctamente.', 'success')
         return redirect(url_for('admin.gestion_productos'))
 
@@ -411,6 +512,7 @@ def eliminar_producto(id):
     producto = Producto.query.get_or_404(id)
     db.session.delete(producto)
     db.session.commit()
+    invalidar_paginas_publicas()
     flash('🗑️ Producto eliminado correctamente', 'danger')
     return redirect(url_for('admin.gestion_productos'))
 
@@ -430,6 +532,7 @@ def nueva_categoria():
         categoria = Categoria(nombre=nombre, descripcion=descripcion)
         db.session.add(categoria)
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('✅ Categoría creada correctamente', 'success')
 
     return redirect(url_for('admin.gestion_productos'))
@@ -439,6 +542,7 @@ def eliminar_categoria(id):
     categoria = Categoria.query.get_or_404(id)
     db.session.delete(categoria)
     db.session.commit()
+    invalidar_paginas_publicas()
     flash('🗑️ Categoría eliminada', 'danger')
     return redirect(url_for('admin.gestion_productos'))
 
@@ -448,64 +552,152 @@ def editar_categoria(id):
     categoria.nombre = request.form['nombre']
     categoria.descripcion = request.form.get('descripcion', '')
     db.session.commit()
+    invalidar_paginas_publicas()
     flash('✏️ Categoría actualizada', 'info')
     return redirect(url_for('admin.gestion_productos'))
+
+# =====================================================
+#  IMPORTAR / EXPORTAR PRODUCTOS (CSV)
+# =====================================================
+@admin_cp.route('/admin/productos/importar', methods=['GET', 'POST'])
+@login_required
+def importar_productos():
+    if not current_user.is_admin:
+        return redirect(url_for('inicio_cp.inicio_publico'))
+
+    resultado = None
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('⚠️ Selecciona un archivo CSV', 'warning')
+            return redirect(url_for('admin.importar_productos'))
+        resultado = importar_csv_productos(archivo.stream, 'crear_categorias' in request.form)
+        if resultado.error_archivo:
+            flash(f'❌ {resultado.error_archivo}', 'danger')
+        else:
+            flash(f'✅ {resultado.creados} productos creados y {resultado.actualizados} actualizados.',
+                  'warning' if resultado.total_errores else 'success')
+
+    return render_template('admin/productos/importar_productos.html',
+                           resultado=resultado, columnas=COLUMNAS_PRODUCTOS)
+
+
+@admin_cp.route('/admin/productos/exportar.csv')
+@login_required
+@lectura_en_replica
+def exportar_productos():
+    if not current_user.is_admin:
+        return redirect(url_for('inicio_cp.inicio_publico'))
+    nombre_archivo = f"productos_{datetime.now().strftime('%Y%m%d')}.csv"
+    return respuesta_csv(nombre_archivo, COLUMNAS_PRODUCTOS, filas_productos())
+
 # =====================================================
 #  GESTIÓN DE VENTAS
 # =====================================================
 
-# LISTAR VENTAS
-@admin_cp.route('/admin/gestion_ventas')
-def gestion_ventas():
-    # --- FILTROS recibidos desde la UI ---
+def _filtros_ventas():
+    """Lee los filtros de la UI y devuelve (inicio, fin, cliente).
+
+    Sin filtros se usa el día actual; las fechas inválidas se ignoran.
+    """
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     cliente = request.args.get('cliente', '').strip()
-
-    ventas_query = Venta.query
-    gastos_query = Gasto.query
+    inicio = fin = None
 
     # Si no hay filtros, filtramos por el día actual (inicio -> fin del día)
     if not fecha_desde and not fecha_hasta and not cliente:
         hoy = date.today()
         inicio = datetime.combine(hoy, time.min)   # 00:00:00
         fin = datetime.combine(hoy, time.max)      # 23:59:59.999999
-        ventas_query = ventas_query.filter(Venta.fecha >= inicio, Venta.fecha <= fin)
-        gastos_query = gastos_query.filter(Gasto.fecha >= inicio, Gasto.fecha <= fin)
     else:
-        # Si se proporcionó fecha_desde
         if fecha_desde:
             try:
-                fd = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-                inicio = datetime.combine(fd, time.min)
-                ventas_query = ventas_query.filter(Venta.fecha >= inicio)
-                gastos_query = gastos_query.filter(Gasto.fecha >= inicio)
+                inicio = datetime.combine(datetime.strptime(fecha_desde, "%Y-%m-%d").date(), time.min)
             except ValueError:
-                # fecha inválida -> ignoramos el filtro (o podrías flash de aviso)
+                # fecha inválida -> ignoramos el filtro
                 pass
-
-        # Si se proporcionó fecha_hasta
         if fecha_hasta:
             try:
-                fh = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-                fin = datetime.combine(fh, time.max)
-                ventas_query = ventas_query.filter(Venta.fecha <= fin)
-                gastos_query = gastos_query.filter(Gasto.fecha <= fin)
+                fin = datetime.combine(datetime.strptime(fecha_hasta, "%Y-%m-%d").date(), time.max)
             except ValueError:
                 pass
 
-        # Filtro por cliente (aplica solo para ventas)
-        if cliente:
-            ventas_query = ventas_query.join(Usuario).filter(Usuario.username.ilike(f"%{cliente}%"))
+    return inicio, fin, cliente
 
-    # Ejecutar consultas y ordenar por fecha descendente
-    ventas = ventas_query.order_by(Venta.fecha.desc()).all()
-    gastos = gastos_query.order_by(Gasto.fecha.desc()).all()
+
+def _consultas_ventas(inicio, fin, cliente):
+    """Construye las consultas de ventas y gastos para los filtros dados.
+
+    El cliente de cada venta se carga en la misma consulta (sin N+1).
+    """
+    ventas_query = Venta.query.options(db.joinedload(Venta.usuario))
+    gastos_query = Gasto.query
+    if inicio:
+        ventas_query = ventas_query.filter(Venta.fecha >= inicio)
+        gastos_query = gastos_query.filter(Gasto.fecha >= inicio)
+    if fin:
+        ventas_query = ventas_query.filter(Venta.fecha <= fin)
+        gastos_query = gastos_query.filter(Gasto.fecha <= fin)
+    # Filtro por cliente (aplica solo para ventas)
+    if cliente:
+        ventas_query = ventas_query.join(Usuario).filter(Usuario.username.ilike(f"%{cliente}%"))
+    return ventas_query, gastos_query
+
+
+def _items_por_venta(ids):
+    """Cantidad de líneas de detalle por venta, en una sola consulta agrupada."""
+    if not ids:
+        return {}
+    return dict(
+        db.session.query(DetalleVenta.venta_id, func.count(DetalleVenta.id))
+        .filter(DetalleVenta.venta_id.in_(ids))
+        .group_by(DetalleVenta.venta_id)
+        .all()
+    )
+
+
+def _totales_ventas(inicio, fin, cliente, ventas_query):
+    """Totales del periodo leídos del resumen diario.
+
+    Los filtros son por día completo, así que el resumen coincide con las
+    tablas crudas; solo el filtro por cliente obliga a sumar en SQL.
+    """
+    total_ventas, num_ventas, total_gastos = totales_periodo(
+        desde=inicio.date() if inicio else None,
+        hasta=fin.date() if fin else None,
+    )
+    if cliente:
+        total_ventas, num_ventas = ventas_query.with_entities(
+            func.coalesce(func.sum(Venta.total), 0), func.count(Venta.id)
+        ).one()
+    return total_ventas, total_gastos, total_ventas - total_gastos, num_ventas
+
+
+# LISTAR VENTAS
+@admin_cp.route('/admin/gestion_ventas')
+@lectura_en_replica
+def gestion_ventas():
+    # --- FILTROS recibidos desde la UI ---
+    fecha_desde = request.args.get('fecha_desde')
+    fecha_hasta = request.args.get('fecha_hasta')
+    inicio, fin, cliente = _filtros_ventas()
+    ventas_query, gastos_query = _consultas_ventas(inicio, fin, cliente)
+
+    # Ejecutar consultas paginadas, ordenadas por fecha descendente
+    ventas = paginar_keyset(ventas_query, [
+        (Venta.fecha, 'desc', 'fecha'),
+        (Venta.id, 'desc', 'id'),
+    ], request.args.get('cursor_ventas'))
+    gastos = paginar_keyset(gastos_query, [
+        (Gasto.fecha, 'desc', 'fecha'),
+        (Gasto.id, 'desc', 'id'),
+    ], request.args.get('cursor_gastos'))
+
+    items_por_venta = _items_por_venta([v.id for v in ventas])
 
     # --- Cálculos de totales ---
-    total_ventas = sum(v.total for v in ventas) if ventas else 0.0
-    total_gastos = sum(g.monto for g in gastos) if gastos else 0.0
-    total_neto = total_ventas - total_gastos
+    total_ventas, total_gastos, total_neto, num_ventas = _totales_ventas(inicio, fin, cliente, ventas_query)
 
     # Pasar también los valores de filtro a la plantilla para mantener el formulario
     return render_template(
@@ -515,6 +707,8 @@ def gestion_ventas():
         total_ventas=total_ventas,
         total_gastos=total_gastos,
         total_neto=total_neto,
+        num_ventas=num_ventas,
+        items_por_venta=items_por_venta,
         filtro_fecha_desde=fecha_desde or '',
         filtro_fecha_hasta=fecha_hasta or '',
         filtro_cliente=cliente or ''
@@ -536,31 +730,16 @@ def nueva_venta():
             flash('⚠️ Debes seleccionar al menos un producto.', 'warning')
             return redirect(url_for('admin.nueva_venta'))
 
-        venta = Venta(usuario_id=usuario_id, total=0)
-        db.session.add(venta)
-        db.session.flush()  # Para obtener ID antes del commit
-
-        total = 0
-        for i, prod_id in enumerate(items):
-            producto = Producto.query.get(int(prod_id))
-            cantidad = int(cantidades[i])
-            subtotal = producto.precio * cantidad
-
-            # Descuenta stock
-            producto.stock -= cantidad
-
-            detalle = DetalleVenta(
-                venta_id=venta.id,
-                producto_id=producto.id,
-                cantidad=cantidad,
-                precio_unitario=producto.precio,
-                subtotal=subtotal
-            )
-            db.session.add(detalle)
-            total += subtotal
-
-        venta.total = total
-        db.session.commit()
+        lineas = [
+            {'producto_id': prod_id, 'cantidad': cantidad}
+            for prod_id, cantidad in zip(items, cantidades)
+        ]
+        try:
+            registrar_venta(usuario_id, lineas)
+        except ErrorVenta as e:
+            flash(f'⚠️ {e.mensaje}', 'warning')
+            return redirect(url_for('admin.nueva_venta'))
+        invalidar_paginas_publicas()
 
         flash('✅ Venta registrada correctamente', 'success')
         return redirect(url_for('admin.gestion_ventas'))
@@ -571,7 +750,11 @@ def nueva_venta():
 # DETALLE DE VENTA
 @admin_cp.route('/admin/ver_venta/<int:id>')
 def ver_venta(id):
-    venta = Venta.query.get_or_404(id)
+    # Cliente, detalles, productos y categorías en 2 consultas (la plantilla los recorre todos)
+    venta = Venta.query.options(
+        db.joinedload(Venta.usuario),
+        db.selectinload(Venta.detalles).joinedload(DetalleVenta.producto).joinedload(Producto.categoria),
+    ).get_or_404(id)
     return render_template('admin/ventas/ver_venta.html', venta=venta)
 
 
@@ -616,42 +799,22 @@ def eliminar_gasto(id):
 #  EXPORTAR PDF - REPORTE FINANCIERO
 # =====================================================
 
-@admin_cp.route('/admin/exportar_pdf')
-def exportar_pdf():
-    fecha_desde = request.args.get('fecha_desde')
-    fecha_hasta = request.args.get('fecha_hasta')
-    cliente = request.args.get('cliente', '').strip()
+def _generar_pdf_reporte(inicio, fin, cliente, fecha_desde, fecha_hasta):
+    """Arma el reporte financiero; se ejecuta en el pool de reportes.
 
-    ventas_query = Venta.query
-    gastos_query = Gasto.query
+    Devuelve (nombre_archivo, bytes del PDF).
+    """
+    with leer_de_replica():
+        return _armar_pdf_reporte(inicio, fin, cliente, fecha_desde, fecha_hasta)
 
-    # --- Filtros (idénticos a la vista) ---
-    if not fecha_desde and not fecha_hasta and not cliente:
-        hoy = date.today()
-        inicio = datetime.combine(hoy, time.min)
-        fin = datetime.combine(hoy, time.max)
-        ventas_query = ventas_query.filter(Venta.fecha >= inicio, Venta.fecha <= fin)
-        gastos_query = gastos_query.filter(Gasto.fecha >= inicio, Gasto.fecha <= fin)
-    else:
-        if fecha_desde:
-            fd = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-            inicio = datetime.combine(fd, time.min)
-            ventas_query = ventas_query.filter(Venta.fecha >= inicio)
-            gastos_query = gastos_query.filter(Gasto.fecha >= inicio)
-        if fecha_hasta:
-            fh = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-            fin = datetime.combine(fh, time.max)
-            ventas_query = ventas_query.filter(Venta.fecha <= fin)
-            gastos_query = gastos_query.filter(Gasto.fecha <= fin)
-        if cliente:
-            ventas_query = ventas_query.join(Usuario).filter(Usuario.username.ilike(f"%{cliente}%"))
+
+def _armar_pdf_reporte(inicio, fin, cliente, fecha_desde, fecha_hasta):
+    ventas_query, gastos_query = _consultas_ventas(inicio, fin, cliente)
 
     ventas = ventas_query.order_by(Venta.fecha.desc()).all()
     gastos = gastos_query.order_by(Gasto.fecha.desc()).all()
 
-    total_ventas = sum(v.total for v in ventas)
-    total_gastos = sum(g.monto for g in gastos)
-    total_neto = total_ventas - total_gastos
+    total_ventas, total_gastos, total_neto, _ = _totales_ventas(inicio, fin, cliente, ventas_query)
 
     # --- Crear el PDF profesional ---
     pdf = FPDF()
@@ -725,11 +888,117 @@ def exportar_pdf():
 
     # --- Exportar correctamente en memoria ---
     pdf_content = pdf.output(dest="S").encode("latin1")
-    buffer = BytesIO(pdf_content)
-    buffer.seek(0)
     filename = f"reporte_financiero_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+    return filename, pdf_content
 
-    return send_file(buffer, as_attachment=True, download_name=filename, mimetype="application/pdf")
+
+def _descargar_reporte(trabajo):
+    return send_file(
+        cola_reportes.ruta(trabajo.id), as_attachment=True,
+        download_name=trabajo.nombre_archivo, mimetype="application/pdf",
+    )
+
+
+def _estado_reporte(trabajo):
+    # Los filtros viajan en las URLs: si el trabajo vence o se invalida,
+    # cualquier worker puede volver a encolarlo (ver estado_reporte).
+    filtros = request.args.to_dict()
+    datos = trabajo.resumen()
+    datos['url_estado'] = url_for('admin.estado_reporte', trabajo_id=trabajo.id, **filtros)
+    if trabajo.estado == 'listo':
+        datos['url_descarga'] = url_for('admin.descargar_reporte', trabajo_id=trabajo.id, **filtros)
+    return datos
+
+
+def _pide_json():
+    return request.accept_mimetypes.best == 'application/json'
+
+
+@admin_cp.route('/admin/exportar_pdf')
+@login_required
+def exportar_pdf():
+    """Encola el reporte (o reutiliza uno vigente con los mismos filtros).
+
+    Con Accept: application/json responde enseguida con el estado del
+    trabajo; sin JavaScript redirige a la página de estado.
+    """
+    if not current_user.is_admin:
+        return redirect(url_for('inicio_cp.inicio_publico'))
+
+    # --- Filtros (idénticos a la vista) ---
+    inicio, fin, cliente = _filtros_ventas()
+    trabajo = cola_reportes.encolar(
+        current_app._get_current_object(),
+        clave_reporte('financiero', inicio, fin, cliente),
+        _generar_pdf_reporte,
+        inicio, fin, cliente, request.args.get('fecha_desde'), request.args.get('fecha_hasta'),
+    )
+
+    datos = _estado_reporte(trabajo)
+    if _pide_json():
+        return jsonify(datos), 200 if trabajo.estado == 'listo' else 202
+    return redirect(datos['url_estado'])
+
+
+@admin_cp.route('/admin/reportes/<trabajo_id>')
+@login_required
+def estado_reporte(trabajo_id):
+    """Estado en JSON, o una página que se recarga sola hasta la descarga."""
+    if not current_user.is_admin:
+        abort(403)
+    trabajo = cola_reportes.obtener(trabajo_id)
+    if trabajo is None:
+        if _pide_json():
+            abort(404)
+        # Vencido o invalidado: se vuelve a encolar con los mismos filtros
+        return redirect(url_for('admin.exportar_pdf', **request.args.to_dict()))
+    datos = _estado_reporte(trabajo)
+    if _pide_json():
+        return jsonify(datos)
+    if trabajo.estado == 'listo':
+        return redirect(datos['url_descarga'])
+    if trabajo.estado == 'error':
+        flash('❌ No se pudo generar el reporte PDF.', 'danger')
+        return redirect(url_for('admin.gestion_ventas'))
+    respuesta = make_response(render_template('admin/ventas/estado_reporte.html', trabajo=datos), 202)
+    respuesta.headers['Refresh'] = '1'
+    return respuesta
+
+
+@admin_cp.route('/admin/reportes/<trabajo_id>/pdf')
+@login_required
+def descargar_reporte(trabajo_id):
+    if not current_user.is_admin:
+        return redirect(url_for('inicio_cp.inicio_publico'))
+    trabajo = cola_reportes.obtener(trabajo_id)
+    if trabajo is None:
+        # Vencido o invalidado: se genera de nuevo con los mismos filtros
+        return redirect(url_for('admin.exportar_pdf', **request.args.to_dict()))
+    if trabajo.estado != 'listo':
+        return jsonify(_estado_reporte(trabajo)), 409
+    return _descargar_reporte(trabajo)
+
+
+# =====================================================
+#  EXPORTAR CSV / XLSX - VENTAS, DETALLES Y GASTOS
+# =====================================================
+@admin_cp.route('/admin/exportar/<tabla>.<formato>')
+@login_required
+@lectura_en_replica
+def exportar_tabla(tabla, formato):
+    if not current_user.is_admin:
+        return redirect(url_for('inicio_cp.inicio_publico'))
+    if tabla not in EXPORTACIONES or formato not in ('csv', 'xlsx'):
+        abort(404)
+
+    # Mismos filtros que gestion_ventas
+    inicio, fin, cliente = _filtros_ventas()
+    encabezados, filas = EXPORTACIONES[tabla](inicio, fin, cliente)
+    sufijo = '_'.join(f.strftime('%Y%m%d') for f in (inicio, fin) if f) or 'completo'
+    nombre_archivo = f'{tabla}_{sufijo}.{formato}'
+    if formato == 'csv':
+        return respuesta_csv(nombre_archivo, encabezados, filas)
+    return respuesta_xlsx(nombre_archivo, encabezados, filas, titulo=tabla.capitalize())
 
 
 # -------------------------------
@@ -740,31 +1009,94 @@ def exportar_pdf():
 def user_dashboard():
     categorias = Categoria.query.all()
     texto = request.args.get('buscar', '').strip()
-    categoria_id = request.args.get('categoria')
-
-    query = Producto.query
-    if texto:
-        query = query.filter(Producto.nombre.ilike(f"%{texto}%"))
-    if categoria_id:
-        query = query.filter(Producto.categoria_id == categoria_id)
-
-    productos = query.order_by(Producto.created_at.desc()).all()
+    seleccion = seleccion_de(request.args)
+
+    busqueda = consulta_ranking(texto) if texto else None
+    ids_busqueda = None
+    if busqueda:
+        # Búsqueda en el índice: resultados ordenados por relevancia
+        ranking, columnas = busqueda
+        ids_busqueda = select(columnas.c.producto_id)
+        ranking = ranking.filter(*filtro_facetas(seleccion, columna=columnas.c.producto_id))
+        productos = paginar_keyset(ranking, [
+            (columnas.c.puntaje, 'desc', 'puntaje'),
+            (columnas.c.producto_id, 'desc', 'producto_id'),
+        ], request.args.get('cursor'))
+        ids = [fila.producto_id for fila in productos.items]
+        por_id = {
+            p.id: p for p in
+            Producto.query.options(db.joinedload(Producto.categoria)).filter(Producto.id.in_(ids))
+        }
+        productos.items = [por_id[i] for i in ids if i in por_id]
+    else:
+        query = Producto.query.options(db.joinedload(Producto.categoria))
+        categoria_id = seleccion.get('categoria')
+        if categoria_id:
+            query = query.filter(Producto.categoria_id == categoria_id)
+        otras = {faceta: valor for faceta, valor in seleccion.items() if faceta != 'categoria'}
+        query = query.filter(*filtro_facetas(otras))
+        productos = paginar_keyset(query, [
+            (Producto.created_at, 'desc', 'created_at'),
+            (Producto.id, 'desc', 'id'),
+        ], request.args.get('cursor'))
+
+    # Conteos por opción: precalculados sin filtros; con filtros, un GROUP BY
+    # por faceta en una sola consulta
+    facetas, total_resultados = contar_facetas(
+        seleccion, ids_busqueda,
+        etiquetas={'categoria': {str(c.id): c.nombre for c in categorias}},
+    )
+    contadores = obtener_contadores()
     return render_template(
         'users/dashboard.html',
         categorias=categorias,
-        productos=productos
+        facetas=facetas,
+        total_resultados=total_resultados,
+        productos=productos,
+        total_productos=contadores['productos'],
+        total_destacados=contadores['productos_destacados']
     )
 
+# -------------------------------
+# DETALLE DE PRODUCTO (JSON para el modal del catálogo)
+# -------------------------------
+@usuario_cp.route('/productos/<int:producto_id>/detalle')
+@login_required
+def detalle_producto(producto_id):
+    producto = Producto.query.options(
+        db.joinedload(Producto.categoria), db.selectinload(Producto.variantes)
+    ).get_or_404(producto_id)
+    colores, tallas, variantes = opciones_en_stock(producto)
+    respuesta = jsonify({
+        'id': producto.id,
+        'nombre': producto.nombre,
+        'categoria': producto.categoria.nombre if producto.categoria else 'General',
+        'descripcion': producto.descripcion,
+        'precio': float(producto.precio or 0),
+        'stock': producto.stock or 0,
+        'colores': colores,
+        'tallas': tallas,
+        'variantes': variantes,
+        'imagen': imagen_responsive(producto.imagen) if producto.imagen else None,
+        'url_agregar': url_for('usuario_cp.agregar_carrito', producto_id=producto.id),
+    })
+    # El stock cambia con cada venta: caché corta y solo en el navegador
+    respuesta.cache_control.private = True
+    respuesta.cache_control.max_age = 30
+    return respuesta
+
 # -------------------------------
 # VER CARRITO
 # -------------------------------
 @usuario_cp.route('/carrito')
 @login_required
 def ver_carrito():
-    carrito = session.get('carrito', {})
+    migrar_carrito_sesion(current_user.id)
+    carrito = obtener_carrito(current_user.id)
     total = sum(item['precio'] * item['cantidad'] for item in carrito.values())
     return render_template('users/carrito.html', carrito=carrito, total=total)
 
+
 # -------------------------------
 # AGREGAR AL CARRITO (MODIFICADO PARA COLOR Y TALLA)
 # -------------------------------
@@ -772,34 +1104,20 @@ def ver_carrito():
 @login_required
 def agregar_carrito(producto_id):
     producto = Producto.query.get_or_404(producto_id)
-    carrito = session.get('carrito', {})
-    
+
     # Obtener color y talla del formulario
     color = request.form.get('color', 'Único')
     talla = request.form.get('talla', 'Única')
-    cantidad = int(request.form.get('cantidad', 1))
-    
-    # Crear una clave única que incluya color y talla
-    clave_item = f"{producto_id}_{color}_{talla}"
-    
-    if clave_item in carrito:
-        # Si ya existe el mismo producto con mismo color y talla, aumentar cantidad
-        carrito[clave_item]['cantidad'] += cantidad
-    else:
-        # Si es nuevo, agregar al carrito
-        carrito[clave_item] = {
-            'id': producto.id,
-            'nombre': producto.nombre,
-            'precio': producto.precio,
-            'imagen': producto.imagen,
-            'cantidad': cantidad,
-            'color': color,
-            'talla': talla,
-            'clave_unica': clave_item  # Para identificar fácilmente el item
-        }
+    cantidad = max(int(request.form.get('cantidad', 1)), 1)
+
+    if not variante_valida(producto, color, talla):
+        flash(f"{producto.nombre} no está disponible en {color} - {talla}.", "warning")
+        return redirect(url_for('usuario_cp.user_dashboard'))
+
+    # Misma línea si coinciden producto, color y talla
+    migrar_carrito_sesion(current_user.id)
+    agregar_item(current_user.id, producto.id, color, talla, cantidad)
 
-    session['carrito'] = carrito
-    session.modified = True
     flash(f"{producto.nombre} ({color} - {talla}) agregado al carrito.", "success")
     return redirect(url_for('usuario_cp.user_dashboard'))
 
@@ -809,26 +1127,17 @@ def agregar_carrito(producto_id):
 @usuario_cp.route('/actualizar_cantidad/<string:clave_unica>/<accion>')
 @login_required
 def actualizar_cantidad(clave_unica, accion):
-    carrito = session.get('carrito', {})
-    
-    if clave_unica in carrito:
-        if accion == 'aumentar':
-            carrito[clave_unica]['cantidad'] += 1
-        elif accion == 'disminuir':
-            if carrito[clave_unica]['cantidad'] > 1:
-                carrito[clave_unica]['cantidad'] -= 1
-            else:
-                # Si la cantidad es 1 y se intenta disminuir, eliminar el producto
-                carrito.pop(clave_unica, None)
-                flash("Producto eliminado del carrito.", "warning")
-                session['carrito'] = carrito
-                session.modified = True
-                return redirect(url_for('usuario_cp.ver_carrito'))
-        
-        session['carrito'] = carrito
-        session.modified = True
+    delta = {'aumentar': 1, 'disminuir': -1}.get(accion)
+    if delta is None:
+        return redirect(url_for('usuario_cp.ver_carrito'))
+
+    resultado = cambiar_cantidad(current_user.id, clave_unica, delta)
+    if resultado == 'eliminada':
+        # Si la cantidad era 1 y se intenta disminuir, se elimina el producto
+        flash("Producto eliminado del carrito.", "warning")
+    elif resultado == 'actualizada':
         flash("Cantidad actualizada.", "info")
-    
+
     return redirect(url_for('usuario_cp.ver_carrito'))
 
 # -------------------------------
@@ -837,15 +1146,9 @@ def actualizar_cantidad(clave_unica, accion):
 @usuario_cp.route('/eliminar_carrito/<string:clave_unica>')
 @login_required
 def eliminar_carrito(clave_unica):
-    carrito = session.get('carrito', {})
-    
-    if clave_unica in carrito:
-        nombre_producto = carrito[clave_unica]['nombre']
-        carrito.pop(clave_unica, None)
-        session['carrito'] = carrito
-        session.modified = True
-        flash(f"{nombre_producto} eliminado del carrito.", "warning")
-    
+    if eliminar_item(current_user.id, clave_unica):
+        flash("Producto eliminado del carrito.", "warning")
+
     return redirect(url_for('usuario_cp.ver_carrito'))
 
 # -------------------------------
@@ -855,35 +1158,83 @@ def eliminar_carrito(clave_unica):
 @login_required
 def vaciar_carrito():
     session.pop('carrito', None)
+    vaciar_carrito_usuario(current_user.id)
     flash("Carrito vaciado.", "info")
     return redirect(url_for('usuario_cp.ver_carrito'))
 
 # -------------------------------
 # PROCESAR PEDIDO (NUEVA RUTA)
 # -------------------------------
-@usuario_cp.route('/procesar_pedido')
+@usuario_cp.route('/procesar_pedido', methods=['GET', 'POST'])
 @login_required
 def procesar_pedido():
-    carrito = session.get('carrito', {})
+    migrar_carrito_sesion(current_user.id)
+    carrito = obtener_carrito(current_user.id)
     
     if not carrito:
         flash("Tu carrito está vacío.", "warning")
         return redirect(url_for('usuario_cp.ver_carrito'))
-    
-    # Aquí iría la lógica para procesar el pedido
-    # Por ahora solo redirigimos a una página de confirmación
-    return render_template('users/confirmacion_pedido.html', carrito=carrito)# -------------------------------
+
+    # El pedido solo se registra por POST (el botón del carrito)
+    if request.method == 'GET':
+        return redirect(url_for('usuario_cp.ver_carrito'))
+
+    lineas = [
+        {
+            'producto_id': item['id'],
+            'cantidad': item['cantidad'],
+            'color': item.get('color'),
+            'talla': item.get('talla'),
+        }
+        for item in carrito.values()
+    ]
+    try:
+        # El carrito se vacía en la misma transacción que la venta
+        venta = registrar_venta(current_user.id, lineas, vaciar_carrito=True)
+    except ErrorVenta as e:
+        flash(f"⚠️ No se pudo completar el pedido. {e.mensaje}", "warning")
+        return redirect(url_for('usuario_cp.ver_carrito'))
+
+    invalidar_paginas_publicas()
+    return render_template('users/confirmacion_pedido.html', carrito=carrito, venta=venta)
+# -------------------------------
 # RUTA DE INVENTARIO (ADMIN)
 # -------------------------------
 @admin_cp.route('/inventario')
 @login_required
+@lectura_en_replica
 def inventario():
    
     
-    # Obtener todos los productos con sus categorías
-    productos = Producto.query.options(db.joinedload(Producto.categoria)).all()
-    
-    return render_template('admin/inventario/inventario.html', productos=productos)
+    # --- Filtros (aplicados en SQL) ---
+    texto = request.args.get('buscar', '').strip()
+    filtro = request.args.get('filtro')
+
+    query = Producto.query.options(db.joinedload(Producto.categoria))
+    if texto:
+        query = query.filter(or_(
+            Producto.nombre.ilike(f"%{texto}%"),
+            Producto.descripcion.ilike(f"%{texto}%"),
+        ))
+    if filtro == 'critico':
+        query = query.filter(Producto.stock <= 5)
+    elif filtro == 'destacado':
+        query = query.filter(Producto.destacado == True)  # noqa: E712
+
+    productos = paginar_keyset(query, [(Producto.id, 'asc', 'id')], request.args.get('cursor'))
+
+    # Estadísticas del inventario completo
+    contadores = obtener_contadores()
+    valor_inventario = db.session.query(
+        func.coalesce(func.sum(Producto.stock * Producto.precio), 0)
+    ).scalar()
+
+    return render_template('admin/inventario/inventario.html',
+                           productos=productos,
+                           total_productos=contadores['productos'],
+                           stock_critico=contadores['productos_stock_critico'],
+                           total_destacados=contadores['productos_destacados'],
+                           valor_inventario=valor_inventario)
 
 
 # -------------------------------
@@ -916,10 +1267,15 @@ def editar_productos(id):
                 old_path = os.path.join(UPLOAD_FOLDER, producto.imagen)
                 if os.path.exists(old_path):
                     os.remove(old_path)
+                eliminar_variantes(producto.imagen)
 
+            # 🔹 Variantes redimensionadas (tarjeta, modal, carrito)
+            procesar_subida(filename)
             producto.imagen = filename
 
+        sincronizar_variantes(producto)
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('✅ Producto actualizado correctamente.', 'success')
         return redirect(url_for('admin.inventario'))
 
@@ -945,6 +1301,7 @@ def nuevos_productos():
             os.makedirs(UPLOAD_FOLDER, exist_ok=True)
             path = os.path.join(UPLOAD_FOLDER, filename)
             imagen_archivo.save(path)
+            procesar_subida(filename)
             nombre_imagen = filename
 
         nuevo = Producto(
@@ -958,7 +1315,9 @@ def nuevos_productos():
         )
 
         db.session.add(nuevo)
+        sincronizar_variantes(nuevo)
         db.session.commit()
+        invalidar_paginas_publicas()
         flash('✅ Producto creado correctamente.', 'success')
 
         return redirect(url_for('admin.inventario'))
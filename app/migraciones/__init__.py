@@ -0,0 +1,2 @@
+# Migraciones versionadas: mNNNN_nombre.py con una función aplicar(conexion).
+# Se ejecutan con `flask migrar` (ver app/services/migraciones.py).
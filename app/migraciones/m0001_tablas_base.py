@@ -0,0 +1,112 @@
+"""Tablas existentes antes de las migraciones (solo las que falten).
+
+El esquema está copiado aquí y no se toma de los modelos: los modelos
+siguen cambiando y cada cambio posterior llega en su propia migración
+(índices en 0002, variantes en 0003, facetas en 0004, sku en 0005...).
+Este archivo no se edita.
+"""
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text,
+    UniqueConstraint,
+)
+
+metadata = MetaData()
+
+Table(
+    'usuarios', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(80), unique=True, nullable=False),
+    Column('email', String(120), unique=True, nullable=False),
+    Column('password_hash', String(255), nullable=False),
+    Column('is_admin', Boolean),
+    Column('created_at', DateTime),
+)
+
+Table(
+    'categorias', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nombre', String(100), unique=True, nullable=False),
+    Column('descripcion', String(255)),
+)
+
+Table(
+    'productos', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nombre', String(100), nullable=False),
+    Column('descripcion', Text),
+    Column('precio', Float, nullable=False),
+    Column('stock', Integer),
+    Column('imagen', String(255)),
+    Column('destacado', Boolean),
+    Column('created_at', DateTime),
+    Column('colores', String(500)),
+    Column('tallas', String(500)),
+    Column('categoria_id', Integer, ForeignKey('categorias.id')),
+)
+
+Table(
+    'ventas', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('usuario_id', Integer, ForeignKey('usuarios.id')),
+    Column('total', Float, nullable=False),
+    Column('fecha', DateTime),
+)
+
+Table(
+    'detalle_ventas', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('venta_id', Integer, ForeignKey('ventas.id')),
+    Column('producto_id', Integer, ForeignKey('productos.id')),
+    Column('cantidad', Integer, nullable=False),
+    Column('precio_unitario', Float, nullable=False),
+    Column('subtotal', Float, nullable=False),
+    Column('color_seleccionado', String(50)),
+    Column('talla_seleccionada', String(20)),
+)
+
+Table(
+    'gastos', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('descripcion', String(255), nullable=False),
+    Column('monto', Float, nullable=False),
+    Column('categoria', String(100)),
+    Column('fecha', DateTime),
+)
+
+Table(
+    'resumen_diario', metadata,
+    Column('fecha', Date, primary_key=True),
+    Column('total_ventas', Float, nullable=False),
+    Column('num_ventas', Integer, nullable=False),
+    Column('total_gastos', Float, nullable=False),
+    Column('neto', Float, nullable=False),
+)
+
+Table(
+    'contadores', metadata,
+    Column('nombre', String(50), primary_key=True),
+    Column('valor', Integer, nullable=False),
+)
+
+Table(
+    'indice_busqueda', metadata,
+    Column('termino', String(60), primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id'), primary_key=True, index=True),
+    Column('peso', Float, nullable=False),
+)
+
+Table(
+    'carrito_items', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('usuario_id', Integer, ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False, index=True),
+    Column('producto_id', Integer, ForeignKey('productos.id', ondelete='CASCADE'), nullable=False),
+    Column('color', String(50), nullable=False),
+    Column('talla', String(20), nullable=False),
+    Column('cantidad', Integer, nullable=False),
+    Column('actualizado', DateTime),
+    UniqueConstraint('usuario_id', 'producto_id', 'color', 'talla', name='uq_carrito_linea'),
+)
+
+
+def aplicar(conexion):
+    metadata.create_all(conexion, checkfirst=True)
@@ -0,0 +1,30 @@
+"""Índices secundarios para los filtros y órdenes de los controladores.
+
+Cada índice termina en las columnas que usa la paginación por cursor
+(p. ej. fecha, id), así el filtro por rango y el ORDER BY se resuelven
+recorriendo el índice sin ordenar en memoria.
+"""
+from app.services.migraciones import crear_indice
+
+INDICES = (
+    # gestion_ventas, exportar_pdf, exportaciones: rango de fechas + orden (fecha, id)
+    ('ventas', 'ix_ventas_fecha', ('fecha', 'id')),
+    ('gastos', 'ix_gastos_fecha', ('fecha', 'id')),
+    # _items_por_venta y ver_venta: detalles de un conjunto de ventas
+    ('detalle_ventas', 'ix_detalle_ventas_venta', ('venta_id',)),
+    # inicio: productos recientes / destacados
+    ('productos', 'ix_productos_creado', ('created_at',)),
+    ('productos', 'ix_productos_destacado', ('destacado', 'id')),
+    # inventario y gestion_productos: stock crítico / agotado
+    ('productos', 'ix_productos_stock', ('stock',)),
+    # catálogo y API: filtro por categoría + cursor por id
+    ('productos', 'ix_productos_categoria', ('categoria_id', 'id')),
+    # gestion_usuarios: filtro por rol + orden (created_at, id); nuevos del mes
+    ('usuarios', 'ix_usuarios_admin_creado', ('is_admin', 'created_at', 'id')),
+    ('usuarios', 'ix_usuarios_creado', ('created_at', 'id')),
+)
+
+
+def aplicar(conexion):
+    for tabla, nombre, columnas in INDICES:
+        crear_indice(conexion, tabla, nombre, columnas)
@@ -0,0 +1,83 @@
+"""Variantes de producto (color/talla) con stock propio.
+
+Crea producto_variantes y, para cada producto que todavía no tenga
+variantes, genera todas las combinaciones de sus colores y tallas
+repartiendo el stock actual entre ellas. Se procesa por lotes de ids
+para no cargar todo el catálogo en memoria.
+
+Tablas y reglas copiadas tal como estaban al escribir la migración (no
+se importan modelos ni servicios, que siguen cambiando). Este archivo no
+se edita.
+"""
+from sqlalchemy import (
+    Column, ForeignKey, Index, Integer, MetaData, String, Table, UniqueConstraint, column, insert,
+    select, table,
+)
+
+LOTE = 500
+COLOR_UNICO = 'Único'
+TALLA_UNICA = 'Única'
+
+metadata = MetaData()
+
+productos = table('productos', column('id'), column('colores'), column('tallas'), column('stock'))
+
+producto_variantes = Table(
+    'producto_variantes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id', ondelete='CASCADE'), nullable=False),
+    Column('color', String(50), nullable=False),
+    Column('talla', String(20), nullable=False),
+    Column('stock', Integer, nullable=False),
+    UniqueConstraint('producto_id', 'color', 'talla', name='uq_variante'),
+    Index('ix_variantes_talla_stock', 'talla', 'stock', 'producto_id'),
+    Index('ix_variantes_color_stock', 'color', 'stock', 'producto_id'),
+)
+# Solo para resolver la clave foránea al crear la tabla
+Table('productos', metadata, Column('id', Integer, primary_key=True))
+
+
+def _separar(texto, largo):
+    valores = []
+    vistos = set()
+    for valor in (texto or '').split(','):
+        valor = valor.strip()[:largo]
+        if valor and valor.lower() not in vistos:
+            vistos.add(valor.lower())
+            valores.append(valor)
+    return valores
+
+
+def _combinaciones(colores, tallas):
+    return [
+        (color, talla)
+        for color in _separar(colores, 50) or [COLOR_UNICO]
+        for talla in _separar(tallas, 20) or [TALLA_UNICA]
+    ]
+
+
+def _repartir(total, partes):
+    base, resto = divmod(max(total, 0), partes)
+    return [base + (1 if i < resto else 0) for i in range(partes)]
+
+
+def aplicar(conexion):
+    producto_variantes.create(conexion, checkfirst=True)
+    con_variantes = select(producto_variantes.c.producto_id)
+    ultimo = 0
+    while True:
+        lote = conexion.execute(
+            select(productos.c.id, productos.c.colores, productos.c.tallas, productos.c.stock)
+            .where(productos.c.id > ultimo, productos.c.id.not_in(con_variantes))
+            .order_by(productos.c.id)
+            .limit(LOTE)
+        ).all()
+        if not lote:
+            break
+        filas = []
+        for producto in lote:
+            pares = _combinaciones(producto.colores, producto.tallas)
+            for (color, talla), stock in zip(pares, _repartir(producto.stock or 0, len(pares))):
+                filas.append({'producto_id': producto.id, 'color': color, 'talla': talla, 'stock': stock})
+        conexion.execute(insert(producto_variantes), filas)
+        ultimo = lote[-1].id
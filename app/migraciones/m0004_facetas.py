@@ -0,0 +1,102 @@
+"""Índice de facetas del catálogo (categoría, color, talla, precio, stock).
+
+Crea facetas_productos y lo llena por lotes de productos. Es idempotente:
+indexar un producto rehace todas sus filas.
+
+Tablas y reglas copiadas tal como estaban al escribir la migración (no
+se importan modelos ni servicios, que siguen cambiando). Este archivo no
+se edita.
+"""
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, column, delete, insert, select, table
+
+LOTE = 500
+COLOR_UNICO = 'Único'
+TALLA_UNICA = 'Única'
+BANDAS_PRECIO = (('0-25', 0, 25), ('25-50', 25, 50), ('50-100', 50, 100), ('100+', 100, None))
+
+metadata = MetaData()
+
+productos = table(
+    'productos',
+    column('id'), column('categoria_id'), column('precio'), column('stock'), column('colores'), column('tallas'),
+)
+producto_variantes = table(
+    'producto_variantes', column('producto_id'), column('color'), column('talla'), column('stock'),
+)
+
+facetas_productos = Table(
+    'facetas_productos', metadata,
+    Column('faceta', String(20), primary_key=True),
+    Column('valor', String(60), primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id', ondelete='CASCADE'), primary_key=True, index=True),
+)
+# Solo para resolver la clave foránea al crear la tabla
+Table('productos', metadata, Column('id', Integer, primary_key=True))
+
+
+def _separar(texto, largo):
+    valores = []
+    vistos = set()
+    for valor in (texto or '').split(','):
+        valor = valor.strip()[:largo]
+        if valor and valor.lower() not in vistos:
+            vistos.add(valor.lower())
+            valores.append(valor)
+    return valores
+
+
+def _banda_precio(precio):
+    precio = precio or 0
+    for valor, minimo, maximo in BANDAS_PRECIO:
+        if precio >= minimo and (maximo is None or precio < maximo):
+            return valor
+    return BANDAS_PRECIO[0][0]
+
+
+def _facetas_producto(producto, variantes):
+    valores = {('precio', _banda_precio(producto.precio))}
+    if producto.categoria_id:
+        valores.add(('categoria', str(producto.categoria_id)))
+    if (producto.stock or 0) > 0:
+        valores.add(('disponible', '1'))
+    if variantes:
+        pares = [(color, talla) for color, talla, stock in variantes if stock > 0]
+    elif (producto.stock or 0) > 0:
+        pares = [(c, None) for c in _separar(producto.colores, 50)]
+        pares += [(None, t) for t in _separar(producto.tallas, 20)]
+    else:
+        pares = []
+    for color, talla in pares:
+        if color and color != COLOR_UNICO:
+            valores.add(('color', color))
+        if talla and talla != TALLA_UNICA:
+            valores.add(('talla', talla))
+    return valores
+
+
+def _indexar(conexion, ids):
+    conexion.execute(delete(facetas_productos).where(facetas_productos.c.producto_id.in_(ids)))
+    lote = conexion.execute(select(productos).where(productos.c.id.in_(ids))).all()
+    variantes = {}
+    for fila in conexion.execute(select(producto_variantes).where(producto_variantes.c.producto_id.in_(ids))):
+        variantes.setdefault(fila.producto_id, []).append((fila.color, fila.talla, fila.stock))
+    filas = [
+        {'faceta': faceta, 'valor': valor, 'producto_id': producto.id}
+        for producto in lote
+        for faceta, valor in _facetas_producto(producto, variantes.get(producto.id))
+    ]
+    if filas:
+        conexion.execute(insert(facetas_productos), filas)
+
+
+def aplicar(conexion):
+    facetas_productos.create(conexion, checkfirst=True)
+    ultimo = 0
+    while True:
+        ids = conexion.execute(
+            select(productos.c.id).where(productos.c.id > ultimo).order_by(productos.c.id).limit(LOTE)
+        ).scalars().all()
+        if not ids:
+            break
+        _indexar(conexion, ids)
+        ultimo = ids[-1]
@@ -0,0 +1,15 @@
+"""Código SKU de producto para la importación masiva por CSV.
+
+Agrega la columna productos.sku (opcional) y un índice único sobre ella:
+la importación busca los productos existentes por SKU con un IN por lote.
+Los productos actuales quedan sin SKU y se siguen pudiendo actualizar por id.
+"""
+from sqlalchemy import inspect, text
+
+from app.services.migraciones import crear_indice
+
+
+def aplicar(conexion):
+    if 'sku' not in {columna['name'] for columna in inspect(conexion).get_columns('productos')}:
+        conexion.execute(text('ALTER TABLE productos ADD COLUMN sku VARCHAR(64)'))
+    crear_indice(conexion, 'productos', 'ux_productos_sku', ('sku',), unico=True)
@@ -0,0 +1,17 @@
+"""Versión compartida del catálogo para la caché de páginas públicas.
+
+Agrega la fila 'version_catalogo' a contadores. Cada escritura que cambia
+la portada la incrementa en su transacción y la versión forma parte de la
+clave de caché: todos los workers dejan de servir el HTML anterior.
+"""
+from sqlalchemy import column, insert, select, table
+
+contadores = table('contadores', column('nombre'), column('valor'))
+
+
+def aplicar(conexion):
+    existe = conexion.execute(
+        select(contadores.c.nombre).where(contadores.c.nombre == 'version_catalogo')
+    ).first()
+    if existe is None:
+        conexion.execute(insert(contadores).values(nombre='version_catalogo', valor=0))
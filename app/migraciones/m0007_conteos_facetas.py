@@ -0,0 +1,32 @@
+"""Conteos precalculados de productos por (faceta, valor).
+
+Crea conteos_facetas y lo llena con un GROUP BY sobre facetas_productos.
+Desde aquí lo mantienen con deltas los servicios de facetas, así el
+catálogo sin filtros no agrupa el índice en cada petición.
+
+Tablas copiadas tal como estaban al escribir la migración. Este archivo
+no se edita.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table, column, func, insert, select, table
+
+metadata = MetaData()
+
+facetas_productos = table('facetas_productos', column('faceta'), column('valor'), column('producto_id'))
+
+conteos_facetas = Table(
+    'conteos_facetas', metadata,
+    Column('faceta', String(20), primary_key=True),
+    Column('valor', String(60), primary_key=True),
+    Column('conteo', Integer, nullable=False),
+)
+
+
+def aplicar(conexion):
+    conteos_facetas.create(conexion, checkfirst=True)
+    if conexion.execute(select(func.count()).select_from(conteos_facetas)).scalar():
+        return
+    conexion.execute(insert(conteos_facetas).from_select(
+        ['faceta', 'valor', 'conteo'],
+        select(facetas_productos.c.faceta, facetas_productos.c.valor, func.count())
+        .group_by(facetas_productos.c.faceta, facetas_productos.c.valor),
+    ))
@@ -8,6 +8,11 @@ from datetime import datetime
 # ========================================
 class Usuario(UserMixin, db.Model):
     __tablename__ = 'usuarios'
+    # Índices: ver app/migraciones/m0002_indices.py
+    __table_args__ = (
+        db.Index('ix_usuarios_admin_creado', 'is_admin', 'created_at', 'id'),
+        db.Index('ix_usuarios_creado', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -44,8 +49,16 @@ class Categoria(db.Model):
 # ========================================
 class Producto(db.Model):
     __tablename__ = 'productos'
+    __table_args__ = (
+        db.Index('ix_productos_creado', 'created_at'),
+        db.Index('ix_productos_destacado', 'destacado', 'id'),
+        db.Index('ix_productos_stock', 'stock'),
+        db.Index('ix_productos_categoria', 'categoria_id', 'id'),
+        db.Index('ux_productos_sku', 'sku', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(64))  # código del proveedor; clave de la importación CSV
     nombre = db.Column(db.String(100), nullable=False)
     descripcion = db.Column(db.Text)
     precio = db.Column(db.Float, nullable=False)
@@ -62,6 +75,10 @@ class Producto(db.Model):
     categoria = db.relationship('Categoria', back_populates='productos')
 
     detalles = db.relationship('DetalleVenta', back_populates='producto')
+    variantes = db.relationship(
+        'ProductoVariante', back_populates='producto',
+        cascade='all, delete-orphan', order_by='ProductoVariante.id',
+    )
 
     # Métodos para manejar colores y tallas
     def get_colores(self):
@@ -85,11 +102,35 @@ class Producto(db.Model):
         self.tallas = ','.join(tallas_list)
 
 
+# ========================================
+# VARIANTES (color + talla con stock propio)
+# ========================================
+class ProductoVariante(db.Model):
+    __tablename__ = 'producto_variantes'
+    __table_args__ = (
+        db.UniqueConstraint('producto_id', 'color', 'talla', name='uq_variante'),
+        # "Productos disponibles en talla L / color Negro" se resuelven en el índice
+        db.Index('ix_variantes_talla_stock', 'talla', 'stock', 'producto_id'),
+        db.Index('ix_variantes_color_stock', 'color', 'stock', 'producto_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), nullable=False)
+    color = db.Column(db.String(50), nullable=False)
+    talla = db.Column(db.String(20), nullable=False)
+    stock = db.Column(db.Integer, nullable=False, default=0)
+
+    producto = db.relationship('Producto', back_populates='variantes')
+
+
 # ========================================
 # VENTAS
 # ========================================
 class Venta(db.Model):
     __tablename__ = 'ventas'
+    __table_args__ = (
+        db.Index('ix_ventas_fecha', 'fecha', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
@@ -108,6 +149,9 @@ class Venta(db.Model):
 # ========================================
 class DetalleVenta(db.Model):
     __tablename__ = 'detalle_ventas'
+    __table_args__ = (
+        db.Index('ix_detalle_ventas_venta', 'venta_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     venta_id = db.Column(db.Integer, db.ForeignKey('ventas.id'))
@@ -129,9 +173,84 @@ class DetalleVenta(db.Model):
 # ========================================
 class Gasto(db.Model):
     __tablename__ = 'gastos'
+    __table_args__ = (
+        db.Index('ix_gastos_fecha', 'fecha', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     descripcion = db.Column(db.String(255), nullable=False)
     monto = db.Column(db.Float, nullable=False)
     categoria = db.Column(db.String(100))
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ========================================
+# RESUMEN DIARIO (ventas y gastos agregados por día)
+# ========================================
+class ResumenDiario(db.Model):
+    __tablename__ = 'resumen_diario'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    total_ventas = db.Column(db.Float, nullable=False, default=0)
+    num_ventas = db.Column(db.Integer, nullable=False, default=0)
+    total_gastos = db.Column(db.Float, nullable=False, default=0)
+    neto = db.Column(db.Float, nullable=False, default=0)
+
+
+# ========================================
+# CONTADORES (estadísticas mantenidas por eventos)
+# ========================================
+class Contador(db.Model):
+    __tablename__ = 'contadores'
+
+    nombre = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ========================================
+# ÍNDICE DE BÚSQUEDA (términos normalizados por producto)
+# ========================================
+class TerminoBusqueda(db.Model):
+    __tablename__ = 'indice_busqueda'
+
+    termino = db.Column(db.String(60), primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), primary_key=True, index=True)
+    peso = db.Column(db.Float, nullable=False, default=1)
+
+
+# ========================================
+# ÍNDICE DE FACETAS (faceta, valor) -> productos
+# ========================================
+class FacetaProducto(db.Model):
+    __tablename__ = 'facetas_productos'
+
+    faceta = db.Column(db.String(20), primary_key=True)
+    valor = db.Column(db.String(60), primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+
+# Productos por (faceta, valor), con deltas en el mismo flush que el índice
+class ConteoFaceta(db.Model):
+    __tablename__ = 'conteos_facetas'
+
+    faceta = db.Column(db.String(20), primary_key=True)
+    valor = db.Column(db.String(60), primary_key=True)
+    conteo = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ========================================
+# CARRITO (líneas por usuario, guardadas en el servidor)
+# ========================================
+class ItemCarrito(db.Model):
+    __tablename__ = 'carrito_items'
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'producto_id', 'color', 'talla', name='uq_carrito_linea'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False, index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), nullable=False)
+    color = db.Column(db.String(50), nullable=False, default='Único')
+    talla = db.Column(db.String(20), nullable=False, default='Única')
+    cantidad = db.Column(db.Integer, nullable=False, default=1)
+    actualizado = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+
+# Carpetas (dentro de static/) que forman el paquete de assets
+CARPETA_STATIC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
+FUENTES = ('css', 'js', 'vendor')
+DIST = 'dist'
+MANIFIESTO = 'manifest.json'
+
+# Se precomprimen solo los formatos de texto (woff2/png ya están comprimidos)
+COMPRIMIBLES = {'.css', '.js', '.svg', '.json', '.txt'}
+MIN_COMPRIMIR = 1024  # bytes
+
+UN_ANIO = 365 * 24 * 3600
+
+_url_css = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_manifiesto = {}
+
+
+# -------------------------------
+# Construcción (flask construir-assets)
+# -------------------------------
+def _con_huella(logico, contenido):
+    """'css/base.css' -> 'dist/css/base.<hash>.css'."""
+    directorio, archivo = posixpath.split(logico)
+    base, extension = posixpath.splitext(archivo)
+    digest = hashlib.sha256(contenido).hexdigest()[:10]
+    return posixpath.join(DIST, directorio, f'{base}.{digest}{extension}')
+
+
+def _reescribir_urls(logico, css, manifiesto):
+    """Apunta los url() relativos del CSS a las copias con huella."""
+    origen = posixpath.dirname(logico)
+    destino = posixpath.dirname(manifiesto.get(logico, posixpath.join(DIST, logico)))
+
+    def reemplazo(m):
+        comilla, url = m.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return m.group(0)
+        ruta, sufijo = re.match(r'([^?#]*)(.*)', url).groups()
+        objetivo = posixpath.normpath(posixpath.join(origen, ruta))
+        if objetivo not in manifiesto:
+            return m.group(0)
+        nueva = posixpath.relpath(manifiesto[objetivo], destino)
+        return f'url({comilla}{nueva}{sufijo}{comilla})'
+
+    return _url_css.sub(reemplazo, css)
+
+
+def _listar_fuentes():
+    for carpeta in FUENTES:
+        raiz = os.path.join(CARPETA_STATIC, carpeta)
+        for directorio, _, archivos in os.walk(raiz):
+            for archivo in archivos:
+                ruta = os.path.join(directorio, archivo)
+                yield os.path.relpath(ruta, CARPETA_STATIC).replace(os.sep, '/'), ruta
+
+
+def construir_assets():
+    """Copia css/, js/ y vendor/ a dist/ con huella en el nombre y versión .gz.
+
+    Devuelve el manifiesto {ruta lógica: ruta en dist/}.
+    """
+    salida = os.path.join(CARPETA_STATIC, DIST)
+    shutil.rmtree(salida, ignore_errors=True)
+
+    # Primero lo que no es CSS, para que los url() del CSS ya tengan destino
+    fuentes = sorted(_listar_fuentes(), key=lambda f: (f[0].endswith('.css'), f[0]))
+    manifiesto = {}
+    for logico, ruta in fuentes:
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        if logico.endswith('.css'):
+            contenido = _reescribir_urls(logico, contenido.decode('utf-8'), manifiesto).encode('utf-8')
+
+        destino = _con_huella(logico, contenido)
+        ruta_destino = os.path.join(CARPETA_STATIC, destino)
+        os.makedirs(os.path.dirname(ruta_destino), exist_ok=True)
+        with open(ruta_destino, 'wb') as f:
+            f.write(contenido)
+        if posixpath.splitext(logico)[1] in COMPRIMIBLES and len(contenido) >= MIN_COMPRIMIR:
+            # mtime=0: el .gz es reproducible entre builds
+            with open(ruta_destino + '.gz', 'wb') as f:
+                f.write(gzip.compress(contenido, compresslevel=9, mtime=0))
+        manifiesto[logico] = destino
+
+    with open(os.path.join(salida, MANIFIESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=1, sort_keys=True)
+    return manifiesto
+
+
+def cargar_manifiesto():
+    ruta = os.path.join(CARPETA_STATIC, DIST, MANIFIESTO)
+    _manifiesto.clear()
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            _manifiesto.update(json.load(f))
+
+
+# -------------------------------
+# Helpers para plantillas y servido
+# -------------------------------
+def asset(logico):
+    """URL de un asset: la copia con huella si existe el build, si no el original."""
+    if current_app.config.get('ASSETS_USE_MANIFEST', True) and logico in _manifiesto:
+        return url_for('static', filename=_manifiesto[logico])
+    return url_for('static', filename=logico)
+
+
+def servir_static(filename):
+    """Vista 'static': los archivos de dist/ son inmutables y se sirven en .gz si se acepta."""
+    if not filename.startswith(DIST + '/'):
+        return current_app.send_static_file(filename)
+
+    comprimido = filename + '.gz'
+    if request.accept_encodings['gzip'] and os.path.isfile(os.path.join(CARPETA_STATIC, comprimido)):
+        respuesta = send_from_directory(
+            CARPETA_STATIC, comprimido, max_age=UN_ANIO,
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        )
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    else:
+        respuesta = send_from_directory(CARPETA_STATIC, filename, max_age=UN_ANIO)
+    respuesta.cache_control.immutable = True
+    respuesta.vary.add('Accept-Encoding')
+    return respuesta
+
+
+def configurar_assets(app):
+    cargar_manifiesto()
+    app.jinja_env.globals['asset'] = asset
+    app.view_functions['static'] = servir_static
+
+    @app.cli.command('construir-assets')
+    def construir_assets_cmd():
+        """Genera static/dist/ (nombres con huella + .gz) y su manifiesto."""
+        manifiesto = construir_assets()
+        cargar_manifiesto()
+        click.echo(f'Assets construidos: {len(manifiesto)} archivos en static/{DIST}/.')
+
+
+# Sin app ni base de datos (build de Docker): python -m app.services.assets
+if __name__ == '__main__':
+    print(f'Assets construidos: {len(construir_assets())} archivos en static/{DIST}/.')
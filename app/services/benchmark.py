@@ -0,0 +1,312 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import click
+from flask import url_for
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from app import db
+from app.models.models import DetalleVenta, Producto, ProductoVariante, Usuario, Venta
+from app.services.generador import ADMIN_BENCH, CLAVE_BENCH, CLIENTE_BENCH
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# -------------------------------
+# Medición
+# -------------------------------
+class ContadorSQL:
+    """Cuenta las sentencias que llegan al driver mientras está activo."""
+
+    def __init__(self):
+        self.total = 0
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self._contar)
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not valores:
+        return None
+    return valores[max(math.ceil(p / 100 * len(valores)), 1) - 1]
+
+
+def medir_ruta(ruta, repeticiones, calentamiento):
+    """Ejecuta la ruta y devuelve latencias (ms), consultas por petición y memoria pico."""
+    for _ in range(calentamiento):
+        _preparar(ruta)
+        _ejecutar(ruta)
+
+    latencias, consultas, errores = [], [], []
+    for _ in range(repeticiones):
+        _preparar(ruta)
+        with ContadorSQL() as contador:
+            duracion, error = _ejecutar(ruta)
+        latencias.append(duracion * 1000)
+        consultas.append(contador.total)
+        if error:
+            errores.append(error)
+
+    # Memoria en una pasada aparte: tracemalloc hace más lenta cada petición
+    _preparar(ruta)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _ejecutar(ruta)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencias.sort()
+    consultas.sort()
+    resultado = {f'p{p}_ms': round(percentil(latencias, p), 2) for p in PERCENTILES}
+    resultado.update({
+        'media_ms': round(sum(latencias) / len(latencias), 2),
+        'max_ms': round(latencias[-1], 2),
+        'consultas_mediana': percentil(consultas, 50),
+        'consultas_max': consultas[-1],
+        'memoria_pico_kb': round(pico / 1024, 1),
+        'errores': len(errores),
+    })
+    if errores:
+        resultado['primer_error'] = errores[0]
+    return resultado
+
+
+def _preparar(ruta):
+    """Deja el estado listo para la petición (fuera de la medición)."""
+    if ruta.get('preparar'):
+        ruta['preparar']()
+
+
+def _ejecutar(ruta):
+    inicio = time.perf_counter()
+    respuesta = ruta['cliente'].open(ruta['url'], method=ruta.get('metodo', 'GET'), data=ruta.get('datos'))
+    url = ruta['url']
+    # Reportes en segundo plano: se sigue la página de estado hasta la descarga
+    while ruta.get('esperar') and respuesta.status_code in (202, 302):
+        if respuesta.status_code == 302:
+            url = respuesta.headers['Location']
+        else:
+            time.sleep(0.01)
+        respuesta.close()
+        respuesta = ruta['cliente'].get(url)
+    respuesta.get_data()  # consume también las respuestas en streaming
+    duracion = time.perf_counter() - inicio
+    respuesta.close()
+    esperado = ruta.get('estado', 200)
+    if respuesta.status_code != esperado:
+        return duracion, f'HTTP {respuesta.status_code} (se esperaba {esperado})'
+    return duracion, None
+
+
+# -------------------------------
+# Rutas medidas
+# -------------------------------
+def _iniciar_sesion(app, email):
+    cliente = app.test_client()
+    respuesta = cliente.post('/login', data={'email': email, 'password': CLAVE_BENCH})
+    if respuesta.status_code != 302 or 'login' in respuesta.headers.get('Location', ''):
+        raise click.ClickException(
+            f'No se pudo iniciar sesión como {email}; genera los datos con `flask generar-datos`.')
+    return cliente
+
+
+def _producto_para_carrito():
+    """La variante con más stock: aguanta todas las compras del benchmark."""
+    fila = db.session.execute(
+        select(ProductoVariante.producto_id, ProductoVariante.color, ProductoVariante.talla)
+        .order_by(ProductoVariante.stock.desc(), ProductoVariante.id)
+        .limit(1)
+    ).first()
+    if fila is None:
+        raise click.ClickException('No hay variantes con stock para medir el carrito.')
+    return fila
+
+
+def _historial_ventas():
+    """Filtros fecha_desde/fecha_hasta que cubren todas las ventas generadas."""
+    primera, ultima = db.session.execute(select(func.min(Venta.fecha), func.max(Venta.fecha))).one()
+    if primera is None:
+        return {}
+    return {'fecha_desde': primera.date().isoformat(), 'fecha_hasta': ultima.date().isoformat()}
+
+
+def rutas_benchmark(app, buscar):
+    from app.services.reportes import cola_reportes
+
+    anonimo = app.test_client()
+    cliente = _iniciar_sesion(app, CLIENTE_BENCH)
+    admin = _iniciar_sesion(app, ADMIN_BENCH)
+    producto = _producto_para_carrito()
+    historial = _historial_ventas()
+
+    with app.test_request_context():
+        url_agregar = url_for('usuario_cp.agregar_carrito', producto_id=producto.producto_id)
+        url_vaciar = url_for('usuario_cp.vaciar_carrito')
+        linea = {'color': producto.color, 'talla': producto.talla, 'cantidad': 1}
+
+        def carrito_con_una_linea():
+            cliente.get(url_vaciar)
+            cliente.post(url_agregar, data=linea)
+
+        return {
+            'inicio_publico': {'cliente': anonimo, 'url': url_for('inicio_cp.inicio_publico')},
+            'user_dashboard_busqueda': {
+                'cliente': cliente, 'url': url_for('usuario_cp.user_dashboard', buscar=buscar)},
+            'dashboard': {'cliente': admin, 'url': url_for('admin.dashboard')},
+            # Sin filtros los reportes muestran solo el día actual; las variantes
+            # _historial cubren todas las ventas generadas
+            'gestion_ventas': {'cliente': admin, 'url': url_for('admin.gestion_ventas')},
+            'gestion_ventas_historial': {
+                'cliente': admin, 'url': url_for('admin.gestion_ventas', **historial)},
+            # Sin reutilizar el PDF de la pasada anterior: mide la generación completa
+            'exportar_pdf': {'cliente': admin, 'url': url_for('admin.exportar_pdf'),
+                             'preparar': cola_reportes.invalidar, 'esperar': True},
+            'exportar_pdf_historial': {'cliente': admin, 'url': url_for('admin.exportar_pdf', **historial),
+                                       'preparar': cola_reportes.invalidar, 'esperar': True},
+            'carrito_agregar': {'cliente': cliente, 'url': url_agregar, 'metodo': 'POST',
+                                'datos': linea, 'estado': 302},
+            'checkout': {'cliente': cliente, 'url': url_for('usuario_cp.procesar_pedido'),
+                         'metodo': 'POST', 'preparar': carrito_con_una_linea},
+        }
+
+
+# -------------------------------
+# Resultados guardados
+# -------------------------------
+def _version():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def tamano_datos():
+    def contar(modelo):
+        return db.session.execute(select(func.count()).select_from(modelo)).scalar()
+
+    return {
+        'usuarios': contar(Usuario), 'productos': contar(Producto),
+        'ventas': contar(Venta), 'detalles': contar(DetalleVenta),
+    }
+
+
+def mismo_volumen(a, b):
+    """Los checkouts del benchmark suman ventas: se toleran diferencias del 1 %."""
+    if a['usuarios'] != b['usuarios'] or a['productos'] != b['productos']:
+        return False
+    return abs(a['ventas'] - b['ventas']) <= max(a['ventas'], b['ventas']) * 0.01 + 100
+
+
+def leer_resultados(ruta_archivo):
+    if not os.path.exists(ruta_archivo):
+        return []
+    with open(ruta_archivo, encoding='utf-8') as archivo:
+        return [json.loads(linea) for linea in archivo if linea.strip()]
+
+
+def guardar_resultado(ruta_archivo, resultado):
+    carpeta = os.path.dirname(ruta_archivo)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(ruta_archivo, 'a', encoding='utf-8') as archivo:
+        archivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def comparar(anterior, actual, umbral):
+    """[(ruta, p50 antes, p50 ahora, p95 antes, p95 ahora, consultas antes/ahora, empeoró)]."""
+    filas = []
+    for nombre, ahora in actual['rutas'].items():
+        antes = anterior['rutas'].get(nombre)
+        if not antes:
+            continue
+        empeoro = (
+            ahora['p95_ms'] > antes['p95_ms'] * (1 + umbral / 100)
+            or ahora['consultas_mediana'] > antes['consultas_mediana']
+        )
+        filas.append((nombre, antes['p50_ms'], ahora['p50_ms'], antes['p95_ms'], ahora['p95_ms'],
+                      antes['consultas_mediana'], ahora['consultas_mediana'], empeoro))
+    return filas
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_benchmark(app):
+    @app.cli.command('benchmark')
+    @click.argument('rutas', nargs=-1)
+    @click.option('--repeticiones', '-n', type=click.IntRange(1), default=20, show_default=True)
+    @click.option('--calentamiento', type=click.IntRange(0), default=2, show_default=True)
+    @click.option('--buscar', default='camisa', show_default=True, help='Texto de la búsqueda del catálogo.')
+    @click.option('--sin-cache', is_flag=True, help='Desactiva la caché de páginas públicas.')
+    @click.option('--salida', default=None, help='Archivo JSONL de resultados (BENCHMARK_RESULTS).')
+    @click.option('--umbral', type=float, default=20, show_default=True,
+                  help='%% de aumento del p95 que cuenta como regresión.')
+    @click.option('--estricto', is_flag=True, help='Termina con error si hay regresiones.')
+    def benchmark_cmd(rutas, repeticiones, calentamiento, buscar, sin_cache, salida, umbral, estricto):
+        """Mide las rutas principales con el cliente de pruebas y guarda los resultados."""
+        salida = salida or app.config.get('BENCHMARK_RESULTS', 'benchmarks/resultados.jsonl')
+        if sin_cache:
+            app.config['PAGE_CACHE_ENABLED'] = False
+
+        disponibles = rutas_benchmark(app, buscar)
+        desconocidas = set(rutas) - set(disponibles)
+        if desconocidas:
+            raise click.BadParameter(f"{', '.join(sorted(desconocidas))}; opciones: {', '.join(disponibles)}")
+
+        resultado = {
+            'fecha': datetime.utcnow().isoformat(timespec='seconds'),
+            'version': _version(),
+            'python': platform.python_version(),
+            'base': db.engine.dialect.name,
+            'datos': tamano_datos(),
+            'repeticiones': repeticiones,
+            'cache_paginas': app.config.get('PAGE_CACHE_ENABLED', True),
+            'rutas': {},
+        }
+        click.echo(f"{'ruta':<26}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>6}{'mem KB':>10}{'err':>5}")
+        for nombre, ruta in disponibles.items():
+            if rutas and nombre not in rutas:
+                continue
+            medida = medir_ruta(ruta, repeticiones, calentamiento)
+            resultado['rutas'][nombre] = medida
+            click.echo(f"{nombre:<26}{medida['p50_ms']:>9.1f}{medida['p95_ms']:>9.1f}{medida['p99_ms']:>9.1f}"
+                       f"{medida['consultas_mediana']:>6}{medida['memoria_pico_kb']:>10.0f}{medida['errores']:>5}")
+            if medida['errores']:
+                click.echo(f"  {medida['primer_error']}", err=True)
+
+        # Se compara con la última corrida sobre el mismo volumen de datos
+        anteriores = [r for r in leer_resultados(salida) if mismo_volumen(r['datos'], resultado['datos'])]
+        guardar_resultado(salida, resultado)
+        click.echo(f'Resultados guardados en {salida}.')
+        if not anteriores:
+            return
+        anterior = anteriores[-1]
+        click.echo(f"Comparación con {anterior.get('version') or 'sin versión'} ({anterior['fecha']}):")
+        regresiones = 0
+        for nombre, p50_a, p50_b, p95_a, p95_b, sql_a, sql_b, empeoro in comparar(anterior, resultado, umbral):
+            regresiones += empeoro
+            marca = 'PEOR ' if empeoro else '     '
+            click.echo(f'{marca}{nombre:<26} p50 {p50_a:.1f} -> {p50_b:.1f} ms, '
+                       f'p95 {p95_a:.1f} -> {p95_b:.1f} ms, SQL {sql_a} -> {sql_b}')
+        if regresiones and estricto:
+            raise click.ClickException(f'{regresiones} ruta(s) empeoraron.')
@@ -0,0 +1,226 @@
+import re
+import unicodedata
+
+import click
+from sqlalchemy import delete, event, func, insert, inspect, literal, select, union_all
+
+from app import db
+from app.models.models import Categoria, Producto, TerminoBusqueda
+
+# Peso de cada campo en el ranking
+PESOS = {
+    'nombre': 3.0,
+    'categoria': 2.0,
+    'colores': 1.5,
+    'tallas': 1.5,
+    'descripcion': 1.0,
+}
+CAMPOS_INDEXADOS = ('nombre', 'descripcion', 'colores', 'tallas', 'categoria_id')
+MAX_TERMINOS_CONSULTA = 6
+LARGO_TERMINO = 60
+
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'para', 'por', 'que', 'se', 'sin', 'su', 'un', 'una', 'y',
+}
+
+_separador = re.compile(r'[^a-z0-9]+')
+
+
+# -------------------------------
+# Normalización de texto
+# -------------------------------
+def normalizar(texto):
+    """Minúsculas y sin acentos: 'Camisón Niño' -> 'camison nino'."""
+    descompuesto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    return [
+        token[:LARGO_TERMINO]
+        for token in _separador.split(normalizar(texto))
+        if token and token not in STOPWORDS
+    ]
+
+
+def terminos_producto(producto, nombre_categoria=None):
+    """Devuelve {término: peso} para un producto (el mayor peso por término)."""
+    campos = {
+        'nombre': producto.nombre,
+        'descripcion': producto.descripcion,
+        'colores': producto.colores,
+        'tallas': producto.tallas,
+        'categoria': nombre_categoria,
+    }
+    terminos = {}
+    for campo, texto in campos.items():
+        for token in tokenizar(texto):
+            terminos[token] = max(terminos.get(token, 0), PESOS[campo])
+    return terminos
+
+
+# -------------------------------
+# Mantenimiento incremental (eventos ORM)
+# -------------------------------
+def _nombre_categoria(connection, categoria_id):
+    if not categoria_id:
+        return None
+    return connection.execute(
+        select(Categoria.nombre).where(Categoria.id == categoria_id)
+    ).scalar()
+
+
+def indexar_producto(connection, producto, nombre_categoria=None):
+    connection.execute(delete(TerminoBusqueda).where(TerminoBusqueda.producto_id == producto.id))
+    if nombre_categoria is None:
+        nombre_categoria = _nombre_categoria(connection, producto.categoria_id)
+    filas = [
+        {'termino': termino, 'producto_id': producto.id, 'peso': peso}
+        for termino, peso in terminos_producto(producto, nombre_categoria).items()
+    ]
+    if filas:
+        connection.execute(insert(TerminoBusqueda), filas)
+
+
+def indexar_productos(connection, producto_ids):
+    """Reindexa varios productos con un DELETE, un SELECT y un INSERT (escrituras masivas)."""
+    producto_ids = sorted(set(producto_ids))
+    if not producto_ids:
+        return
+    connection.execute(delete(TerminoBusqueda).where(TerminoBusqueda.producto_id.in_(producto_ids)))
+    productos = connection.execute(
+        select(Producto.id, Producto.nombre, Producto.descripcion, Producto.colores,
+               Producto.tallas, Categoria.nombre.label('categoria'))
+        .outerjoin(Categoria, Categoria.id == Producto.categoria_id)
+        .where(Producto.id.in_(producto_ids))
+    ).all()
+    filas = [
+        {'termino': termino, 'producto_id': producto.id, 'peso': peso}
+        for producto in productos
+        for termino, peso in terminos_producto(producto, producto.categoria).items()
+    ]
+    if filas:
+        connection.execute(insert(TerminoBusqueda), filas)
+
+
+@event.listens_for(Producto, 'after_insert')
+def _producto_insertado(mapper, connection, target):
+    indexar_producto(connection, target)
+
+
+@event.listens_for(Producto, 'after_update')
+def _producto_actualizado(mapper, connection, target):
+    estado = inspect(target)
+    if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_INDEXADOS):
+        indexar_producto(connection, target)
+
+
+@event.listens_for(Producto, 'before_delete')
+def _producto_eliminado(mapper, connection, target):
+    connection.execute(delete(TerminoBusqueda).where(TerminoBusqueda.producto_id == target.id))
+
+
+@event.listens_for(Categoria, 'after_update')
+def _categoria_actualizada(mapper, connection, target):
+    if not inspect(target).attrs.nombre.history.has_changes():
+        return
+    productos = connection.execute(
+        select(Producto.id, Producto.nombre, Producto.descripcion, Producto.colores,
+               Producto.tallas, Producto.categoria_id)
+        .where(Producto.categoria_id == target.id)
+    ).all()
+    for producto in productos:
+        indexar_producto(connection, producto, target.nombre)
+
+
+# -------------------------------
+# Consulta
+# -------------------------------
+def _rango_prefijo(prefijo):
+    """Límites [desde, hasta) que cubren todos los términos con ese prefijo."""
+    return prefijo, prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def consulta_ranking(texto, categoria_id=None):
+    """Devuelve (consulta, subconsulta) de (producto_id, puntaje), o None si no hay términos.
+
+    Cada término de la búsqueda se trata como prefijo y todos deben
+    coincidir; el puntaje suma el peso del mejor campo de cada término.
+    """
+    tokens = list(dict.fromkeys(tokenizar(texto)))[:MAX_TERMINOS_CONSULTA]
+    if not tokens:
+        return None
+
+    por_token = []
+    for i, token in enumerate(tokens):
+        desde, hasta = _rango_prefijo(token)
+        por_token.append(
+            select(
+                TerminoBusqueda.producto_id.label('producto_id'),
+                literal(i).label('token'),
+                func.max(TerminoBusqueda.peso).label('peso'),
+            )
+            .where(TerminoBusqueda.termino >= desde, TerminoBusqueda.termino < hasta)
+            .group_by(TerminoBusqueda.producto_id)
+        )
+    coincidencias = union_all(*por_token).subquery('coincidencias')
+
+    ranking = (
+        select(
+            coincidencias.c.producto_id.label('producto_id'),
+            func.sum(coincidencias.c.peso).label('puntaje'),
+        )
+        .group_by(coincidencias.c.producto_id)
+        .having(func.count() == len(tokens))
+    )
+    if categoria_id:
+        ranking = ranking.join(Producto, Producto.id == coincidencias.c.producto_id).where(
+            Producto.categoria_id == categoria_id
+        )
+    ranking = ranking.subquery('ranking')
+    return db.session.query(ranking.c.producto_id, ranking.c.puntaje), ranking
+
+
+def reindexar_todo(lote=500):
+    """Reconstruye el índice completo (crea la tabla si falta)."""
+    TerminoBusqueda.__table__.create(db.engine, checkfirst=True)
+    categorias = dict(db.session.execute(select(Categoria.id, Categoria.nombre)).all())
+    db.session.execute(delete(TerminoBusqueda))
+
+    # Lotes por id: no deja un cursor abierto mientras se insertan términos
+    total = 0
+    ultimo_id = 0
+    while True:
+        productos = (
+            db.session.query(Producto)
+            .filter(Producto.id > ultimo_id)
+            .order_by(Producto.id)
+            .limit(lote)
+            .all()
+        )
+        if not productos:
+            break
+        filas = [
+            {'termino': termino, 'producto_id': producto.id, 'peso': peso}
+            for producto in productos
+            for termino, peso in terminos_producto(producto, categorias.get(producto.categoria_id)).items()
+        ]
+        if filas:
+            db.session.execute(insert(TerminoBusqueda), filas)
+        total += len(productos)
+        ultimo_id = productos[-1].id
+        db.session.expunge_all()
+    db.session.commit()
+    return total
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_busqueda(app):
+    @app.cli.command('reindexar-busqueda')
+    def reindexar_busqueda_cmd():
+        """Reconstruye el índice de búsqueda de productos."""
+        total = reindexar_todo()
+        click.echo(f'Índice de búsqueda reconstruido: {total} productos.')
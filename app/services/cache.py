@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event, select, update
+
+from app import db
+from app.models.models import Categoria, Contador, Producto, ProductoVariante, Usuario
+
+
+# -------------------------------
+# Caché en memoria de páginas públicas (TTL + LRU)
+# -------------------------------
+class CachePaginas:
+    """Guarda HTML renderizado por clave, con expiración y desalojo LRU."""
+
+    def __init__(self, max_entradas=128, ttl=60):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            expira, contenido = entrada
+            if expira < time.monotonic():
+                del self._entradas[clave]
+                return None
+            # Marcar como usada recientemente
+            self._entradas.move_to_end(clave)
+            return contenido
+
+    def guardar(self, clave, contenido, ttl=None):
+        expira = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entradas[clave] = (expira, contenido)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+paginas_publicas = CachePaginas()
+
+
+def configurar_cache(app):
+    """Aplica los límites definidos en la configuración."""
+    paginas_publicas.max_entradas = app.config.get('PAGE_CACHE_MAX_ENTRIES', 128)
+    paginas_publicas.ttl = app.config.get('PAGE_CACHE_TTL', 60)
+    paginas_publicas.limpiar()
+
+
+def invalidar_paginas_publicas():
+    """Descarta el HTML cacheado de este proceso (los demás lo hacen por la versión)."""
+    paginas_publicas.limpiar()
+
+
+# -------------------------------
+# Versión compartida del catálogo
+# -------------------------------
+# La caché es por proceso: con varios workers de gunicorn, limpiar la
+# memoria del que hizo la escritura no alcanza. Cada escritura de lo que
+# muestra la portada suma 1 a la fila 'version_catalogo' de contadores en
+# su misma transacción (migración 0006), y la versión va en la clave de
+# caché: al confirmarse, ningún worker vuelve a servir las páginas viejas.
+VERSION_CATALOGO = 'version_catalogo'
+MODELOS_PUBLICOS = (Producto, ProductoVariante, Categoria, Usuario)
+
+
+def subir_version_catalogo(connection):
+    """Para escrituras de Core (UPDATE/INSERT masivos) que no pasan por el flush."""
+    connection.execute(
+        update(Contador).where(Contador.nombre == VERSION_CATALOGO).values(valor=Contador.valor + 1)
+    )
+
+
+def version_catalogo():
+    return db.session.execute(select(Contador.valor).where(Contador.nombre == VERSION_CATALOGO)).scalar()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _subir_tras_flush(sesion, flush_context):
+    cambiados = list(sesion.new) + list(sesion.dirty) + list(sesion.deleted)
+    if any(isinstance(obj, MODELOS_PUBLICOS) for obj in cambiados):
+        subir_version_catalogo(sesion.connection())
+
+
+def _cacheable():
+    # Solo visitantes anónimos, GET, y sin mensajes flash pendientes:
+    # la navbar y las alertas de base.html dependen de la sesión.
+    return (
+        current_app.config.get('PAGE_CACHE_ENABLED', True)
+        and request.method == 'GET'
+        and not current_user.is_authenticated
+        and '_flashes' not in session
+    )
+
+
+def _clave(parametros):
+    """Ruta + parámetros que usa la vista, o None si llegan otros.
+
+    Con request.full_path cada query string arbitraria (?x=1, ?x=2...)
+    sería una entrada nueva y un solo cliente podría desalojar la portada.
+    """
+    if any(nombre not in parametros for nombre in request.args):
+        return None
+    valores = sorted((nombre, valor) for nombre in parametros for valor in request.args.getlist(nombre))
+    return request.path + ('?' + urlencode(valores) if valores else '')
+
+
+def cache_publica(ttl=None, parametros=()):
+    """Decorador: sirve la vista desde memoria para visitantes anónimos.
+
+    `parametros` son los argumentos de la query string que usa la vista;
+    las peticiones con cualquier otro no se cachean. Cada acierto cuesta
+    una lectura por clave primaria (la versión del catálogo).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            clave = _clave(parametros) if _cacheable() else None
+            if clave is None:
+                return vista(*args, **kwargs)
+            clave = f'{clave}#{version_catalogo()}'
+
+            html = paginas_publicas.obtener(clave)
+            if html is not None:
+                respuesta = make_response(html)
+                respuesta.headers['X-Page-Cache'] = 'HIT'
+                return respuesta
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code == 200 and not respuesta.is_streamed:
+                paginas_publicas.guardar(clave, respuesta.get_data(as_text=True), ttl)
+            respuesta.headers['X-Page-Cache'] = 'MISS'
+            return respuesta
+        return envoltura
+    return decorador
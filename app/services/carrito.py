@@ -0,0 +1,146 @@
+from collections import OrderedDict
+
+from flask import g, session
+from flask_login import current_user
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.models import ItemCarrito, Producto
+
+# -------------------------------
+# Carrito en el servidor
+# -------------------------------
+# Cada línea guarda solo (usuario, producto, color, talla, cantidad); la
+# cookie de sesión ya no lleva el carrito, solo el id de usuario de
+# Flask-Login. Nombre, precio e imagen se leen al mostrar el carrito, en una
+# sola consulta, así que siempre están al día.
+
+def _recortar(color, talla):
+    """Mismos valores por defecto que el formulario y límites de las columnas."""
+    return (color or 'Único')[:50], (talla or 'Única')[:20]
+
+
+def _sumar(usuario_id, producto_id, color, talla, cantidad):
+    return db.session.execute(
+        update(ItemCarrito)
+        .where(
+            ItemCarrito.usuario_id == usuario_id, ItemCarrito.producto_id == producto_id,
+            ItemCarrito.color == color, ItemCarrito.talla == talla,
+        )
+        .values(cantidad=ItemCarrito.cantidad + cantidad)
+    ).rowcount
+
+
+def agregar_item(usuario_id, producto_id, color, talla, cantidad=1):
+    """Suma `cantidad` a la línea (producto, color, talla) o la crea."""
+    color, talla = _recortar(color, talla)
+    if not _sumar(usuario_id, producto_id, color, talla, cantidad):
+        db.session.add(ItemCarrito(
+            usuario_id=usuario_id, producto_id=producto_id,
+            color=color, talla=talla, cantidad=cantidad,
+        ))
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Otra petición creó la misma línea a la vez: se suma a esa
+            db.session.rollback()
+            _sumar(usuario_id, producto_id, color, talla, cantidad)
+    db.session.commit()
+
+
+def _id_linea(clave):
+    try:
+        return int(clave)
+    except (TypeError, ValueError):
+        return None
+
+
+def cambiar_cantidad(usuario_id, clave, delta):
+    """Suma `delta` a una línea; si queda en cero o menos, se elimina.
+
+    Devuelve 'actualizada', 'eliminada' o None si la línea no existe.
+    """
+    linea_id = _id_linea(clave)
+    linea = db.session.get(ItemCarrito, linea_id) if linea_id is not None else None
+    if linea is None or linea.usuario_id != usuario_id:
+        return None
+    linea.cantidad += delta
+    if linea.cantidad <= 0:
+        db.session.delete(linea)
+        resultado = 'eliminada'
+    else:
+        resultado = 'actualizada'
+    db.session.commit()
+    return resultado
+
+
+def eliminar_item(usuario_id, clave):
+    borradas = db.session.execute(
+        delete(ItemCarrito).where(ItemCarrito.id == _id_linea(clave), ItemCarrito.usuario_id == usuario_id)
+    ).rowcount
+    db.session.commit()
+    return bool(borradas)
+
+
+def vaciar_carrito(usuario_id):
+    db.session.execute(delete(ItemCarrito).where(ItemCarrito.usuario_id == usuario_id))
+    db.session.commit()
+
+
+def obtener_carrito(usuario_id):
+    """Líneas del carrito con nombre, precio e imagen actuales (una consulta).
+
+    Devuelve un OrderedDict clave_unica -> dict, con las mismas claves que
+    usaba el carrito de la sesión.
+    """
+    filas = db.session.execute(
+        select(
+            ItemCarrito.id, ItemCarrito.producto_id, ItemCarrito.color, ItemCarrito.talla,
+            ItemCarrito.cantidad, Producto.nombre, Producto.precio, Producto.imagen,
+        )
+        .join(Producto, Producto.id == ItemCarrito.producto_id)
+        .where(ItemCarrito.usuario_id == usuario_id)
+        .order_by(ItemCarrito.id)
+    ).all()
+    return OrderedDict(
+        (str(fila.id), {
+            'id': fila.producto_id,
+            'nombre': fila.nombre,
+            'precio': fila.precio,
+            'imagen': fila.imagen,
+            'cantidad': fila.cantidad,
+            'color': fila.color,
+            'talla': fila.talla,
+            'clave_unica': str(fila.id),
+        })
+        for fila in filas
+    )
+
+
+def migrar_carrito_sesion(usuario_id):
+    """Pasa a la base de datos un carrito antiguo guardado en la cookie."""
+    antiguo = session.pop('carrito', None)
+    if not antiguo:
+        return
+    for item in antiguo.values():
+        try:
+            agregar_item(usuario_id, int(item['id']), item.get('color'), item.get('talla'), int(item['cantidad']))
+        except (KeyError, TypeError, ValueError, IntegrityError):
+            db.session.rollback()
+
+
+def cantidad_carrito():
+    """Número de líneas del carrito del usuario actual (para la navbar)."""
+    if not current_user.is_authenticated:
+        return 0
+    if 'cantidad_carrito' not in g:
+        migrar_carrito_sesion(current_user.id)
+        g.cantidad_carrito = db.session.execute(
+            select(func.count(ItemCarrito.id)).where(ItemCarrito.usuario_id == current_user.id)
+        ).scalar()
+    return g.cantidad_carrito
+
+
+def configurar_carrito(app):
+    app.jinja_env.globals['cantidad_carrito'] = cantidad_carrito
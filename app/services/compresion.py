@@ -0,0 +1,138 @@
+import gzip
+import threading
+import zlib
+
+from flask import current_app, request
+
+# Tipos de contenido que vale la pena comprimir (texto)
+TIPOS_COMPRIMIBLES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml',
+}
+# wbits de zlib: 16 + MAX_WBITS produce gzip, MAX_WBITS produce deflate (zlib)
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+# -------------------------------
+# Métricas (por proceso)
+# -------------------------------
+class MetricasCompresion:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.respuestas = 0
+            self.streaming = 0
+            self.omitidas = 0
+            self.bytes_originales = 0
+            self.bytes_comprimidos = 0
+
+    def registrar(self, originales, comprimidos, streaming=False):
+        with self._lock:
+            self.respuestas += 1
+            self.streaming += int(streaming)
+            self.bytes_originales += originales
+            self.bytes_comprimidos += comprimidos
+
+    def omitir(self):
+        with self._lock:
+            self.omitidas += 1
+
+    def resumen(self):
+        with self._lock:
+            ratio = self.bytes_comprimidos / self.bytes_originales if self.bytes_originales else None
+            return {
+                'respuestas_comprimidas': self.respuestas,
+                'respuestas_streaming': self.streaming,
+                'respuestas_omitidas': self.omitidas,
+                'bytes_originales': self.bytes_originales,
+                'bytes_comprimidos': self.bytes_comprimidos,
+                'ratio': round(ratio, 4) if ratio is not None else None,
+            }
+
+
+metricas_compresion = MetricasCompresion()
+
+
+# -------------------------------
+# Compresión de respuestas (after_request)
+# -------------------------------
+def _codificacion():
+    """'gzip', 'deflate' o None según Accept-Encoding (gzip gana en empate)."""
+    return request.accept_encodings.best_match(['gzip', 'deflate'])
+
+
+def _comprimible(respuesta):
+    config = current_app.config
+    return (
+        config.get('COMPRESS_ENABLED', True)
+        and request.method != 'HEAD'
+        and respuesta.status_code == 200
+        and not respuesta.direct_passthrough  # archivos (send_file) y X-Sendfile
+        and 'Content-Encoding' not in respuesta.headers  # p. ej. assets .gz
+        and 'X-Accel-Redirect' not in respuesta.headers
+        and respuesta.mimetype in TIPOS_COMPRIMIBLES
+    )
+
+
+def _comprimir_stream(iterable, codificacion, nivel):
+    """Comprime trozo a trozo; Z_SYNC_FLUSH entrega cada trozo al cliente sin esperar al final."""
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, WBITS[codificacion])
+    originales = comprimidos = 0
+    try:
+        for trozo in iterable:
+            if isinstance(trozo, str):
+                trozo = trozo.encode('utf-8')
+            if not trozo:
+                continue
+            originales += len(trozo)
+            salida = compresor.compress(trozo) + compresor.flush(zlib.Z_SYNC_FLUSH)
+            comprimidos += len(salida)
+            yield salida
+        final = compresor.flush()
+        comprimidos += len(final)
+        yield final
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        metricas_compresion.registrar(originales, comprimidos, streaming=True)
+
+
+def comprimir_respuesta(respuesta):
+    if not _comprimible(respuesta):
+        return respuesta
+    respuesta.vary.add('Accept-Encoding')
+    codificacion = _codificacion()
+    if codificacion is None:
+        metricas_compresion.omitir()
+        return respuesta
+
+    nivel = current_app.config.get('COMPRESS_LEVEL', 6)
+    if respuesta.is_streamed:
+        respuesta.response = _comprimir_stream(respuesta.response, codificacion, nivel)
+        respuesta.headers.pop('Content-Length', None)
+    else:
+        datos = respuesta.get_data()
+        if len(datos) < current_app.config.get('COMPRESS_MIN_SIZE', 500):
+            metricas_compresion.omitir()
+            return respuesta
+        if codificacion == 'gzip':
+            comprimido = gzip.compress(datos, compresslevel=nivel)
+        else:
+            comprimido = zlib.compress(datos, nivel)
+        respuesta.set_data(comprimido)
+        metricas_compresion.registrar(len(datos), len(comprimido))
+
+    respuesta.headers['Content-Encoding'] = codificacion
+    # El ETag de la versión sin comprimir ya no describe estos bytes
+    etag, debil = respuesta.get_etag()
+    if etag and not debil:
+        respuesta.set_etag(f'{etag}-{codificacion}')
+    return respuesta
+
+
+def configurar_compresion(app):
+    app.after_request(comprimir_respuesta)
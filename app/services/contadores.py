@@ -0,0 +1,193 @@
+import threading
+import time
+
+import click
+from flask import current_app
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+
+from app import db
+from app.models.models import Categoria, Contador, Producto, Usuario, Venta
+
+# Umbrales usados por las tarjetas de estadísticas
+STOCK_BAJO = 10      # dashboard de administración
+STOCK_CRITICO = 3    # gestión de productos
+
+NOMBRES = (
+    'productos', 'productos_destacados', 'productos_stock_bajo', 'productos_stock_critico',
+    'clientes', 'admins', 'categorias', 'ventas',
+)
+
+_lock = threading.Lock()
+_ultima_reconciliacion = None
+
+
+# -------------------------------
+# Contribución de cada fila a los contadores
+# -------------------------------
+def _aporte_producto(destacado, stock):
+    stock = stock if stock is not None else 0
+    return {
+        'productos': 1,
+        'productos_destacados': int(bool(destacado)),
+        'productos_stock_bajo': int(stock < STOCK_BAJO),
+        'productos_stock_critico': int(stock < STOCK_CRITICO),
+    }
+
+
+def _aporte_usuario(is_admin):
+    if is_admin:
+        return {'admins': 1}
+    # NULL no cuenta como cliente (igual que filter_by(is_admin=False))
+    return {'clientes': 1} if is_admin is not None else {}
+
+
+def _aporte(obj, anterior=False):
+    """Aporte de `obj`; con anterior=True usa los valores previos al flush."""
+    def valor(attr):
+        if anterior:
+            historial = inspect(obj).attrs[attr].history
+            if historial.deleted:
+                return historial.deleted[0]
+        return getattr(obj, attr)
+
+    if isinstance(obj, Producto):
+        return _aporte_producto(valor('destacado'), valor('stock'))
+    if isinstance(obj, Usuario):
+        return _aporte_usuario(valor('is_admin'))
+    if isinstance(obj, Categoria):
+        return {'categorias': 1}
+    if isinstance(obj, Venta):
+        return {'ventas': 1}
+    return {}
+
+
+def _aplicar(connection, deltas, signo=1):
+    for nombre, delta in deltas.items():
+        if delta:
+            connection.execute(
+                update(Contador)
+                .where(Contador.nombre == nombre)
+                .values(valor=Contador.valor + signo * delta)
+            )
+
+
+def sumar_cambios_stock(connection, cambios):
+    """Ajusta los contadores de stock tras un UPDATE masivo (no pasa por los eventos).
+
+    `cambios` es una lista de (destacado, stock anterior, stock nuevo); se
+    aplica en la transacción de `connection`.
+    """
+    sumar_cambios_productos(connection, [
+        ((destacado, anterior), (destacado, nuevo)) for destacado, anterior, nuevo in cambios
+    ])
+
+
+def sumar_cambios_productos(connection, cambios, categorias_nuevas=0):
+    """Igual, para INSERT/UPDATE masivos de productos y categorías (importación).
+
+    `cambios` es una lista de (anterior, nuevo), cada uno (destacado, stock)
+    o None si el producto no existía.
+    """
+    deltas = {'categorias': categorias_nuevas}
+    for anterior, nuevo in cambios:
+        for aporte, signo in ((anterior, -1), (nuevo, 1)):
+            if aporte is not None:
+                for nombre, valor in _aporte_producto(*aporte).items():
+                    deltas[nombre] = deltas.get(nombre, 0) + signo * valor
+    _aplicar(connection, deltas)
+
+
+# -------------------------------
+# Eventos ORM
+# -------------------------------
+def _al_insertar(mapper, connection, target):
+    _aplicar(connection, _aporte(target))
+
+
+def _al_eliminar(mapper, connection, target):
+    _aplicar(connection, _aporte(target), signo=-1)
+
+
+def _al_actualizar(mapper, connection, target):
+    nuevo = _aporte(target)
+    anterior = _aporte(target, anterior=True)
+    deltas = {k: nuevo.get(k, 0) - anterior.get(k, 0) for k in set(nuevo) | set(anterior)}
+    _aplicar(connection, deltas)
+
+
+for _modelo in (Producto, Usuario, Categoria, Venta):
+    event.listen(_modelo, 'after_insert', _al_insertar)
+    event.listen(_modelo, 'after_delete', _al_eliminar)
+for _modelo in (Producto, Usuario):
+    event.listen(_modelo, 'after_update', _al_actualizar)
+
+
+# -------------------------------
+# Lectura y reconciliación
+# -------------------------------
+def contar_real(connection):
+    """Calcula los contadores con COUNT(*) sobre las tablas originales."""
+    def contar(*criterios, modelo=Producto):
+        return connection.execute(
+            select(func.count()).select_from(modelo).where(*criterios)
+        ).scalar()
+
+    return {
+        'productos': contar(),
+        'productos_destacados': contar(Producto.destacado == True),  # noqa: E712
+        'productos_stock_bajo': contar(func.coalesce(Producto.stock, 0) < STOCK_BAJO),
+        'productos_stock_critico': contar(func.coalesce(Producto.stock, 0) < STOCK_CRITICO),
+        'clientes': contar(Usuario.is_admin == False, modelo=Usuario),  # noqa: E712
+        'admins': contar(Usuario.is_admin == True, modelo=Usuario),  # noqa: E712
+        'categorias': contar(modelo=Categoria),
+        'ventas': contar(modelo=Venta),
+    }
+
+
+def reconciliar_contadores():
+    """Reescribe los contadores con los valores reales en una transacción propia."""
+    global _ultima_reconciliacion
+    with _lock:
+        with db.engine.begin() as connection:
+            Contador.__table__.create(connection, checkfirst=True)
+            reales = contar_real(connection)
+            # Solo los contadores propios: la fila version_catalogo es de la caché
+            connection.execute(delete(Contador).where(Contador.nombre.in_(NOMBRES)))
+            connection.execute(insert(Contador), [
+                {'nombre': nombre, 'valor': valor} for nombre, valor in reales.items()
+            ])
+        _ultima_reconciliacion = time.monotonic()
+    return reales
+
+
+def marcar_contadores_pendientes():
+    """Fuerza una reconciliación en la próxima lectura (tras escrituras masivas)."""
+    global _ultima_reconciliacion
+    _ultima_reconciliacion = None
+
+
+def obtener_contadores():
+    """Devuelve todos los contadores con una sola consulta."""
+    intervalo = current_app.config.get('COUNTERS_RECONCILE_SECONDS', 3600)
+    vencido = (
+        _ultima_reconciliacion is None
+        or time.monotonic() - _ultima_reconciliacion > intervalo
+    )
+    if not vencido:
+        valores = dict(db.session.execute(
+            select(Contador.nombre, Contador.valor).where(Contador.nombre.in_(NOMBRES))
+        ).all())
+        if all(nombre in valores for nombre in NOMBRES):
+            return valores
+    return reconciliar_contadores()
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_contadores(app):
+    @app.cli.command('reconciliar-contadores')
+    def reconciliar_contadores_cmd():
+        """Recalcula los contadores de estadísticas (crear tabla si falta)."""
+        for nombre, valor in reconciliar_contadores().items():
+            click.echo(f'{nombre}: {valor}')
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+from collections import Counter
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.explicar import indices_usados, plan_de_consulta
+
+# Carpeta del paquete `app`: solo sus archivos cuentan como origen de una consulta
+_RAIZ_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+_LARGO_SQL = 500
+
+_registrado = False
+
+
+# -------------------------------
+# Diagnóstico de SQL (desarrollo / staging)
+# -------------------------------
+# Con SQL_DIAGNOSTICS=1 cada sentencia se cronometra y se anota de dónde
+# salió (línea de plantilla Jinja o función de la app). Se registra:
+#   - toda sentencia que tarde más de SLOW_QUERY_MS, con la forma de sus
+#     parámetros (tipos, no valores) y su plan de EXPLAIN,
+#   - al terminar cada petición, las sentencias que se repitieron más de
+#     N_PLUS_ONE_THRESHOLD veces (el patrón N+1 de las cargas perezosas).
+# Recorrer la pila en cada sentencia tiene un costo: no activar en producción.
+
+def _origen():
+    """'plantilla.html:45' o 'controllers/controller.py:123 en ver_venta'."""
+    marco = sys._getframe(2)
+    funcion_app = None
+    while marco is not None:
+        plantilla = marco.f_globals.get('__jinja_template__')
+        if plantilla is not None:
+            linea = plantilla.get_corresponding_lineno(marco.f_lineno)
+            return f'{plantilla.name or plantilla.filename}:{linea}'
+        archivo = os.path.abspath(marco.f_code.co_filename)
+        if funcion_app is None and archivo.startswith(_RAIZ_APP) and archivo != _ESTE_ARCHIVO:
+            relativo = os.path.relpath(archivo, _RAIZ_APP)
+            funcion_app = f'{relativo}:{marco.f_lineno} en {marco.f_code.co_name}'
+        marco = marco.f_back
+    return funcion_app or 'desconocido'
+
+
+def _forma(parametros, executemany):
+    """Tipos de los parámetros: '(int, str)', '{id: int}' o '25 x (int, str)'."""
+    def una(fila):
+        if isinstance(fila, dict):
+            return '{' + ', '.join(f'{clave}: {type(valor).__name__}' for clave, valor in fila.items()) + '}'
+        if isinstance(fila, (list, tuple)):
+            return '(' + ', '.join(type(valor).__name__ for valor in fila) + ')'
+        return type(fila).__name__
+
+    if executemany and parametros:
+        return f'{len(parametros)} x {una(parametros[0])}'
+    return una(parametros) if parametros else '()'
+
+
+def _recortar(sql):
+    sql = ' '.join(sql.split())
+    return sql if len(sql) <= _LARGO_SQL else sql[:_LARGO_SQL] + '...'
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get('diagnostico_explain'):
+        return
+    conn.info.setdefault('diagnostico_pila', []).append((time.perf_counter(), _origen()))
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get('diagnostico_pila')
+    if conn.info.get('diagnostico_explain') or not pila:
+        return
+    # Se saca siempre: la pila vive en la conexión del pool y crecería con
+    # cada sentencia ejecutada fuera de la app (hilos, CLI)
+    inicio, origen = pila.pop()
+    if not has_app_context():
+        return
+    milisegundos = (time.perf_counter() - inicio) * 1000
+    config = current_app.config
+
+    if has_request_context():
+        repetidas = g.setdefault('sql_repetidas', {})
+        conteo = repetidas.setdefault(statement, [0, Counter()])
+        conteo[0] += 1
+        conteo[1][origen] += 1
+
+    if milisegundos >= config.get('SLOW_QUERY_MS', 100):
+        plan = _explicar(conn, statement, parameters, executemany)
+        current_app.logger.warning(
+            'Consulta lenta (%.1f ms) desde %s%s\n  SQL: %s\n  Parámetros: %s\n  Plan: %s',
+            milisegundos, origen,
+            f' [{request.method} {request.path}]' if has_request_context() else '',
+            _recortar(statement), _forma(parameters, executemany), plan,
+        )
+
+
+def _error(contexto):
+    conexion = contexto.connection
+    if conexion is None or conexion.info.get('diagnostico_explain'):
+        return
+    if conexion.info.get('diagnostico_pila'):
+        conexion.info['diagnostico_pila'].pop()
+
+
+def _explicar(conn, statement, parameters, executemany):
+    """Plan de un SELECT en la misma conexión (ve la misma transacción)."""
+    if executemany or not current_app.config.get('SLOW_QUERY_EXPLAIN', True):
+        return 'no capturado'
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return 'no aplica (no es SELECT)'
+    conn.info['diagnostico_explain'] = True
+    try:
+        filas = plan_de_consulta(conn, statement, parameters)
+        usados = indices_usados(filas)
+        detalle = '; '.join(str(fila.get('detail', fila)) for fila in filas)
+        return f"índices: {', '.join(sorted(usados)) or 'ninguno'} | {detalle}"
+    except Exception as e:
+        return f'EXPLAIN falló: {e}'
+    finally:
+        conn.info['diagnostico_explain'] = False
+
+
+def _revisar_repetidas(excepcion=None):
+    repetidas = g.pop('sql_repetidas', None)
+    if not repetidas:
+        return
+    limite = current_app.config.get('N_PLUS_ONE_THRESHOLD', 10)
+    for statement, (veces, origenes) in repetidas.items():
+        if veces > limite:
+            lugares = ', '.join(f'{origen} ({n}x)' for origen, n in origenes.most_common(3))
+            current_app.logger.warning(
+                'Posible N+1: la misma sentencia se ejecutó %d veces en %s %s (endpoint %s)\n'
+                '  SQL: %s\n  Desde: %s',
+                veces, request.method, request.path, request.endpoint, _recortar(statement), lugares,
+            )
+
+
+def configurar_diagnostico(app):
+    global _registrado
+    if not app.config.get('SQL_DIAGNOSTICS'):
+        return
+    if not _registrado:
+        event.listen(Engine, 'before_cursor_execute', _antes)
+        event.listen(Engine, 'after_cursor_execute', _despues)
+        event.listen(Engine, 'handle_error', _error)
+        _registrado = True
+    app.teardown_request(_revisar_repetidas)
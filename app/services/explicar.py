@@ -0,0 +1,119 @@
+from datetime import date, datetime, timedelta
+
+import click
+from sqlalchemy import func, select
+
+from app import db
+from app.models.models import DetalleVenta, Gasto, Producto, Usuario, Venta
+from app.services.resumen import rango_mes
+from app.services.variantes import filtro_disponible
+
+
+# -------------------------------
+# EXPLAIN de consultas
+# -------------------------------
+def _prefijo_explain(dialecto):
+    return 'EXPLAIN QUERY PLAN ' if dialecto == 'sqlite' else 'EXPLAIN '
+
+
+def plan_de_consulta(conexion, sentencia, parametros=None):
+    """Filas del plan de ejecución de `sentencia` (un select de SQLAlchemy o SQL en texto).
+
+    Con SQL en texto se pueden pasar los `parametros` del driver (p. ej. los
+    de una sentencia ya ejecutada).
+    """
+    if isinstance(sentencia, str):
+        sql = sentencia
+    else:
+        # Valores literales: el plan no depende de cómo se pasen los parámetros
+        sql = str(sentencia.compile(dialect=conexion.dialect, compile_kwargs={'literal_binds': True}))
+    sql = _prefijo_explain(conexion.dialect.name) + sql
+    if parametros:
+        resultado = conexion.exec_driver_sql(sql, parametros)
+    else:
+        resultado = conexion.exec_driver_sql(sql)
+    return [dict(fila._mapping) for fila in resultado]
+
+
+def indices_usados(plan):
+    """Nombres de índice que aparecen en el plan (SQLite: 'detail'; MySQL: 'key')."""
+    usados = set()
+    for fila in plan:
+        if fila.get('key'):
+            usados.add(fila['key'])
+        detalle = fila.get('detail') or ''
+        for marca in ('USING INDEX ', 'USING COVERING INDEX '):
+            if marca in detalle:
+                usados.add(detalle.split(marca, 1)[1].split(' ', 1)[0])
+    return usados
+
+
+# -------------------------------
+# Rutas de acceso esperadas (índice que debería usar cada consulta)
+# -------------------------------
+def _rutas_acceso():
+    hoy = date.today()
+    inicio = datetime.combine(hoy - timedelta(days=30), datetime.min.time())
+    fin = datetime.combine(hoy, datetime.max.time())
+    inicio_mes, inicio_mes_siguiente = rango_mes(hoy)
+    return {
+        'ventas_por_fecha': ('ix_ventas_fecha', select(Venta.id, Venta.fecha, Venta.total).where(
+            Venta.fecha >= inicio, Venta.fecha <= fin).order_by(Venta.fecha.desc(), Venta.id.desc()).limit(25)),
+        'gastos_por_fecha': ('ix_gastos_fecha', select(Gasto.id, Gasto.fecha, Gasto.monto).where(
+            Gasto.fecha >= inicio, Gasto.fecha <= fin).order_by(Gasto.fecha.desc(), Gasto.id.desc()).limit(25)),
+        'detalles_por_venta': ('ix_detalle_ventas_venta', select(
+            DetalleVenta.venta_id, func.count(DetalleVenta.id)).where(
+            DetalleVenta.venta_id.in_([1, 2, 3])).group_by(DetalleVenta.venta_id)),
+        'productos_recientes': ('ix_productos_creado', select(Producto.id).order_by(
+            Producto.created_at.desc()).limit(8)),
+        'productos_destacados': ('ix_productos_destacado', select(Producto.id).where(
+            Producto.destacado == True).order_by(Producto.id).limit(8)),  # noqa: E712
+        'productos_stock_critico': ('ix_productos_stock', select(Producto.id).where(
+            Producto.stock > 0, Producto.stock < 3)),
+        'productos_por_categoria': ('ix_productos_categoria', select(Producto.id).where(
+            Producto.categoria_id == 1).order_by(Producto.id).limit(25)),
+        'productos_por_sku': ('ux_productos_sku', select(Producto.id).where(
+            Producto.sku.in_(['A-1', 'A-2']))),
+        'productos_por_talla': ('ix_variantes_talla_stock', select(Producto.id).where(
+            filtro_disponible('M')).order_by(Producto.id).limit(25)),
+        'productos_por_color': ('ix_variantes_color_stock', select(Producto.id).where(
+            filtro_disponible(color='Negro')).order_by(Producto.id).limit(25)),
+        'usuarios_por_rol': ('ix_usuarios_admin_creado', select(Usuario.id).where(
+            Usuario.is_admin == False).order_by(  # noqa: E712
+            Usuario.created_at.desc(), Usuario.id.desc()).limit(25)),
+        'usuarios_nuevos_mes': ('ix_usuarios_creado', select(func.count(Usuario.id)).where(
+            Usuario.created_at >= inicio_mes, Usuario.created_at < inicio_mes_siguiente)),
+    }
+
+
+def verificar_indices(nombres=None):
+    """Devuelve [(ruta, índice esperado, índices usados, ok, plan)]."""
+    resultados = []
+    with db.engine.connect() as conexion:
+        for nombre, (indice, sentencia) in _rutas_acceso().items():
+            if nombres and nombre not in nombres:
+                continue
+            plan = plan_de_consulta(conexion, sentencia)
+            usados = indices_usados(plan)
+            resultados.append((nombre, indice, usados, indice in usados, plan))
+    return resultados
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_explicar(app):
+    @app.cli.command('verificar-indices')
+    @click.argument('rutas', nargs=-1)
+    @click.option('--plan', is_flag=True, help='Muestra el plan completo de cada consulta.')
+    def verificar_indices_cmd(rutas, plan):
+        """EXPLAIN de las consultas principales: falla si alguna no usa su índice."""
+        fallos = 0
+        for nombre, indice, usados, ok, filas in verificar_indices(set(rutas)):
+            fallos += not ok
+            click.echo(f"{'OK   ' if ok else 'FALLA'} {nombre}: espera {indice}, usa {', '.join(sorted(usados)) or 'ninguno'}")
+            if plan or not ok:
+                for fila in filas:
+                    click.echo(f'      {fila}')
+        if fallos:
+            raise click.ClickException(f'{fallos} consulta(s) sin el índice esperado.')
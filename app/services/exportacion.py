@@ -0,0 +1,178 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+
+from flask import Response, stream_with_context
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from sqlalchemy import func
+
+from app import db
+from app.models.models import DetalleVenta, Gasto, Producto, Usuario, Venta
+
+LOTE = 1000            # filas por ida al servidor (cursor del lado del servidor)
+FILAS_POR_TROZO = 500  # filas CSV acumuladas antes de enviar un trozo
+TROZO_ARCHIVO = 64 * 1024
+
+# Un texto que empieza así se evalúa como fórmula al abrir el archivo en
+# Excel/LibreOffice (inyección de fórmulas): se le antepone un apóstrofo
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+# -------------------------------
+# Consultas (columnas, sin objetos ORM)
+# -------------------------------
+# yield_per abre un cursor del lado del servidor: las filas llegan por
+# lotes mientras se escriben, sin cargar el periodo completo en memoria.
+
+def _rango(query, columna, inicio, fin):
+    if inicio:
+        query = query.filter(columna >= inicio)
+    if fin:
+        query = query.filter(columna <= fin)
+    return query
+
+
+def filas_ventas(inicio, fin, cliente):
+    encabezados = ['venta_id', 'fecha', 'cliente', 'email', 'lineas', 'unidades', 'total']
+    query = (
+        db.session.query(
+            Venta.id, Venta.fecha, Usuario.username, Usuario.email,
+            func.count(DetalleVenta.id), func.coalesce(func.sum(DetalleVenta.cantidad), 0),
+            Venta.total,
+        )
+        .outerjoin(Usuario, Usuario.id == Venta.usuario_id)
+        .outerjoin(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+        .group_by(Venta.id, Venta.fecha, Usuario.username, Usuario.email, Venta.total)
+    )
+    query = _rango(query, Venta.fecha, inicio, fin)
+    if cliente:
+        query = query.filter(Usuario.username.ilike(f'%{cliente}%'))
+    return encabezados, query.order_by(Venta.fecha, Venta.id).yield_per(LOTE)
+
+
+def filas_detalles(inicio, fin, cliente):
+    encabezados = [
+        'venta_id', 'fecha', 'cliente', 'producto_id', 'producto', 'color', 'talla',
+        'cantidad', 'precio_unitario', 'subtotal',
+    ]
+    query = (
+        db.session.query(
+            Venta.id, Venta.fecha, Usuario.username, DetalleVenta.producto_id, Producto.nombre,
+            DetalleVenta.color_seleccionado, DetalleVenta.talla_seleccionada,
+            DetalleVenta.cantidad, DetalleVenta.precio_unitario, DetalleVenta.subtotal,
+        )
+        .select_from(DetalleVenta)
+        .join(Venta, Venta.id == DetalleVenta.venta_id)
+        .outerjoin(Usuario, Usuario.id == Venta.usuario_id)
+        .outerjoin(Producto, Producto.id == DetalleVenta.producto_id)
+    )
+    query = _rango(query, Venta.fecha, inicio, fin)
+    if cliente:
+        query = query.filter(Usuario.username.ilike(f'%{cliente}%'))
+    return encabezados, query.order_by(Venta.fecha, Venta.id, DetalleVenta.id).yield_per(LOTE)
+
+
+def filas_gastos(inicio, fin, cliente=None):
+    """El filtro por cliente no aplica a gastos (igual que en gestion_ventas)."""
+    encabezados = ['gasto_id', 'fecha', 'descripcion', 'categoria', 'monto']
+    query = db.session.query(Gasto.id, Gasto.fecha, Gasto.descripcion, Gasto.categoria, Gasto.monto)
+    query = _rango(query, Gasto.fecha, inicio, fin)
+    return encabezados, query.order_by(Gasto.fecha, Gasto.id).yield_per(LOTE)
+
+
+EXPORTACIONES = {
+    'ventas': filas_ventas,
+    'detalles': filas_detalles,
+    'gastos': filas_gastos,
+}
+
+
+# -------------------------------
+# Respuestas en streaming
+# -------------------------------
+def escapar_formula(valor):
+    """Antepone ' a los textos que una planilla tomaría como fórmula (los números no)."""
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def quitar_escape_formula(texto):
+    """Inversa de escapar_formula, para volver a importar un CSV exportado."""
+    if texto.startswith("'") and texto[1:].startswith(INICIO_FORMULA):
+        return texto[1:]
+    return texto
+
+
+def _valor_csv(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return escapar_formula(valor)
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas):
+    """CSV enviado por trozos (chunked) a medida que el cursor entrega filas."""
+    def generar():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        buffer.write('\ufeff')  # BOM: Excel abre el UTF-8 con acentos correctos
+        escritor.writerow(encabezados)
+        for i, fila in enumerate(filas, 1):
+            escritor.writerow([_valor_csv(v) for v in fila])
+            if i % FILAS_POR_TROZO == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    respuesta = Response(stream_with_context(generar()), mimetype='text/csv')
+    respuesta.headers['Content-Disposition'] = f'attachment; filename={nombre_archivo}'
+    return respuesta
+
+
+def _celda_xlsx(hoja, valor):
+    # openpyxl guarda como fórmula cualquier texto que empiece con '=':
+    # se fuerza el tipo texto y el valor queda tal cual, sin apóstrofo
+    if isinstance(valor, str) and valor.startswith('='):
+        celda = WriteOnlyCell(hoja, valor)
+        celda.data_type = 's'
+        return celda
+    return valor
+
+
+def respuesta_xlsx(nombre_archivo, encabezados, filas, titulo='Datos'):
+    """XLSX en modo write_only a un archivo temporal que se envía por trozos.
+
+    En write_only openpyxl escribe cada fila a disco al recibirla: la
+    memoria no crece con el periodo, pero el archivo completo ocupa disco
+    en el temporal. Un .xlsx es un zip y no se puede emitir antes de
+    terminarlo, y Excel no abre más de 1.048.576 filas por hoja; para
+    volúmenes muy grandes conviene el CSV, que sale desde la primera fila.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(titulo[:31])
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append([_celda_xlsx(hoja, v) for v in fila])
+
+    temporal = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temporal.close()
+    libro.save(temporal.name)
+
+    def generar():
+        with open(temporal.name, 'rb') as f:
+            while trozo := f.read(TROZO_ARCHIVO):
+                yield trozo
+
+    respuesta = Response(
+        generar(),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    respuesta.headers['Content-Disposition'] = f'attachment; filename={nombre_archivo}'
+    respuesta.headers['Content-Length'] = str(os.path.getsize(temporal.name))
+    # Se borra al cerrar la respuesta, aunque el cliente corte la descarga
+    respuesta.call_on_close(lambda: os.remove(temporal.name))
+    return respuesta
@@ -0,0 +1,316 @@
+from collections import Counter
+
+import click
+from sqlalchemy import delete, event, func, insert, inspect, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.models import ConteoFaceta, FacetaProducto, Producto, ProductoVariante
+from app.services.variantes import COLOR_UNICO, TALLA_UNICA, separar
+
+# Facetas del catálogo; el nombre es también el parámetro de la URL
+FACETAS = ('categoria', 'color', 'talla', 'precio', 'disponible')
+
+# (valor, etiqueta, mínimo incluido, máximo excluido)
+BANDAS_PRECIO = (
+    ('0-25', 'Hasta $25', 0, 25),
+    ('25-50', '$25 a $50', 25, 50),
+    ('50-100', '$50 a $100', 50, 100),
+    ('100+', 'Más de $100', 100, None),
+)
+CAMPOS_PRODUCTO = ('categoria_id', 'precio', 'stock', 'colores', 'tallas')
+
+
+# -------------------------------
+# Valores de faceta de cada producto
+# -------------------------------
+def banda_precio(precio):
+    precio = precio or 0
+    for valor, _, minimo, maximo in BANDAS_PRECIO:
+        if precio >= minimo and (maximo is None or precio < maximo):
+            return valor
+    return BANDAS_PRECIO[0][0]
+
+
+def facetas_producto(producto, variantes):
+    """{(faceta, valor)} de un producto; `variantes` son sus (color, talla, stock).
+
+    Color y talla solo cuentan si la variante tiene stock. Los productos sin
+    variantes (anteriores a la migración 0003) usan sus textos de colores y
+    tallas mientras tengan stock.
+    """
+    valores = {('precio', banda_precio(producto.precio))}
+    if producto.categoria_id:
+        valores.add(('categoria', str(producto.categoria_id)))
+    if (producto.stock or 0) > 0:
+        valores.add(('disponible', '1'))
+    if variantes:
+        pares = [(color, talla) for color, talla, stock in variantes if stock > 0]
+    elif (producto.stock or 0) > 0:
+        pares = [(c, None) for c in separar(producto.colores, 50)]
+        pares += [(None, t) for t in separar(producto.tallas, 20)]
+    else:
+        pares = []
+    for color, talla in pares:
+        if color and color != COLOR_UNICO:
+            valores.add(('color', color))
+        if talla and talla != TALLA_UNICA:
+            valores.add(('talla', talla))
+    return valores
+
+
+# -------------------------------
+# Mantenimiento incremental
+# -------------------------------
+# Cada cambio en facetas_productos suma o resta en conteos_facetas en la
+# misma transacción (conteo = conteo + :d, como el resumen diario): dos
+# transacciones que tocan el mismo valor no se pisan.
+
+def indexar_facetas(connection, producto_ids):
+    """Rehace las facetas de esos productos y ajusta sus conteos (consultas fijas por lote)."""
+    producto_ids = sorted(set(producto_ids))
+    if not producto_ids:
+        return
+    deltas = _borrar_filas(connection, producto_ids)
+    productos = connection.execute(
+        select(Producto.id, Producto.categoria_id, Producto.precio, Producto.stock,
+               Producto.colores, Producto.tallas)
+        .where(Producto.id.in_(producto_ids))
+    ).all()
+    variantes = {}
+    for fila in connection.execute(
+        select(ProductoVariante.producto_id, ProductoVariante.color,
+               ProductoVariante.talla, ProductoVariante.stock)
+        .where(ProductoVariante.producto_id.in_(producto_ids))
+    ):
+        variantes.setdefault(fila.producto_id, []).append((fila.color, fila.talla, fila.stock))
+    filas = [
+        {'faceta': faceta, 'valor': valor, 'producto_id': producto.id}
+        for producto in productos
+        for faceta, valor in facetas_producto(producto, variantes.get(producto.id))
+    ]
+    if filas:
+        connection.execute(insert(FacetaProducto), filas)
+    deltas.update((fila['faceta'], fila['valor']) for fila in filas)
+    sumar_conteos(connection, deltas)
+
+
+def quitar_facetas(connection, producto_ids):
+    """Borra las facetas de productos que se van a eliminar y resta sus conteos."""
+    sumar_conteos(connection, _borrar_filas(connection, producto_ids))
+
+
+def _borrar_filas(connection, producto_ids):
+    """Borra las filas de esos productos; devuelve lo que restan a cada conteo."""
+    deltas = Counter()
+    deltas.subtract(connection.execute(
+        select(FacetaProducto.faceta, FacetaProducto.valor).where(FacetaProducto.producto_id.in_(producto_ids))
+    ).tuples())
+    connection.execute(delete(FacetaProducto).where(FacetaProducto.producto_id.in_(producto_ids)))
+    return deltas
+
+
+def sumar_conteos(connection, deltas):
+    """Aplica {(faceta, valor): delta}, un UPDATE (o INSERT) por valor que cambió."""
+    # Siempre en el mismo orden: dos transacciones bloquean las filas igual
+    for (faceta, valor), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        if _sumar_conteo(connection, faceta, valor, delta) or delta < 0:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(ConteoFaceta).values(faceta=faceta, valor=valor, conteo=delta))
+        except IntegrityError:
+            # Otra transacción creó el valor a la vez: se suma sobre esa fila
+            _sumar_conteo(connection, faceta, valor, delta)
+
+
+def _sumar_conteo(connection, faceta, valor, delta):
+    return connection.execute(
+        update(ConteoFaceta)
+        .where(ConteoFaceta.faceta == faceta, ConteoFaceta.valor == valor)
+        .values(conteo=ConteoFaceta.conteo + delta)
+    ).rowcount
+
+
+def _productos_tocados(sesion):
+    """Ids de productos cuyas facetas pueden haber cambiado en este flush."""
+    ids = set()
+    for obj in list(sesion.new) + list(sesion.dirty) + list(sesion.deleted):
+        if isinstance(obj, Producto):
+            estado = inspect(obj)
+            if obj in sesion.new or obj in sesion.deleted or any(
+                estado.attrs[campo].history.has_changes() for campo in CAMPOS_PRODUCTO
+            ):
+                ids.add(obj.id)
+        elif isinstance(obj, ProductoVariante):
+            ids.add(obj.producto_id)
+    ids.discard(None)
+    return ids
+
+
+@event.listens_for(db.session, 'before_flush')
+def _quitar_eliminados(sesion, flush_context, instances):
+    # Antes del DELETE: con ON DELETE CASCADE (MySQL) las filas ya no
+    # estarían después del flush para restar sus conteos
+    ids = [obj.id for obj in sesion.deleted if isinstance(obj, Producto) and obj.id is not None]
+    if ids:
+        quitar_facetas(sesion.connection(), ids)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _reindexar_tras_flush(sesion, flush_context):
+    ids = _productos_tocados(sesion)
+    if ids:
+        indexar_facetas(sesion.connection(), ids)
+
+
+def marcar_facetas(sesion, producto_ids):
+    """Para escrituras masivas (UPDATE de Core) que no pasan por el flush."""
+    indexar_facetas(sesion.connection(), producto_ids)
+
+
+def indexar_catalogo(connection, lote=500):
+    """Indexa todos los productos por lotes de ids. Devuelve cuántos procesó."""
+    total = 0
+    ultimo = 0
+    while True:
+        ids = connection.execute(
+            select(Producto.id).where(Producto.id > ultimo).order_by(Producto.id).limit(lote)
+        ).scalars().all()
+        if not ids:
+            return total
+        indexar_facetas(connection, ids)
+        total += len(ids)
+        ultimo = ids[-1]
+
+
+def reindexar_facetas():
+    """Reconstruye el índice completo y sus conteos."""
+    with db.engine.begin() as connection:
+        connection.execute(delete(FacetaProducto))
+        connection.execute(delete(ConteoFaceta))
+        return indexar_catalogo(connection)
+
+
+# -------------------------------
+# Filtros y conteos
+# -------------------------------
+# Una faceta sin filtros que le apliquen (ni búsqueda ni otra faceta
+# elegida) se lee de conteos_facetas: el catálogo sin filtros no agrupa
+# nada, y con una sola faceta elegida tampoco esa faceta ni el total.
+# Las demás salen de facetas_productos con un GROUP BY, todas en una sola
+# consulta (UNION ALL): cada rama recorre la clave primaria (faceta, valor,
+# producto_id) y los filtros son subconsultas sobre la misma clave, así el
+# trabajo depende de los productos que pasan los filtros.
+
+def seleccion_de(args):
+    """{faceta: valor} elegidos en la URL (solo facetas conocidas)."""
+    return {faceta: args[faceta] for faceta in FACETAS if args.get(faceta)}
+
+
+def filtro_facetas(seleccion, columna=None):
+    """Condiciones "producto IN (postings de la faceta)" para la consulta del listado."""
+    columna = Producto.id if columna is None else columna
+    return [
+        columna.in_(
+            select(FacetaProducto.producto_id)
+            .where(FacetaProducto.faceta == faceta, FacetaProducto.valor == valor)
+            # Sin correlación: también se usa dentro de consultas sobre facetas_productos
+            .correlate(None)
+        )
+        for faceta, valor in seleccion.items()
+    ]
+
+
+def _condiciones(seleccion, busqueda, excepto=None):
+    """Condiciones sobre FacetaProducto.producto_id: búsqueda y facetas elegidas (menos `excepto`)."""
+    otras = {faceta: valor for faceta, valor in seleccion.items() if faceta != excepto}
+    condiciones = filtro_facetas(otras, columna=FacetaProducto.producto_id)
+    if busqueda is not None:
+        condiciones.append(FacetaProducto.producto_id.in_(busqueda))
+    return condiciones
+
+
+def _rama_faceta(faceta, seleccion, busqueda):
+    condiciones = _condiciones(seleccion, busqueda, excepto=faceta)
+    if not condiciones:
+        return (
+            select(ConteoFaceta.faceta, ConteoFaceta.valor, ConteoFaceta.conteo)
+            .where(ConteoFaceta.faceta == faceta, ConteoFaceta.conteo > 0)
+        )
+    return (
+        select(FacetaProducto.faceta, FacetaProducto.valor, func.count())
+        .where(FacetaProducto.faceta == faceta, *condiciones)
+        .group_by(FacetaProducto.faceta, FacetaProducto.valor)
+    )
+
+
+def _rama_total(seleccion, busqueda):
+    if busqueda is None and len(seleccion) <= 1:
+        # Todo producto tiene banda de precio: sin filtros el total es la
+        # suma de las bandas; con una faceta elegida, el conteo de su valor
+        if seleccion:
+            (faceta, valor), = seleccion.items()
+            condiciones = [ConteoFaceta.faceta == faceta, ConteoFaceta.valor == valor]
+        else:
+            condiciones = [ConteoFaceta.faceta == 'precio']
+        return select(literal(''), literal(''), func.coalesce(func.sum(ConteoFaceta.conteo), 0)).where(*condiciones)
+    return (
+        select(literal(''), literal(''), func.count())
+        .where(FacetaProducto.faceta == 'precio', *_condiciones(seleccion, busqueda))
+    )
+
+
+def contar_facetas(seleccion, busqueda=None, etiquetas=None):
+    """Opciones de cada faceta con su número de productos.
+
+    El conteo de una faceta aplica los filtros de las demás (no el suyo),
+    así cada opción indica cuántos resultados habría al elegirla.
+    `busqueda` es un select de ids de producto que limita el universo.
+    Devuelve ({faceta: [(valor, etiqueta, conteo, elegido)]}, total).
+    """
+    ramas = [_rama_faceta(faceta, seleccion, busqueda) for faceta in FACETAS]
+    ramas.append(_rama_total(seleccion, busqueda))
+    conteos = {faceta: {} for faceta in FACETAS}
+    total = 0
+    for faceta, valor, conteo in db.session.execute(union_all(*ramas)):
+        if faceta in conteos:
+            conteos[faceta][valor] = conteo
+        else:
+            total = int(conteo)
+
+    etiquetas = etiquetas or {}
+    nombres_precio = {valor: etiqueta for valor, etiqueta, _, _ in BANDAS_PRECIO}
+    opciones = {}
+    for faceta in FACETAS:
+        elegido = seleccion.get(faceta)
+        if elegido is not None:
+            # La opción elegida se muestra aunque ya no tenga productos
+            conteos[faceta].setdefault(elegido, 0)
+        lista = []
+        for valor, conteo in conteos[faceta].items():
+            etiqueta = (
+                nombres_precio.get(valor) if faceta == 'precio'
+                else etiquetas.get(faceta, {}).get(valor, valor)
+            )
+            lista.append((valor, etiqueta, conteo, valor == elegido))
+        if faceta == 'precio':
+            orden = list(nombres_precio)
+            lista.sort(key=lambda opcion: orden.index(opcion[0]) if opcion[0] in orden else len(orden))
+        else:
+            lista.sort(key=lambda opcion: (-opcion[2], str(opcion[1]).lower()))
+        opciones[faceta] = lista
+    return opciones, total
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_facetas(app):
+    @app.cli.command('reindexar-facetas')
+    def reindexar_facetas_cmd():
+        """Reconstruye el índice de facetas del catálogo."""
+        total = reindexar_facetas()
+        click.echo(f'Índice de facetas reconstruido: {total} productos.')
@@ -0,0 +1,297 @@
+import math
+import random
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+
+import click
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models.models import (
+    Categoria, DetalleVenta, Gasto, Producto, ProductoVariante, Usuario, Venta,
+)
+from app.services.variantes import combinaciones, repartir
+
+# Cuentas fijas para iniciar sesión en los benchmarks
+ADMIN_BENCH = 'admin@benchmark.local'
+CLIENTE_BENCH = 'cliente@benchmark.local'
+CLAVE_BENCH = 'benchmark'
+
+CATEGORIAS = (
+    'Camisas', 'Pantalones', 'Vestidos', 'Chaquetas', 'Calzado', 'Accesorios',
+    'Deportivo', 'Infantil', 'Abrigos', 'Faldas', 'Bolsos', 'Ropa interior',
+)
+TIPOS = ('Camisa', 'Pantalón', 'Vestido', 'Chaqueta', 'Zapatilla', 'Gorra', 'Sudadera',
+         'Falda', 'Abrigo', 'Bolso', 'Camiseta', 'Short', 'Blusa', 'Jersey', 'Bota')
+ADJETIVOS = ('clásica', 'slim', 'oversize', 'de lino', 'de algodón', 'estampada', 'básica',
+             'deportiva', 'elegante', 'vintage', 'acolchada', 'térmica', 'bordada')
+COLORES = ('Negro', 'Blanco', 'Azul', 'Rojo', 'Verde', 'Gris', 'Beige', 'Rosa', 'Marrón', 'Amarillo')
+TALLAS_ROPA = ('XS', 'S', 'M', 'L', 'XL', 'XXL')
+TALLAS_CALZADO = ('36', '37', '38', '39', '40', '41', '42', '43', '44')
+GASTOS = ('Proveedores', 'Alquiler', 'Servicios', 'Marketing', 'Transporte', 'Sueldos')
+
+# Líneas por venta y unidades por línea (pesos relativos)
+LINEAS_POR_VENTA = ((1, 2, 3, 4, 5), (55, 25, 11, 6, 3))
+UNIDADES_POR_LINEA = ((1, 2, 3), (80, 15, 5))
+
+
+# -------------------------------
+# Distribuciones
+# -------------------------------
+def _zipf(n, s=1.05):
+    """Pesos acumulados de una Zipf: pocos elementos concentran la mayoría."""
+    return list(accumulate(1 / (rango ** s) for rango in range(1, n + 1)))
+
+
+def _peso_dia(dia, indice, total_dias):
+    """Tendencia creciente, fines de semana y diciembre con más ventas."""
+    tendencia = 0.6 + 0.8 * indice / max(total_dias - 1, 1)
+    semana = 1.3 if dia.weekday() >= 5 else 1.0
+    temporada = 1.6 if dia.month == 12 else (1.2 if dia.month in (6, 7) else 1.0)
+    return tendencia * semana * temporada
+
+
+def _hora(azar):
+    """Hora del día con pico por la tarde (sin madrugada)."""
+    segundos = int(min(max(azar.gauss(16, 3.5), 7), 23.99) * 3600)
+    return time(segundos // 3600, segundos % 3600 // 60, segundos % 60)
+
+
+def _elegir(azar, acumulados):
+    return bisect_left(acumulados, azar.random() * acumulados[-1])
+
+
+def _precio(azar):
+    return round(min(max(math.exp(azar.gauss(math.log(35), 0.6)), 3), 500), 2)
+
+
+def _stock(azar):
+    tramo = azar.random()
+    if tramo < 0.08:
+        return 0
+    if tramo < 0.2:
+        return azar.randint(1, 4)
+    return azar.randint(5, 200)
+
+
+# -------------------------------
+# Generación
+# -------------------------------
+class Generador:
+    """Llena las tablas con datos sintéticos reproducibles (misma semilla, mismos datos).
+
+    Inserta con Core por lotes, fuera de la sesión: los índices derivados
+    (búsqueda, facetas, resumen diario, contadores) se reconstruyen al final.
+    """
+
+    def __init__(self, ventas, productos=None, clientes=None, categorias=12,
+                 dias=730, semilla=42, lote=5000, eco=None):
+        self.ventas = ventas
+        self.productos = productos or min(max(ventas // 100, 50), 20000)
+        self.clientes = clientes or min(max(ventas // 8, 20), 200000)
+        self.categorias = categorias
+        self.dias = dias
+        self.lote = lote
+        self.azar = random.Random(semilla)
+        self.eco = eco or (lambda mensaje: None)
+        # Mismo reloj que los filtros de fecha de los reportes (_filtros_ventas)
+        self.hoy = date.today()
+        self.desde = self.hoy - timedelta(days=dias - 1)
+
+    def _fecha(self):
+        dia = self.desde + timedelta(days=self.azar.randrange(self.dias))
+        return datetime.combine(dia, _hora(self.azar))
+
+    def _insertar(self, conexion, modelo, filas):
+        for i in range(0, len(filas), self.lote):
+            conexion.execute(insert(modelo), filas[i:i + self.lote])
+
+    def generar(self):
+        with db.engine.begin() as conexion:
+            if conexion.execute(select(func.count(Venta.id))).scalar() or \
+                    conexion.execute(select(func.count(Producto.id))).scalar():
+                raise click.ClickException('La base de datos ya tiene productos o ventas; usa una base vacía.')
+            categorias = self._categorias(conexion)
+            clientes = self._usuarios(conexion)
+            productos = self._productos(conexion, categorias)
+            self._ventas(conexion, clientes, productos)
+            self._gastos(conexion)
+        self._reconstruir_derivados()
+
+    def _categorias(self, conexion):
+        nombres = list(CATEGORIAS[:self.categorias])
+        nombres += [f'Categoría {i}' for i in range(len(nombres) + 1, self.categorias + 1)]
+        self._insertar(conexion, Categoria, [
+            {'nombre': nombre, 'descripcion': f'Productos de {nombre.lower()}'} for nombre in nombres
+        ])
+        self.eco(f'{len(nombres)} categorías')
+        return dict(conexion.execute(select(Categoria.id, Categoria.nombre)).all())
+
+    def _usuarios(self, conexion):
+        # Un solo hash para todos: scrypt por usuario tardaría minutos
+        clave = generate_password_hash(CLAVE_BENCH)
+        filas = [
+            {'username': 'admin_benchmark', 'email': ADMIN_BENCH, 'password_hash': clave,
+             'is_admin': True, 'created_at': datetime.combine(self.desde, time(9))},
+            {'username': 'cliente_benchmark', 'email': CLIENTE_BENCH, 'password_hash': clave,
+             'is_admin': False, 'created_at': datetime.combine(self.desde, time(9))},
+        ]
+        filas += [
+            {'username': f'cliente{i:07d}', 'email': f'cliente{i}@ejemplo.com', 'password_hash': clave,
+             'is_admin': False, 'created_at': self._fecha()}
+            for i in range(1, self.clientes + 1)
+        ]
+        self._insertar(conexion, Usuario, filas)
+        self.eco(f'{len(filas)} usuarios')
+        return conexion.execute(
+            select(Usuario.id).where(Usuario.is_admin == False).order_by(Usuario.id)  # noqa: E712
+        ).scalars().all()
+
+    def _productos(self, conexion, categorias):
+        filas = []
+        opciones_categoria = sorted(categorias.items())
+        for i in range(1, self.productos + 1):
+            categoria_id, categoria = self.azar.choice(opciones_categoria)
+            tipo = self.azar.choice(TIPOS)
+            if categoria == 'Calzado':
+                tallas = self.azar.sample(TALLAS_CALZADO, self.azar.randint(3, 7))
+            elif categoria in ('Accesorios', 'Bolsos'):
+                tallas = []
+            else:
+                tallas = self.azar.sample(TALLAS_ROPA, self.azar.randint(2, 5))
+            filas.append({
+                'nombre': f'{tipo} {self.azar.choice(ADJETIVOS)} {i}',
+                'descripcion': f'{tipo} de la colección {categoria.lower()}, referencia {i:06d}.',
+                'precio': _precio(self.azar),
+                'stock': _stock(self.azar),
+                'destacado': self.azar.random() < 0.05,
+                'created_at': self._fecha(),
+                'colores': ', '.join(self.azar.sample(COLORES, self.azar.randint(1, 4))),
+                'tallas': ', '.join(tallas),
+                'categoria_id': categoria_id,
+            })
+        self._insertar(conexion, Producto, filas)
+
+        productos = conexion.execute(
+            select(Producto.id, Producto.precio, Producto.stock, Producto.colores, Producto.tallas)
+            .order_by(Producto.id)
+        ).all()
+        variantes = []
+        opciones = {}
+        for producto in productos:
+            pares = combinaciones(producto.colores, producto.tallas)
+            opciones[producto.id] = pares
+            for (color, talla), stock in zip(pares, repartir(producto.stock, len(pares))):
+                variantes.append({'producto_id': producto.id, 'color': color, 'talla': talla, 'stock': stock})
+        self._insertar(conexion, ProductoVariante, variantes)
+        self.eco(f'{len(productos)} productos, {len(variantes)} variantes')
+        # Popularidad Zipf en orden aleatorio (no siempre los primeros ids)
+        orden = [(p.id, p.precio, opciones[p.id]) for p in productos]
+        self.azar.shuffle(orden)
+        return orden
+
+    def _ventas_por_dia(self):
+        """Reparte el total de ventas entre los días según su peso (con algo de ruido)."""
+        dias = [self.desde + timedelta(days=i) for i in range(self.dias)]
+        pesos = [_peso_dia(dia, i, self.dias) * self.azar.uniform(0.8, 1.2) for i, dia in enumerate(dias)]
+        total = sum(pesos)
+        exactas = [self.ventas * peso / total for peso in pesos]
+        cantidades = [int(x) for x in exactas]
+        faltan = self.ventas - sum(cantidades)
+        for i in sorted(range(self.dias), key=lambda i: exactas[i] - cantidades[i], reverse=True)[:faltan]:
+            cantidades[i] += 1
+        return zip(dias, cantidades)
+
+    def _ventas(self, conexion, clientes, productos):
+        pesos_cliente = _zipf(len(clientes), 0.9)
+        pesos_producto = _zipf(len(productos))
+        lineas, pesos_lineas = LINEAS_POR_VENTA
+        unidades, pesos_unidades = UNIDADES_POR_LINEA
+
+        # Día por día: los ids de venta crecen con la fecha, como en producción
+        siguiente_venta = (conexion.execute(select(func.max(Venta.id))).scalar() or 0) + 1
+        ventas, detalles = [], []
+        for dia, cantidad in self._ventas_por_dia():
+            for hora in sorted(_hora(self.azar) for _ in range(cantidad)):
+                venta_id = siguiente_venta
+                siguiente_venta += 1
+                total = 0
+                for _ in range(self.azar.choices(lineas, pesos_lineas)[0]):
+                    producto_id, precio, pares = productos[_elegir(self.azar, pesos_producto)]
+                    color, talla = self.azar.choice(pares)
+                    unidades_linea = self.azar.choices(unidades, pesos_unidades)[0]
+                    subtotal = round(precio * unidades_linea, 2)
+                    total += subtotal
+                    detalles.append({
+                        'venta_id': venta_id, 'producto_id': producto_id, 'cantidad': unidades_linea,
+                        'precio_unitario': precio, 'subtotal': subtotal,
+                        'color_seleccionado': color, 'talla_seleccionada': talla,
+                    })
+                ventas.append({
+                    'id': venta_id, 'usuario_id': clientes[_elegir(self.azar, pesos_cliente)],
+                    'total': round(total, 2), 'fecha': datetime.combine(dia, hora),
+                })
+            if len(ventas) >= self.lote:
+                self._volcar_ventas(conexion, ventas, detalles)
+                ventas, detalles = [], []
+        self._volcar_ventas(conexion, ventas, detalles)
+
+    def _volcar_ventas(self, conexion, ventas, detalles):
+        if ventas:
+            self._insertar(conexion, Venta, ventas)
+            self._insertar(conexion, DetalleVenta, detalles)
+            self.eco(f'Ventas hasta {ventas[-1]["fecha"]:%Y-%m-%d} (id {ventas[-1]["id"]})')
+
+    def _gastos(self, conexion):
+        cantidad = max(self.dias // 2, self.ventas // 50)
+        filas = []
+        for _ in range(cantidad):
+            categoria = self.azar.choice(GASTOS)
+            filas.append({
+                'descripcion': f'{categoria} {self.azar.randint(1, 9999):04d}',
+                'monto': round(min(math.exp(self.azar.gauss(math.log(120), 0.9)), 5000), 2),
+                'categoria': categoria,
+                'fecha': self._fecha(),
+            })
+        self._insertar(conexion, Gasto, filas)
+        self.eco(f'{cantidad} gastos')
+
+    def _reconstruir_derivados(self):
+        from app.services.busqueda import reindexar_todo
+        from app.services.contadores import reconciliar_contadores
+        from app.services.facetas import reindexar_facetas
+        from app.services.resumen import reconstruir_resumen
+
+        self.eco('Reconstruyendo resumen diario, búsqueda, facetas y contadores...')
+        reconstruir_resumen()
+        reindexar_todo()
+        reindexar_facetas()
+        reconciliar_contadores()
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_generador(app):
+    @app.cli.command('generar-datos')
+    @click.option('--ventas', type=click.IntRange(1, 5_000_000), default=1000, show_default=True)
+    @click.option('--productos', type=int, default=None, help='Por defecto ventas/100 (50 a 20.000).')
+    @click.option('--clientes', type=int, default=None, help='Por defecto ventas/8 (20 a 200.000).')
+    @click.option('--categorias', type=int, default=12, show_default=True)
+    @click.option('--dias', type=click.IntRange(1), default=730, show_default=True, help='Historia de ventas.')
+    @click.option('--semilla', type=int, default=42, show_default=True)
+    @click.option('--lote', type=int, default=5000, show_default=True)
+    @click.option('--si', is_flag=True, help='No pedir confirmación fuera de SQLite.')
+    def generar_datos_cmd(ventas, productos, clientes, categorias, dias, semilla, lote, si):
+        """Llena una base vacía con datos sintéticos para pruebas de carga."""
+        from app.services.migraciones import migrar
+
+        if db.engine.dialect.name != 'sqlite' and not si:
+            click.confirm(f'Se van a insertar datos de prueba en {db.engine.url!r}. ¿Continuar?', abort=True)
+        migrar()
+        inicio = datetime.utcnow()
+        Generador(ventas, productos, clientes, categorias, dias, semilla, lote, eco=click.echo).generar()
+        click.echo(f'Datos generados en {(datetime.utcnow() - inicio).total_seconds():.1f} s. '
+                   f'Acceso: {ADMIN_BENCH} / {CLIENTE_BENCH}, clave "{CLAVE_BENCH}".')
@@ -0,0 +1,229 @@
+import hashlib
+import mimetypes
+import os
+from functools import lru_cache
+from urllib.parse import quote
+
+import click
+from flask import abort, current_app, request, send_from_directory, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+from werkzeug.security import safe_join
+
+# Carpeta de las imágenes originales y subcarpeta de variantes
+CARPETA_ORIGINALES = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads', 'productos')
+)
+SUBCARPETA_VARIANTES = 'variantes'
+
+# Ancho máximo (px) de cada variante
+VARIANTES = {
+    'carrito': 160,
+    'tarjeta': 480,
+    'modal': 960,
+}
+FORMATOS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def _carpeta_variantes():
+    return os.path.join(CARPETA_ORIGINALES, SUBCARPETA_VARIANTES)
+
+
+def nombre_variante(nombre, variante, extension):
+    # Se conserva la extensión original: foto.png y foto.jpg no comparten variantes
+    return f'{nombre}-{VARIANTES[variante]}.{extension}'
+
+
+# -------------------------------
+# Generación de variantes
+# -------------------------------
+def _preparar(imagen, extension):
+    """Convierte al modo que admite cada formato (JPEG no tiene transparencia)."""
+    if extension == 'jpg':
+        if imagen.mode in ('RGBA', 'LA') or 'transparency' in imagen.info:
+            imagen = imagen.convert('RGBA')
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            fondo.paste(imagen, mask=imagen.getchannel('A'))
+            return fondo
+        return imagen.convert('RGB')
+    if imagen.mode not in ('RGB', 'RGBA'):
+        return imagen.convert('RGBA' if 'transparency' in imagen.info else 'RGB')
+    return imagen
+
+
+def generar_variantes(nombre, forzar=False):
+    """Crea las variantes redimensionadas de una imagen subida.
+
+    Se re-codifican sin EXIF ni otros metadatos (la orientación se aplica
+    antes). Devuelve la cantidad de archivos escritos.
+    """
+    origen = os.path.join(CARPETA_ORIGINALES, nombre)
+    destino = _carpeta_variantes()
+    os.makedirs(destino, exist_ok=True)
+
+    pendientes = [
+        (variante, extension)
+        for variante in VARIANTES
+        for extension in FORMATOS
+        if forzar or not os.path.exists(os.path.join(destino, nombre_variante(nombre, variante, extension)))
+    ]
+    if not pendientes:
+        return 0
+
+    with Image.open(origen) as imagen:
+        imagen.seek(0)  # GIF animados: solo el primer cuadro
+        imagen = ImageOps.exif_transpose(imagen)
+        for variante, extension in pendientes:
+            copia = imagen.copy()
+            copia.thumbnail((VARIANTES[variante], VARIANTES[variante] * 2), Image.LANCZOS)
+            copia = _preparar(copia, extension)
+            copia.save(os.path.join(destino, nombre_variante(nombre, variante, extension)), **FORMATOS[extension])
+    return len(pendientes)
+
+
+def procesar_subida(nombre):
+    """Genera las variantes de una imagen recién subida; si falla, se sirve el original."""
+    try:
+        generar_variantes(nombre, forzar=True)
+    except (OSError, UnidentifiedImageError) as e:
+        current_app.logger.warning('No se pudieron generar variantes de %s: %s', nombre, e)
+
+
+def eliminar_variantes(nombre):
+    for variante in VARIANTES:
+        for extension in FORMATOS:
+            ruta = os.path.join(_carpeta_variantes(), nombre_variante(nombre, variante, extension))
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+
+# -------------------------------
+# Servido de imágenes
+# -------------------------------
+# Las URLs llevan ?v=<huella del archivo>; si la huella coincide, la
+# respuesta se cachea un año como inmutable (un archivo nuevo cambia la
+# URL). Sin huella, el navegador revalida con ETag y recibe 304.
+
+UN_ANIO = 365 * 24 * 3600
+
+
+def huella(ruta):
+    """Huella corta a partir de tamaño y fecha de modificación (sin leer el archivo)."""
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return hashlib.md5(f'{info.st_mtime_ns}-{info.st_size}'.encode()).hexdigest()[:10]
+
+
+def servir_imagen(nombre):
+    ruta = safe_join(CARPETA_ORIGINALES, nombre)
+    if ruta is None or not os.path.isfile(ruta):
+        abort(404)
+
+    version = request.args.get('v')
+    inmutable = bool(version) and version == huella(ruta)
+    max_age = UN_ANIO if inmutable else current_app.config.get('UPLOADS_MAX_AGE', 300)
+
+    prefijo = current_app.config.get('UPLOADS_ACCEL_REDIRECT')
+    if prefijo:
+        # El proxy (nginx, location internal) envía el archivo y resuelve
+        # Range/304; Flask solo autoriza y fija las cabeceras de caché.
+        respuesta = current_app.response_class()
+        respuesta.headers['X-Accel-Redirect'] = prefijo.rstrip('/') + '/' + quote(nombre)
+        respuesta.mimetype = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+        respuesta.cache_control.public = True
+        respuesta.cache_control.max_age = max_age
+    else:
+        # send_file ya responde 304/206 y usa X-Sendfile si USE_X_SENDFILE está activo
+        respuesta = send_from_directory(
+            CARPETA_ORIGINALES, nombre, conditional=True, etag=True, max_age=max_age
+        )
+    if inmutable:
+        respuesta.cache_control.immutable = True
+    return respuesta
+
+
+# -------------------------------
+# Helpers para plantillas
+# -------------------------------
+def url_imagen(nombre, externa=False):
+    """URL de una imagen subida con su huella de versión."""
+    version = huella(os.path.join(CARPETA_ORIGINALES, nombre))
+    return url_for('usuario_cp.serve_uploaded_file', filename=nombre, v=version, _external=externa)
+
+
+def imagen_responsive(nombre):
+    """Datos para <picture>: src por defecto y srcset por formato.
+
+    Si la imagen aún no tiene variantes (p. ej. antes del backfill),
+    devuelve solo el original.
+    """
+    marca = os.path.join(_carpeta_variantes(), nombre_variante(nombre, 'tarjeta', 'jpg'))
+    version = huella(marca)
+    if version is None:
+        return {'src': url_imagen(nombre), 'srcset': {}}
+
+    # Todas las variantes se regeneran juntas: comparten la huella de la marca
+    def url(variante, extension):
+        archivo = SUBCARPETA_VARIANTES + '/' + nombre_variante(nombre, variante, extension)
+        return url_for('usuario_cp.serve_uploaded_file', filename=archivo, v=version)
+
+    anchos = _anchos_reales(nombre, version)
+    srcset = {
+        extension: ', '.join(f'{url(variante, extension)} {ancho}w' for variante, ancho in anchos)
+        for extension in FORMATOS
+    }
+    return {'src': url('tarjeta', 'jpg'), 'srcset': srcset}
+
+
+@lru_cache(maxsize=1024)
+def _anchos_reales(nombre, version):
+    """[(variante, ancho en px)] de las variantes ya generadas.
+
+    thumbnail nunca agranda: en una imagen chica varias variantes salen del
+    mismo ancho y solo se deja la primera (srcset no admite anchos
+    repetidos). Solo se leen las cabeceras; `version` invalida la caché al
+    regenerar.
+    """
+    anchos, vistos = [], set()
+    for variante in VARIANTES:
+        ruta = os.path.join(_carpeta_variantes(), nombre_variante(nombre, variante, 'jpg'))
+        try:
+            with Image.open(ruta) as imagen:
+                ancho = imagen.width
+        except (OSError, UnidentifiedImageError):
+            continue
+        if ancho not in vistos:
+            vistos.add(ancho)
+            anchos.append((variante, ancho))
+    return anchos
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_imagenes(app):
+    app.jinja_env.globals['imagen_responsive'] = imagen_responsive
+    app.jinja_env.globals['url_imagen'] = url_imagen
+
+    @app.cli.command('generar-variantes')
+    @click.option('--forzar', is_flag=True, help='Regenera aunque las variantes ya existan.')
+    def generar_variantes_cmd(forzar):
+        """Genera las variantes de todas las imágenes de productos existentes."""
+        if not os.path.isdir(CARPETA_ORIGINALES):
+            click.echo('No hay imágenes de productos.')
+            return
+        procesadas = errores = 0
+        for nombre in sorted(os.listdir(CARPETA_ORIGINALES)):
+            if not os.path.isfile(os.path.join(CARPETA_ORIGINALES, nombre)):
+                continue
+            try:
+                if generar_variantes(nombre, forzar=forzar):
+                    procesadas += 1
+            except (OSError, UnidentifiedImageError) as e:
+                errores += 1
+                click.echo(f'{nombre}: {e}', err=True)
+        click.echo(f'Variantes generadas para {procesadas} imágenes ({errores} con error).')
@@ -0,0 +1,373 @@
+import csv
+import io
+import math
+from datetime import datetime
+
+import click
+from flask import current_app
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.models import Categoria, Producto
+from app.services.busqueda import indexar_productos
+from app.services.cache import invalidar_paginas_publicas, subir_version_catalogo
+from app.services.contadores import sumar_cambios_productos
+from app.services.exportacion import LOTE, quitar_escape_formula
+from app.services.facetas import marcar_facetas
+from app.services.variantes import sincronizar_variantes_lote
+
+# Formato del CSV de productos (la exportación escribe estas columnas en este orden)
+COLUMNAS = ('id', 'sku', 'nombre', 'descripcion', 'precio', 'stock', 'categoria', 'destacado', 'colores', 'tallas')
+CLAVES = ('id', 'sku')
+OBLIGATORIAS_NUEVO = ('nombre', 'precio')
+# Columnas que se escriben en productos (categoria se guarda como categoria_id)
+CAMPOS = ('sku', 'nombre', 'descripcion', 'precio', 'stock', 'categoria_id', 'destacado', 'colores', 'tallas')
+LARGOS = {'sku': 64, 'nombre': 100, 'categoria': 100, 'colores': 500, 'tallas': 500}
+VERDADEROS = {'1', 'si', 'sí', 'true', 'x', 'yes'}
+FALSOS = {'', '0', 'no', 'false'}
+MAX_ERRORES = 200  # errores detallados que se guardan; el resto solo se cuentan
+
+
+class ErrorImportacion(Exception):
+    """El archivo no se puede procesar (encabezado inválido, codificación)."""
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.filas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.categorias_creadas = 0
+        self.total_errores = 0
+        self.errores = []  # [(línea, mensaje)]
+        self.error_archivo = None
+
+    def error(self, linea, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((linea, mensaje))
+
+
+# -------------------------------
+# Exportación (mismo formato que la importación)
+# -------------------------------
+def filas_productos():
+    query = (
+        db.session.query(
+            Producto.id, Producto.sku, Producto.nombre, Producto.descripcion, Producto.precio,
+            Producto.stock, Categoria.nombre, Producto.destacado, Producto.colores, Producto.tallas,
+        )
+        .outerjoin(Categoria, Categoria.id == Producto.categoria_id)
+        .order_by(Producto.id)
+    )
+    for fila in query.yield_per(LOTE):
+        *inicio, destacado, colores, tallas = fila
+        yield [*inicio, 1 if destacado else 0, colores, tallas]
+
+
+# -------------------------------
+# Lectura y validación
+# -------------------------------
+def leer_csv(archivo):
+    """(columnas, filas) del archivo subido; las filas se leen por trozos al iterar.
+
+    Cada fila es (línea, {columna: texto}), o (línea, None) si no tiene
+    tantos valores como columnas. Acepta coma o punto y coma como separador
+    (Excel en español guarda con ';'), el BOM y el apóstrofo contra
+    fórmulas que escribe la exportación.
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    encabezado = texto.readline()
+    separador = ';' if encabezado.count(';') > encabezado.count(',') else ','
+    columnas = [c.strip().lower() for c in next(csv.reader([encabezado], delimiter=separador), [])]
+    desconocidas = [c for c in columnas if c not in COLUMNAS]
+    if desconocidas:
+        raise ErrorImportacion(f"Columnas desconocidas: {', '.join(desconocidas)}.")
+    if len(set(columnas)) != len(columnas):
+        raise ErrorImportacion('Hay columnas repetidas en el encabezado.')
+    if not set(CLAVES) & set(columnas) and not set(OBLIGATORIAS_NUEVO) <= set(columnas):
+        raise ErrorImportacion('El encabezado necesita id o sku, o bien nombre y precio.')
+
+    def filas():
+        lector = csv.reader(texto, delimiter=separador)
+        for valores in lector:
+            if not any(v.strip() for v in valores):
+                continue
+            if len(valores) != len(columnas):
+                yield lector.line_num + 1, None
+            else:
+                yield lector.line_num + 1, dict(zip(columnas, (quitar_escape_formula(v.strip()) for v in valores)))
+
+    return columnas, filas()
+
+
+def _numero(texto, campo, entero=False):
+    try:
+        valor = int(texto) if entero else float(texto.replace(',', '.') if '.' not in texto else texto)
+    except ValueError:
+        raise ValueError(f'{campo} no es un número: "{texto}"')
+    if not entero and not math.isfinite(valor):
+        raise ValueError(f'{campo} no es un número: "{texto}"')
+    if valor < 0:
+        raise ValueError(f'{campo} no puede ser negativo: "{texto}"')
+    return valor
+
+
+def validar_fila(fila):
+    """Convierte los textos de una fila; lanza ValueError con el motivo si no es válida."""
+    datos = {}
+    if fila.get('id'):
+        datos['id'] = _numero(fila['id'], 'id', entero=True)
+    if 'sku' in fila:
+        datos['sku'] = fila['sku'] or None
+    if 'nombre' in fila:
+        if not fila['nombre']:
+            raise ValueError('falta el nombre')
+        datos['nombre'] = fila['nombre']
+    if 'descripcion' in fila:
+        datos['descripcion'] = fila['descripcion'] or None
+    if 'precio' in fila:
+        if not fila['precio']:
+            raise ValueError('falta el precio')
+        datos['precio'] = _numero(fila['precio'], 'precio')
+    if 'stock' in fila:
+        datos['stock'] = _numero(fila['stock'], 'stock', entero=True) if fila['stock'] else 0
+    if 'categoria' in fila:
+        datos['categoria'] = fila['categoria'] or None
+    if 'destacado' in fila:
+        valor = fila['destacado'].lower()
+        if valor not in VERDADEROS | FALSOS:
+            raise ValueError(f'destacado debe ser 1 o 0: "{fila["destacado"]}"')
+        datos['destacado'] = valor in VERDADEROS
+    for campo in ('colores', 'tallas'):
+        if campo in fila:
+            datos[campo] = fila[campo]
+    for campo, largo in LARGOS.items():
+        if datos.get(campo) and len(datos[campo]) > largo:
+            raise ValueError(f'{campo} supera {largo} caracteres')
+    return datos
+
+
+# -------------------------------
+# Escritura por lotes
+# -------------------------------
+class _Categorias:
+    """Ids de categoría por nombre (sin distinguir mayúsculas), cargados con una consulta."""
+
+    def __init__(self, crear):
+        self.crear = crear
+        self.cargar()
+
+    def cargar(self):
+        self.ids = {
+            nombre.strip().casefold(): id_
+            for id_, nombre in db.session.execute(select(Categoria.id, Categoria.nombre))
+        }
+
+    def resolver(self, filas):
+        """Crea de una vez las categorías nuevas del lote (si se permite). Devuelve cuántas."""
+        nuevas = {}
+        for _, datos in filas:
+            nombre = datos.get('categoria')
+            if nombre and nombre.casefold() not in self.ids:
+                nuevas.setdefault(nombre.casefold(), nombre)
+        if nuevas and self.crear:
+            db.session.execute(insert(Categoria), [{'nombre': nombre} for nombre in nuevas.values()])
+            for id_, nombre in db.session.execute(
+                select(Categoria.id, Categoria.nombre).where(Categoria.nombre.in_(list(nuevas.values())))
+            ):
+                self.ids[nombre.casefold()] = id_
+            return len(nuevas)
+        return 0
+
+    def id_de(self, nombre):
+        if nombre is None:
+            return None
+        if nombre.casefold() not in self.ids:
+            raise ValueError(f'la categoría "{nombre}" no existe')
+        return self.ids[nombre.casefold()]
+
+
+def _existentes(filas):
+    """({sku: id}, {ids}) de los productos del lote que ya están en la base."""
+    skus = [datos['sku'] for _, datos in filas if datos.get('sku')]
+    ids = [datos['id'] for _, datos in filas if datos.get('id')]
+    por_sku = {
+        sku.casefold(): id_
+        for sku, id_ in db.session.execute(select(Producto.sku, Producto.id).where(Producto.sku.in_(skus)))
+    } if skus else {}
+    con_id = set(db.session.execute(
+        select(Producto.id).where(Producto.id.in_(ids))).scalars()) if ids else set()
+    return por_sku, con_id
+
+
+def _aportes(ids):
+    """{id: (destacado, stock)}: lo que cada producto suma a los contadores."""
+    if not ids:
+        return {}
+    return {
+        id_: (destacado, stock)
+        for id_, destacado, stock in db.session.execute(
+            select(Producto.id, Producto.destacado, Producto.stock).where(Producto.id.in_(ids)))
+    }
+
+
+def _valores(datos, categorias, campos):
+    valores = {campo: datos[campo] for campo in campos if campo in datos}
+    if 'categoria_id' in campos:
+        valores['categoria_id'] = categorias.id_de(datos.get('categoria'))
+    return valores
+
+
+def _aplicar_lote(filas, campos, categorias, resultado):
+    """Un lote en una transacción: UPDATE e INSERT executemany y los índices derivados."""
+    nuevas_categorias = categorias.resolver(filas)
+    por_sku, con_id = _existentes(filas)
+    actualizar, crear = [], []
+    for linea, datos in filas:
+        try:
+            id_sku = por_sku.get((datos.get('sku') or '').casefold())
+            if datos.get('id'):
+                if datos['id'] not in con_id:
+                    raise ValueError(f"no existe el producto con id {datos['id']}")
+                if id_sku and id_sku != datos['id']:
+                    raise ValueError(f"el sku {datos['sku']} ya es del producto {id_sku}")
+                destino = datos['id']
+            else:
+                destino = id_sku
+            if destino:
+                valores = _valores(datos, categorias, campos)
+                valores['producto_id'] = destino
+                actualizar.append((linea, valores))
+            else:
+                faltan = [campo for campo in OBLIGATORIAS_NUEVO if campo not in datos]
+                if faltan:
+                    raise ValueError(f"producto nuevo sin {' ni '.join(faltan)}")
+                valores = dict.fromkeys(CAMPOS)
+                valores.update(stock=0, destacado=False, colores='', tallas='')
+                valores.update(_valores(datos, categorias, CAMPOS))
+                crear.append((linea, valores))
+        except ValueError as error:
+            resultado.error(linea, str(error))
+
+    tabla = Producto.__table__
+    afectados = [valores['producto_id'] for _, valores in actualizar]
+    antes = _aportes(afectados)
+    if actualizar and campos:
+        db.session.execute(
+            update(tabla).where(tabla.c.id == bindparam('producto_id'))
+            .values({campo: bindparam(campo) for campo in campos}),
+            [valores for _, valores in actualizar],
+        )
+    if crear:
+        # Sin RETURNING en MySQL: los ids nuevos son los mayores al máximo previo.
+        # Si otra sesión inserta a la vez, sus productos solo se reindexan de más.
+        maximo = db.session.execute(select(func.max(Producto.id))).scalar() or 0
+        db.session.execute(insert(tabla), [valores for _, valores in crear])
+        afectados += db.session.execute(select(Producto.id).where(Producto.id > maximo)).scalars().all()
+
+    conexion = db.session.connection()
+    sincronizar_variantes_lote(conexion, afectados)
+    indexar_productos(conexion, afectados)
+    marcar_facetas(db.session, afectados)
+    if afectados or nuevas_categorias:
+        # Core no pasa por los eventos ORM: contadores y versión de la caché
+        # se ajustan a mano, en la misma transacción que el lote
+        sumar_cambios_productos(
+            conexion, [(antes.get(id_), aporte) for id_, aporte in _aportes(afectados).items()],
+            categorias_nuevas=nuevas_categorias,
+        )
+        subir_version_catalogo(conexion)
+    db.session.commit()
+    resultado.actualizados += len(actualizar)
+    resultado.creados += len(crear)
+    resultado.categorias_creadas += nuevas_categorias
+
+
+def importar_productos(archivo, crear_categorias=False, lote=None):
+    """Importa un CSV de productos por lotes; cada lote se confirma por separado.
+
+    Las filas con `id` o con un `sku` ya registrado actualizan ese producto
+    (solo las columnas presentes en el archivo); el resto crea productos
+    nuevos. Las filas inválidas se informan con su número de línea y no
+    detienen la importación.
+    """
+    lote = lote or current_app.config.get('IMPORT_BATCH_SIZE', 500)
+    resultado = ResultadoImportacion()
+    categorias = _Categorias(crear_categorias)
+    vistos = set()
+    pendientes = []
+
+    def aplicar(campos):
+        try:
+            _aplicar_lote(pendientes, campos, categorias, resultado)
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            for linea, _ in pendientes:
+                resultado.error(linea, f'lote no aplicado: {error.__class__.__name__}')
+            current_app.logger.exception('Error al importar productos (líneas %s-%s)',
+                                         pendientes[0][0], pendientes[-1][0])
+            categorias.cargar()  # las creadas en el lote se deshicieron
+        pendientes.clear()
+
+    try:
+        columnas, filas = leer_csv(archivo)
+        # Columnas que se actualizan en los productos existentes
+        campos = tuple(
+            'categoria_id' if campo == 'categoria' else campo
+            for campo in COLUMNAS if campo in columnas and campo != 'id'
+        )
+        for linea, fila in filas:
+            resultado.filas += 1
+            if fila is None:
+                resultado.error(linea, f'se esperaban {len(columnas)} valores')
+                continue
+            try:
+                datos = validar_fila(fila)
+            except ValueError as error:
+                resultado.error(linea, str(error))
+                continue
+            claves = {(campo, str(datos[campo]).casefold()) for campo in CLAVES if datos.get(campo)}
+            if claves & vistos:
+                resultado.error(linea, 'producto repetido en el archivo')
+                continue
+            vistos |= claves
+            pendientes.append((linea, datos))
+            if len(pendientes) >= lote:
+                aplicar(campos)
+        if pendientes:
+            aplicar(campos)
+    except ErrorImportacion as error:
+        resultado.error_archivo = str(error)
+    except (UnicodeDecodeError, csv.Error) as error:
+        db.session.rollback()
+        resultado.error_archivo = f'No se pudo leer el archivo (UTF-8 con coma o punto y coma): {error}'
+
+    resultado.errores.sort()
+    if resultado.creados or resultado.actualizados or resultado.categorias_creadas:
+        invalidar_paginas_publicas()
+    return resultado
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_importacion(app):
+    @app.cli.command('importar-productos')
+    @click.argument('archivo', type=click.File('rb'))
+    @click.option('--crear-categorias', is_flag=True, help='Crea las categorías que no existan.')
+    @click.option('--lote', type=click.IntRange(1), default=None, help='Filas por transacción (IMPORT_BATCH_SIZE).')
+    def importar_productos_cmd(archivo, crear_categorias, lote):
+        """Crea o actualiza productos desde un CSV (mismo formato que la exportación)."""
+        inicio = datetime.now()
+        resultado = importar_productos(archivo, crear_categorias, lote)
+        if resultado.error_archivo:
+            raise click.ClickException(resultado.error_archivo)
+        for linea, mensaje in resultado.errores:
+            click.echo(f'Línea {linea}: {mensaje}', err=True)
+        if resultado.total_errores > len(resultado.errores):
+            click.echo(f'... y {resultado.total_errores - len(resultado.errores)} errores más.', err=True)
+        segundos = (datetime.now() - inicio).total_seconds()
+        click.echo(f'{resultado.filas} filas en {segundos:.1f} s: {resultado.creados} creados, '
+                   f'{resultado.actualizados} actualizados, {resultado.total_errores} con errores.')
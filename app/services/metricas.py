@@ -0,0 +1,297 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from flask import before_render_template, current_app, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Límites de los histogramas
+SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SEGUNDOS_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES = (1024, 5 * 1024, 20 * 1024, 100 * 1024, 500 * 1024, 1024 * 1024, 5 * 1024 * 1024)
+
+PREFIJO = 'tienda_'
+
+
+# -------------------------------
+# Registro de métricas (por proceso, formato de texto de Prometheus)
+# -------------------------------
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = list(zip(nombres, valores)) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = tuple(limites)
+        self._series = {}   # valores de etiquetas -> [conteos por cubeta..., suma, cuenta]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        cubeta = bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [0] * (len(self.limites) + 1) + [0.0, 0]
+            serie[cubeta] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._series.clear()
+
+    def exportar(self):
+        with self._lock:
+            series = {clave: list(serie) for clave, serie in self._series.items()}
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for etiquetas, serie in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.limites + (float('inf'),), serie):
+                acumulado += conteo
+                le = ('le', _numero(limite))
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(self.etiquetas, etiquetas, le)} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {_numero(serie[-2])}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {serie[-1]}')
+        return lineas
+
+
+def _familia(nombre, tipo, ayuda, muestras):
+    """Líneas de una métrica simple; `muestras` es [(dict de etiquetas, valor)]."""
+    nombre = PREFIJO + nombre
+    lineas = [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+    for etiquetas, valor in muestras:
+        if valor is not None:
+            lineas.append(f'{nombre}{_etiquetas(list(etiquetas), list(etiquetas.values()))} {_numero(valor)}')
+    return lineas
+
+
+duracion_peticion = Histograma(
+    'http_request_duration_seconds', 'Duración de cada petición por endpoint.',
+    ('endpoint', 'method', 'status'), SEGUNDOS)
+tamano_respuesta = Histograma(
+    'http_response_size_bytes', 'Bytes enviados en el cuerpo (tras la compresión; sin streaming).',
+    ('endpoint',), BYTES)
+consultas_peticion = Histograma(
+    'db_queries_per_request', 'Sentencias SQL ejecutadas por petición.', ('endpoint',), CONSULTAS)
+tiempo_sql_peticion = Histograma(
+    'db_time_per_request_seconds', 'Tiempo total en SQL por petición.', ('endpoint',), SEGUNDOS)
+duracion_sql = Histograma(
+    'db_query_duration_seconds', 'Duración de cada sentencia SQL.', ('bind',), SEGUNDOS_SQL)
+espera_pool = Histograma(
+    'db_pool_checkout_wait_seconds', 'Espera para obtener una conexión del pool.', ('bind',), SEGUNDOS_SQL)
+duracion_plantilla = Histograma(
+    'template_render_seconds', 'Tiempo de renderizado de cada plantilla Jinja.', ('template',), SEGUNDOS)
+
+HISTOGRAMAS = (
+    duracion_peticion, tamano_respuesta, consultas_peticion, tiempo_sql_peticion,
+    duracion_sql, espera_pool, duracion_plantilla,
+)
+
+
+# -------------------------------
+# Peticiones (before/after_request)
+# -------------------------------
+# Se registran antes que la compresión: su after_request corre al final y
+# ve el tamaño real enviado y la duración completa.
+
+def _inicio_peticion():
+    g.metricas = {'inicio': time.perf_counter(), 'consultas': 0, 'tiempo_sql': 0.0}
+
+
+def _fin_peticion(respuesta):
+    datos = g.pop('metricas', None)
+    if datos is None:
+        return respuesta
+    endpoint = request.endpoint or 'sin_ruta'
+    duracion_peticion.observar(
+        time.perf_counter() - datos['inicio'], endpoint, request.method, str(respuesta.status_code))
+    consultas_peticion.observar(datos['consultas'], endpoint)
+    tiempo_sql_peticion.observar(datos['tiempo_sql'], endpoint)
+    if not respuesta.is_streamed and respuesta.content_length is not None:
+        tamano_respuesta.observar(respuesta.content_length, endpoint)
+    return respuesta
+
+
+# -------------------------------
+# SQL (eventos del Engine) y pool de conexiones
+# -------------------------------
+_nombres_bind = {}
+
+
+def _bind(motor):
+    return _nombres_bind.get(id(motor), 'otro')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metricas_inicio', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_sql(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('metricas_inicio')
+    if not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    duracion_sql.observar(duracion, _bind(conn.engine))
+    if has_app_context():
+        datos = g.get('metricas')
+        if datos is not None:
+            datos['consultas'] += 1
+            datos['tiempo_sql'] += duracion
+
+
+@event.listens_for(Engine, 'handle_error')
+def _error_sql(contexto):
+    conexion = contexto.connection
+    if conexion is not None and conexion.info.get('metricas_inicio'):
+        conexion.info['metricas_inicio'].pop()
+
+
+def _medir_pool(nombre, motor):
+    """Mide la espera de pool.connect() (incluye abrir una conexión nueva).
+
+    SQLAlchemy no emite un evento al empezar a esperar, así que se envuelve
+    el método del pool del motor una sola vez. dispose() reemplaza el pool
+    (p. ej. en cada worker de gunicorn tras el fork): se vuelve a envolver.
+    """
+    _nombres_bind[id(motor)] = nombre
+    if not event.contains(motor, 'engine_disposed', _pool_recreado):
+        event.listen(motor, 'engine_disposed', _pool_recreado)
+    pool = motor.pool
+    if getattr(pool, '_metricas_medido', False):
+        return
+    conectar = pool.connect
+
+    def connect():
+        inicio = time.perf_counter()
+        try:
+            return conectar()
+        finally:
+            espera_pool.observar(time.perf_counter() - inicio, nombre)
+
+    pool.connect = connect
+    pool._metricas_medido = True
+
+
+def _pool_recreado(motor):
+    _medir_pool(_bind(motor), motor)
+
+
+def _estado_pools(motores):
+    muestras = {'db_pool_size': [], 'db_pool_checked_out': [], 'db_pool_overflow': []}
+    for nombre, motor in motores:
+        pool = motor.pool
+        etiquetas = {'bind': nombre}
+        for metrica, atributo in (('db_pool_size', 'size'), ('db_pool_checked_out', 'checkedout'),
+                                  ('db_pool_overflow', 'overflow')):
+            funcion = getattr(pool, atributo, None)
+            if funcion is not None:
+                muestras[metrica].append((etiquetas, funcion()))
+    return (
+        _familia('db_pool_size', 'gauge', 'Tamaño configurado del pool.', muestras['db_pool_size'])
+        + _familia('db_pool_checked_out', 'gauge', 'Conexiones prestadas ahora.', muestras['db_pool_checked_out'])
+        + _familia('db_pool_overflow', 'gauge', 'Conexiones por encima del tamaño del pool.', muestras['db_pool_overflow'])
+    )
+
+
+# -------------------------------
+# Plantillas Jinja (señales de Flask)
+# -------------------------------
+def _antes_plantilla(app, template, context, **extra):
+    if has_app_context():
+        g.setdefault('metricas_plantillas', []).append(time.perf_counter())
+
+
+def _plantilla_renderizada(app, template, context, **extra):
+    inicios = g.get('metricas_plantillas') if has_app_context() else None
+    if inicios:
+        duracion_plantilla.observar(time.perf_counter() - inicios.pop(), template.name or 'sin_nombre')
+
+
+# -------------------------------
+# Exportación
+# -------------------------------
+def _otras_metricas():
+    """Métricas que ya llevaban otros servicios (compresión, réplica, reportes)."""
+    from app.services.compresion import metricas_compresion
+    from app.services.replicas import estado_replica
+    from app.services.reportes import cola_reportes
+
+    compresion = metricas_compresion.resumen()
+    replica = estado_replica.resumen()
+    lineas = []
+    lineas += _familia('compress_responses_total', 'counter', 'Respuestas comprimidas.', [
+        ({'tipo': 'completa'}, compresion['respuestas_comprimidas'] - compresion['respuestas_streaming']),
+        ({'tipo': 'streaming'}, compresion['respuestas_streaming']),
+        ({'tipo': 'omitida'}, compresion['respuestas_omitidas']),
+    ])
+    lineas += _familia('compress_bytes_total', 'counter', 'Bytes antes y después de comprimir.', [
+        ({'etapa': 'original'}, compresion['bytes_originales']),
+        ({'etapa': 'comprimido'}, compresion['bytes_comprimidos']),
+    ])
+    if current_app.config.get('SQLALCHEMY_BINDS', {}).get('replica'):
+        lineas += _familia('replica_up', 'gauge', '1 si la réplica está disponible para lecturas.',
+                           [({}, int(bool(replica['ok'])))])
+        lineas += _familia('replica_lag_seconds', 'gauge', 'Último retraso medido de la réplica.',
+                           [({}, replica['retraso'])])
+        lineas += _familia('replica_reads_total', 'counter', 'Lecturas enviadas a la réplica.',
+                           [({}, replica['lecturas'])])
+    lineas += _familia('report_jobs', 'gauge', 'Trabajos de reportes PDF por estado.', [
+        ({'estado': estado}, cantidad) for estado, cantidad in sorted(cola_reportes.resumen().items())
+    ])
+    return lineas
+
+
+def exportar_metricas():
+    from app import db
+
+    lineas = []
+    for histograma in HISTOGRAMAS:
+        lineas += histograma.exportar()
+    motores = [('primario' if clave is None else clave, motor) for clave, motor in db.engines.items()]
+    lineas += _estado_pools(motores)
+    lineas += _otras_metricas()
+    return '\n'.join(lineas) + '\n'
+
+
+def token_valido():
+    """True si la petición trae `Authorization: Bearer <METRICS_TOKEN>`."""
+    token = current_app.config.get('METRICS_TOKEN')
+    cabecera = request.headers.get('Authorization', '')
+    if not token or not cabecera.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(cabecera[len('Bearer '):].encode(), token.encode())
+
+
+def configurar_metricas(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    from app import db
+
+    app.before_request(_inicio_peticion)
+    app.after_request(_fin_peticion)
+    before_render_template.connect(_antes_plantilla, app)
+    template_rendered.connect(_plantilla_renderizada, app)
+    with app.app_context():
+        for clave, motor in db.engines.items():
+            _medir_pool('primario' if clave is None else clave, motor)
@@ -0,0 +1,93 @@
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+
+import click
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, inspect, select
+
+from app import db
+
+PAQUETE = 'app.migraciones'
+_nombre_modulo = re.compile(r'^m(\d{4})_(\w+)$')
+
+# Registro de versiones aplicadas (fuera de los modelos: no es parte del dominio)
+versiones = Table(
+    'schema_versiones', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('nombre', String(100), nullable=False),
+    Column('aplicada', DateTime, nullable=False),
+)
+
+
+# -------------------------------
+# Descubrimiento y ejecución
+# -------------------------------
+# Cada archivo app/migraciones/mNNNN_nombre.py define aplicar(conexion).
+# Se ejecutan en orden, una transacción por migración, y se anotan en
+# schema_versiones. MySQL confirma el DDL implícitamente, así que cada
+# migración debe ser idempotente (comprobar antes de crear).
+
+def listar_migraciones():
+    paquete = importlib.import_module(PAQUETE)
+    migraciones = []
+    for info in pkgutil.iter_modules(paquete.__path__):
+        coincidencia = _nombre_modulo.match(info.name)
+        if coincidencia:
+            modulo = importlib.import_module(f'{PAQUETE}.{info.name}')
+            migraciones.append((int(coincidencia.group(1)), coincidencia.group(2), modulo))
+    return sorted(migraciones, key=lambda m: m[0])
+
+
+def versiones_aplicadas(conexion):
+    versiones.create(conexion, checkfirst=True)
+    return set(conexion.execute(select(versiones.c.version)).scalars())
+
+
+def migrar(hasta=None, eco=None):
+    """Aplica las migraciones pendientes (hasta la versión `hasta`, incluida)."""
+    with db.engine.begin() as conexion:
+        aplicadas = versiones_aplicadas(conexion)
+    nuevas = []
+    for version, nombre, modulo in listar_migraciones():
+        if version in aplicadas or (hasta is not None and version > hasta):
+            continue
+        if eco:
+            eco(f'Aplicando {version:04d} {nombre}...')
+        with db.engine.begin() as conexion:
+            modulo.aplicar(conexion)
+            conexion.execute(versiones.insert().values(version=version, nombre=nombre, aplicada=datetime.utcnow()))
+        nuevas.append(version)
+    return nuevas
+
+
+# -------------------------------
+# Utilidades para las migraciones
+# -------------------------------
+def crear_indice(conexion, tabla, nombre, columnas, unico=False):
+    """Crea un índice si todavía no existe. Devuelve True si lo creó."""
+    if nombre in {indice['name'] for indice in inspect(conexion).get_indexes(tabla)}:
+        return False
+    reflejada = Table(tabla, MetaData(), autoload_with=conexion)
+    Index(nombre, *[reflejada.c[columna] for columna in columnas], unique=unico).create(conexion)
+    return True
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_migraciones(app):
+    @app.cli.command('migrar')
+    @click.option('--hasta', type=int, default=None, help='Última versión a aplicar.')
+    @click.option('--estado', is_flag=True, help='Solo muestra qué migraciones faltan.')
+    def migrar_cmd(hasta, estado):
+        """Aplica las migraciones versionadas de app/migraciones/."""
+        if estado:
+            with db.engine.begin() as conexion:
+                aplicadas = versiones_aplicadas(conexion)
+            for version, nombre, _ in listar_migraciones():
+                marca = 'aplicada ' if version in aplicadas else 'pendiente'
+                click.echo(f'{version:04d} {marca} {nombre}')
+            return
+        nuevas = migrar(hasta, eco=click.echo)
+        click.echo(f'Migraciones aplicadas: {len(nuevas)}.' if nuevas else 'La base de datos está al día.')
@@ -0,0 +1,145 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_
+
+
+# -------------------------------
+# Paginación por cursor (keyset)
+# -------------------------------
+# En lugar de OFFSET, cada página filtra "después de la última fila vista"
+# según las columnas de orden, de modo que el costo no crece con la página.
+
+class Pagina:
+    """Resultado de una consulta paginada."""
+
+    def __init__(self, items, siguiente=None, anterior=None, limite=None):
+        self.items = items
+        self.siguiente = siguiente
+        self.anterior = anterior
+        self.limite = limite
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    return valor
+
+
+def _deserializar(valor):
+    if isinstance(valor, dict):
+        if 'dt' in valor:
+            return datetime.fromisoformat(valor['dt'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+    return valor
+
+
+def codificar_cursor(valores, hacia_atras=False):
+    datos = {'v': [_serializar(v) for v in valores], 'a': int(hacia_atras)}
+    crudo = json.dumps(datos, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (valores, hacia_atras) o None si el cursor no es válido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return [_deserializar(v) for v in datos['v']], bool(datos.get('a'))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _valor(item, clave):
+    return clave(item) if callable(clave) else getattr(item, clave)
+
+
+def _despues_de(orden, valores, hacia_atras):
+    """Predicado (c1, c2, ...) > (v1, v2, ...) respetando la dirección de cada columna."""
+    condiciones = []
+    for i, (expr, direccion, _) in enumerate(orden):
+        descendente = (direccion == 'desc') != hacia_atras
+        paso = expr < valores[i] if descendente else expr > valores[i]
+        iguales = [orden[j][0] == valores[j] for j in range(i)]
+        condiciones.append(and_(*iguales, paso) if iguales else paso)
+    return or_(*condiciones)
+
+
+def tamano_pagina(parametro='limite'):
+    """Tamaño de página pedido en la URL, acotado por la configuración."""
+    por_defecto = current_app.config.get('PAGE_SIZE', 24)
+    maximo = current_app.config.get('PAGE_SIZE_MAX', 100)
+    try:
+        limite = int(request.args.get(parametro, por_defecto))
+    except ValueError:
+        limite = por_defecto
+    return max(1, min(limite, maximo))
+
+
+def paginar_keyset(query, orden, cursor=None, limite=None):
+    """Pagina `query` por cursor.
+
+    `orden` es una lista de (expresión, 'asc'|'desc', clave), donde la
+    clave es el atributo (o función) que lee ese valor de cada fila. La
+    última columna debe ser única (normalmente el id) para desempatar.
+    """
+    limite = limite or tamano_pagina()
+    datos = decodificar_cursor(cursor)
+    hacia_atras = bool(datos and datos[1])
+
+    if datos and len(datos[0]) == len(orden):
+        query = query.filter(_despues_de(orden, datos[0], hacia_atras))
+    else:
+        datos = None
+
+    criterios = []
+    for expr, direccion, _ in orden:
+        descendente = (direccion == 'desc') != hacia_atras
+        criterios.append(expr.desc() if descendente else expr.asc())
+
+    filas = query.order_by(None).order_by(*criterios).limit(limite + 1).all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    if hacia_atras:
+        filas.reverse()
+
+    def cursor_de(item, atras=False):
+        return codificar_cursor([_valor(item, clave) for _, _, clave in orden], atras)
+
+    siguiente = anterior = None
+    if filas:
+        if hay_mas or hacia_atras:
+            siguiente = cursor_de(filas[-1])
+        if (datos and not hacia_atras) or (hacia_atras and hay_mas):
+            anterior = cursor_de(filas[0], atras=True)
+    return Pagina(filas, siguiente, anterior, limite)
+
+
+def url_pagina(cursor, parametro='cursor'):
+    """URL de la vista actual conservando los filtros y cambiando el cursor."""
+    args = request.args.to_dict()
+    if cursor:
+        args[parametro] = cursor
+    else:
+        args.pop(parametro, None)
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def configurar_paginacion(app):
+    app.jinja_env.globals['url_pagina'] = url_pagina
@@ -0,0 +1,193 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+BIND_REPLICA = 'replica'
+
+# Consultas por dialecto que devuelven el retraso de la réplica en segundos
+_CONSULTAS_RETRASO = {
+    'mysql': ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'),
+}
+
+
+# -------------------------------
+# Sesión con enrutado lectura/escritura
+# -------------------------------
+# Solo se envían a la réplica los SELECT de vistas marcadas con
+# @lectura_en_replica (o dentro de `with leer_de_replica()`), y solo si:
+#   - hay una réplica configurada y su retraso está dentro del límite,
+#   - la sesión no escribió nada en la transacción actual,
+#   - el usuario no escribió hace menos de REPLICA_STICKY_SECONDS
+#     (leer lo que uno acaba de guardar después de un redirect).
+# Todo lo demás (flush del ORM, INSERT/UPDATE/DELETE, SQL textual) va al
+# primario.
+
+class SesionEnrutada(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and getattr(clause, 'is_select', False)
+            and not self.info.get('escribio')
+            and _leer_de_replica()
+        ):
+            motor = self._db.engines.get(BIND_REPLICA)
+            if motor is not None and estado_replica.disponible(motor):
+                return motor
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _leer_de_replica():
+    if not has_app_context() or not g.get('leer_replica'):
+        return False
+    if has_request_context() and session.get('_primario_hasta', 0) > time.time():
+        return False
+    return True
+
+
+@contextmanager
+def leer_de_replica():
+    """Envía a la réplica las lecturas del bloque (p. ej. en hilos de reportes)."""
+    anterior = g.get('leer_replica', False)
+    g.leer_replica = True
+    try:
+        yield
+    finally:
+        g.leer_replica = anterior
+
+
+def lectura_en_replica(vista):
+    """Decorador: las consultas de solo lectura de la vista pueden ir a la réplica.
+
+    Se marca `g`, no solo la ejecución de la vista, para que las respuestas
+    en streaming también lean de la réplica.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        g.leer_replica = True
+        return vista(*args, **kwargs)
+    return envoltura
+
+
+# -------------------------------
+# Control de retraso (lag) de la réplica
+# -------------------------------
+class EstadoReplica:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._medido = None
+        self.retraso = None
+        self.ok = True
+        self.error = None
+        self.lecturas = 0
+
+    def reiniciar(self):
+        with self._lock:
+            self._medido = None
+            self.retraso = None
+            self.ok = True
+            self.error = None
+            self.lecturas = 0
+
+    def disponible(self, motor):
+        """True si la réplica está al día; se mide como mucho cada REPLICA_LAG_CHECK_SECONDS."""
+        config = current_app.config
+        ahora = time.monotonic()
+        with self._lock:
+            vencido = self._medido is None or ahora - self._medido > config.get('REPLICA_LAG_CHECK_SECONDS', 10)
+            if vencido:
+                # Se marca antes de medir para que un solo hilo haga la consulta
+                self._medido = ahora
+        if vencido:
+            retraso, error = _medir_retraso(motor)
+            with self._lock:
+                self.retraso, self.error = retraso, error
+                self.ok = error is None and retraso is not None and retraso <= config.get('REPLICA_MAX_LAG_SECONDS', 5)
+                if not self.ok:
+                    current_app.logger.warning(
+                        'Réplica no disponible (retraso=%s, error=%s); se lee del primario', retraso, error
+                    )
+        with self._lock:
+            if self.ok:
+                self.lecturas += 1
+            return self.ok
+
+    def resumen(self):
+        with self._lock:
+            return {'ok': self.ok, 'retraso': self.retraso, 'error': self.error, 'lecturas': self.lecturas}
+
+
+estado_replica = EstadoReplica()
+
+
+def _medir_retraso(motor):
+    """Devuelve (segundos de retraso, error). Sin consulta conocida para el dialecto, 0."""
+    consulta = current_app.config.get('REPLICA_LAG_QUERY')
+    consultas = (consulta,) if consulta else _CONSULTAS_RETRASO.get(motor.dialect.name)
+    try:
+        with motor.connect() as conexion:
+            if not consultas:
+                conexion.execute(text('SELECT 1'))
+                return 0, None
+            for sql in consultas:
+                try:
+                    fila = conexion.execute(text(sql)).mappings().first()
+                except Exception:
+                    if sql is consultas[-1]:
+                        raise
+                    conexion.rollback()
+                    continue
+                if fila is None:
+                    return None, 'la réplica no informa estado de replicación'
+                for columna in ('Seconds_Behind_Source', 'Seconds_Behind_Master', 'retraso'):
+                    if columna in fila:
+                        valor = fila[columna]
+                        return (float(valor), None) if valor is not None else (None, 'replicación detenida')
+                return float(list(fila.values())[0]), None
+    except Exception as e:
+        return None, str(e)
+    return None, 'sin resultado'
+
+
+# -------------------------------
+# Escrituras: la transacción y el usuario quedan en el primario
+# -------------------------------
+_eventos_registrados = False
+
+
+def _registrar_eventos(db):
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    @event.listens_for(db.session, 'after_flush')
+    def _marcar_escritura_flush(sesion, flush_context):
+        sesion.info['escribio'] = True
+
+    @event.listens_for(db.session, 'do_orm_execute')
+    def _marcar_escritura_dml(estado):
+        if estado.is_insert or estado.is_update or estado.is_delete:
+            estado.session.info['escribio'] = True
+
+    @event.listens_for(db.session, 'after_commit')
+    def _fijar_primario(sesion):
+        if sesion.info.pop('escribio', False) and has_request_context():
+            segundos = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+            if segundos and BIND_REPLICA in current_app.config.get('SQLALCHEMY_BINDS', {}):
+                session['_primario_hasta'] = time.time() + segundos
+
+    @event.listens_for(db.session, 'after_rollback')
+    def _olvidar_escritura(sesion):
+        sesion.info.pop('escribio', None)
+
+
+def configurar_replicas(app):
+    from app import db
+    _registrar_eventos(db)
+    estado_replica.reiniciar()
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+
+from app import db
+from app.models.models import DetalleVenta, Gasto, Venta
+
+
+# -------------------------------
+# Trabajos de reportes en segundo plano
+# -------------------------------
+# Cada reporte se genera en un pool de hilos local, pero el estado y el PDF
+# quedan en un directorio compartido por los workers de gunicorn
+# (instance/reportes por defecto). El id del trabajo sale de la clave
+# normalizada de filtros: cualquier worker responde el estado y la descarga,
+# y pedir el mismo reporte mientras siga vigente devuelve el trabajo ya
+# terminado (o el que está en curso) en lugar de generarlo de nuevo.
+
+class Trabajo:
+    def __init__(self, trabajo_id):
+        self.id = trabajo_id
+        self.estado = 'pendiente'
+        self.creado = time.time()  # reloj de pared: lo comparan varios procesos
+        self.terminado = None
+        self.nombre_archivo = None
+        self.error = None
+
+    @classmethod
+    def desde_datos(cls, datos):
+        trabajo = cls(datos['id'])
+        trabajo.__dict__.update(datos)
+        return trabajo
+
+    def resumen(self):
+        return {
+            'id': self.id,
+            'estado': self.estado,
+            'error': self.error,
+            'segundos': round((self.terminado or time.time()) - self.creado, 3),
+        }
+
+
+class ColaReportes:
+    def __init__(self, hilos=2, ttl=300, max_trabajos=64, directorio=None):
+        self.ttl = ttl
+        self.max_trabajos = max_trabajos
+        self.directorio = directorio
+        self._hilos = hilos
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def configurar(self, hilos, ttl, max_trabajos, directorio):
+        with self._lock:
+            if self._pool is not None and hilos != self._hilos:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            self._hilos, self.ttl, self.max_trabajos = hilos, ttl, max_trabajos
+            self.directorio = directorio
+            os.makedirs(directorio, exist_ok=True)
+
+    # --- Archivos compartidos: <id>.json (estado) y <id>.pdf ---
+    def ruta(self, trabajo_id, extension='pdf'):
+        return os.path.join(self.directorio, f'{trabajo_id}.{extension}')
+
+    def _generacion(self):
+        try:
+            with open(os.path.join(self.directorio, 'generacion'), encoding='utf-8') as archivo:
+                return archivo.read()
+        except FileNotFoundError:
+            return ''
+
+    def _guardar(self, ruta, contenido):
+        # Escritura atómica: otro worker nunca lee un archivo a medias
+        temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+
+    def _escribir(self, trabajo):
+        self._guardar(self.ruta(trabajo.id, 'json'), json.dumps(trabajo.__dict__).encode('utf-8'))
+
+    def _leer(self, trabajo_id):
+        try:
+            with open(self.ruta(trabajo_id, 'json'), encoding='utf-8') as archivo:
+                return Trabajo.desde_datos(json.load(archivo))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _todos(self):
+        ids = [nombre[:-5] for nombre in os.listdir(self.directorio) if nombre.endswith('.json')]
+        return [trabajo for trabajo in map(self._leer, ids) if trabajo is not None]
+
+    def _borrar(self, trabajo):
+        for extension in ('json', 'pdf'):
+            try:
+                os.remove(self.ruta(trabajo.id, extension))
+            except FileNotFoundError:
+                pass
+
+    def _vencido(self, trabajo, ahora):
+        # Uno en curso que pasa el TTL quedó huérfano (su worker se reinició)
+        return ahora - (trabajo.terminado or trabajo.creado) > self.ttl
+
+    def _purgar(self):
+        """Descarta trabajos fuera de la ventana de caché (con el lock tomado)."""
+        ahora = time.time()
+        vigentes = []
+        for trabajo in self._todos():
+            if self._vencido(trabajo, ahora):
+                self._borrar(trabajo)
+            else:
+                vigentes.append(trabajo)
+        # Límite de disco: primero se van los terminados más antiguos
+        terminados = sorted((t for t in vigentes if t.terminado is not None), key=lambda t: t.terminado)
+        for trabajo in terminados[:max(len(vigentes) - self.max_trabajos, 0)]:
+            self._borrar(trabajo)
+
+    def id_de(self, clave):
+        """Mismo id en todos los workers para la misma clave y generación."""
+        return hashlib.sha1(json.dumps([self._generacion(), *clave]).encode('utf-8')).hexdigest()
+
+    def encolar(self, app, clave, funcion, *args):
+        """Devuelve el trabajo vigente para `clave` o lanza uno nuevo.
+
+        `funcion(*args)` se ejecuta con contexto de aplicación y debe
+        devolver (nombre_archivo, bytes).
+        """
+        with self._lock:
+            self._purgar()
+            trabajo_id = self.id_de(clave)
+            trabajo = self._leer(trabajo_id)
+            if trabajo is not None and trabajo.estado != 'error':
+                return trabajo
+            # Si otro worker lo lanza a la vez, ambos generan el mismo PDF
+            trabajo = Trabajo(trabajo_id)
+            self._escribir(trabajo)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._hilos, thread_name_prefix='reportes')
+            self._pool.submit(self._ejecutar, app, trabajo, funcion, args)
+        return trabajo
+
+    def _ejecutar(self, app, trabajo, funcion, args):
+        trabajo.estado = 'en_proceso'
+        self._escribir(trabajo)
+        with app.app_context():
+            try:
+                trabajo.nombre_archivo, contenido = funcion(*args)
+                self._guardar(self.ruta(trabajo.id), contenido)
+                trabajo.estado = 'listo'
+            except Exception as e:
+                app.logger.exception('Error generando el reporte %s', trabajo.id)
+                trabajo.error = str(e) or e.__class__.__name__
+                trabajo.estado = 'error'
+            finally:
+                trabajo.terminado = time.time()
+                self._escribir(trabajo)
+
+    def obtener(self, trabajo_id):
+        with self._lock:
+            self._purgar()
+            return self._leer(trabajo_id)
+
+    def invalidar(self):
+        """Los próximos pedidos regeneran; los trabajos existentes siguen descargables.
+
+        Cambia la generación compartida: las claves apuntan a ids nuevos en
+        todos los workers, y un trabajo viejo que termine después no pisa
+        el resultado de uno nuevo.
+        """
+        with self._lock:
+            self._guardar(os.path.join(self.directorio, 'generacion'), uuid.uuid4().hex.encode('ascii'))
+
+    def resumen(self):
+        """Cantidad de trabajos guardados por estado (para las métricas)."""
+        with self._lock:
+            conteo = {}
+            for trabajo in self._todos():
+                conteo[trabajo.estado] = conteo.get(trabajo.estado, 0) + 1
+            return conteo
+
+
+cola_reportes = ColaReportes()
+
+
+def clave_reporte(tipo, inicio, fin, cliente):
+    """Clave normalizada: mismas fechas efectivas y cliente sin mayúsculas ni espacios."""
+    return (
+        tipo,
+        inicio.isoformat() if inicio else None,
+        fin.isoformat() if fin else None,
+        (cliente or '').strip().lower(),
+    )
+
+
+# -------------------------------
+# Invalidación al cambiar ventas o gastos
+# -------------------------------
+@event.listens_for(db.session, 'after_flush')
+def _anotar_cambios(session, flush_context):
+    if any(
+        isinstance(obj, (Venta, DetalleVenta, Gasto))
+        for conjunto in (session.new, session.dirty, session.deleted)
+        for obj in conjunto
+    ):
+        session.info['reportes_invalidar'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_reportes(session):
+    if session.info.pop('reportes_invalidar', False):
+        cola_reportes.invalidar()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _descartar_cambios(session, previous_transaction):
+    session.info.pop('reportes_invalidar', None)
+
+
+def configurar_reportes(app):
+    cola_reportes.configurar(
+        hilos=app.config.get('REPORT_WORKERS', 2),
+        ttl=app.config.get('REPORT_CACHE_TTL', 300),
+        max_trabajos=app.config.get('REPORT_MAX_JOBS', 64),
+        directorio=app.config.get('REPORT_STORAGE_DIR') or os.path.join(app.instance_path, 'reportes'),
+    )
@@ -0,0 +1,221 @@
+from datetime import date, datetime, time
+from itertools import chain
+
+import click
+from sqlalchemy import delete, event, extract, func, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.models import Gasto, ResumenDiario, Venta
+
+
+# -------------------------------
+# Mantenimiento del resumen diario
+# -------------------------------
+# Cada flush suma al resumen el aporte de las ventas/gastos nuevos, resta
+# el de los eliminados y, para los editados, resta el valor guardado y
+# suma el nuevo. Los cambios son incrementales (total = total + :x): dos
+# transacciones que escriben el mismo día no se pisan.
+
+IMPORTES = {Venta: 'total', Gasto: 'monto'}
+
+
+def _como_fecha(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor
+
+
+def _aporte(modelo, fecha, importe, signo=1):
+    """(día, total_ventas, num_ventas, total_gastos) que un registro suma al resumen."""
+    importe = signo * float(importe or 0)
+    if modelo is Venta:
+        return _como_fecha(fecha), importe, signo, 0.0
+    return _como_fecha(fecha), 0.0, 0, importe
+
+
+def _cambio_aporte(obj):
+    estado = inspect(obj)
+    return any(estado.attrs[campo].history.has_changes() for campo in ('fecha', IMPORTES[type(obj)]))
+
+
+@event.listens_for(db.session, 'before_flush')
+def _restar_anteriores(session, flush_context, instances):
+    """Resta lo guardado de los registros que se eliminan o cambian de fecha/importe."""
+    deltas = session.info.setdefault('resumen_deltas', [])
+    sumar = session.info.setdefault('resumen_sumar', [])
+    ids = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, (Venta, Gasto)):
+            continue
+        if obj in session.new:
+            sumar.append(obj)
+        elif obj in session.deleted or _cambio_aporte(obj):
+            ids.setdefault(type(obj), []).append(inspect(obj).identity[0])
+            if obj not in session.deleted:
+                sumar.append(obj)
+
+    # Valores de la base (no los del objeto: pueden estar expirados);
+    # por la conexión de la sesión, nunca desde la réplica
+    for modelo, lista in ids.items():
+        importe = getattr(modelo, IMPORTES[modelo])
+        for fecha, valor in session.connection().execute(select(modelo.fecha, importe).where(modelo.id.in_(lista))):
+            deltas.append(_aporte(modelo, fecha, valor, signo=-1))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _aplicar_cambios(session, flush_context):
+    # Después del INSERT ya están los valores por defecto (p. ej. la fecha)
+    deltas = session.info.pop('resumen_deltas', [])
+    deltas += [
+        _aporte(type(obj), obj.fecha, getattr(obj, IMPORTES[type(obj)]))
+        for obj in session.info.pop('resumen_sumar', [])
+    ]
+    if deltas:
+        sumar_deltas(session.connection(), deltas)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _descartar_cambios(session, previous_transaction):
+    session.info.pop('resumen_deltas', None)
+    session.info.pop('resumen_sumar', None)
+
+
+def sumar_deltas(conexion, deltas):
+    """Aplica [(día, ventas, cantidad, gastos)] al resumen, un UPDATE/INSERT por día."""
+    por_dia = {}
+    for dia, ventas, cantidad, gastos in deltas:
+        if dia is None:
+            continue
+        acumulado = por_dia.setdefault(dia, [0.0, 0, 0.0])
+        acumulado[0] += ventas
+        acumulado[1] += cantidad
+        acumulado[2] += gastos
+    # Siempre en orden de fecha: dos transacciones bloquean los días en el mismo orden
+    for dia, (ventas, cantidad, gastos) in sorted(por_dia.items()):
+        if not (ventas or cantidad or gastos):
+            continue
+        if _sumar_dia(conexion, dia, ventas, cantidad, gastos):
+            continue
+        try:
+            with conexion.begin_nested():
+                conexion.execute(insert(ResumenDiario).values(_fila(dia, ventas, cantidad, gastos)))
+        except IntegrityError:
+            # Otra transacción creó el día a la vez: se suma sobre esa fila
+            _sumar_dia(conexion, dia, ventas, cantidad, gastos)
+
+
+def _sumar_dia(conexion, dia, ventas, cantidad, gastos):
+    return conexion.execute(
+        update(ResumenDiario)
+        .where(ResumenDiario.fecha == dia)
+        .values(
+            total_ventas=ResumenDiario.total_ventas + ventas,
+            num_ventas=ResumenDiario.num_ventas + cantidad,
+            total_gastos=ResumenDiario.total_gastos + gastos,
+            neto=ResumenDiario.neto + (ventas - gastos),
+        )
+    ).rowcount
+
+
+def _fila(dia, total_ventas, num_ventas, total_gastos):
+    total_ventas = float(total_ventas or 0)
+    total_gastos = float(total_gastos or 0)
+    return {
+        'fecha': dia,
+        'total_ventas': total_ventas,
+        'num_ventas': int(num_ventas or 0),
+        'total_gastos': total_gastos,
+        'neto': total_ventas - total_gastos,
+    }
+
+
+def reconstruir_resumen():
+    """Regenera el resumen completo a partir de ventas y gastos."""
+    ResumenDiario.__table__.create(db.engine, checkfirst=True)
+
+    dia_venta = func.date(Venta.fecha)
+    dia_gasto = func.date(Gasto.fecha)
+    acumulado = {}
+    for dia, total, cantidad in (
+        db.session.query(dia_venta, func.sum(Venta.total), func.count(Venta.id))
+        .filter(Venta.fecha.isnot(None))
+        .group_by(dia_venta)
+    ):
+        acumulado[_como_fecha(dia)] = [total, cantidad, 0]
+    for dia, total in (
+        db.session.query(dia_gasto, func.sum(Gasto.monto))
+        .filter(Gasto.fecha.isnot(None))
+        .group_by(dia_gasto)
+    ):
+        acumulado.setdefault(_como_fecha(dia), [0, 0, 0])[2] = total
+
+    filas = [_fila(dia, *valores) for dia, valores in sorted(acumulado.items())]
+    db.session.execute(delete(ResumenDiario))
+    if filas:
+        db.session.execute(insert(ResumenDiario), filas)
+    db.session.commit()
+    return len(filas)
+
+
+# -------------------------------
+# Consultas sobre el resumen
+# -------------------------------
+def rango_mes(dia):
+    """(inicio, inicio del mes siguiente) del mes de `dia`, para filtrar por rango.
+
+    Un filtro `col >= inicio AND col < siguiente` puede usar el índice de
+    la columna; extract('month', col) no, y además mezcla años.
+    """
+    inicio = datetime.combine(dia.replace(day=1), time.min)
+    if inicio.month == 12:
+        return inicio, inicio.replace(year=inicio.year + 1, month=1)
+    return inicio, inicio.replace(month=inicio.month + 1)
+
+
+def totales_periodo(desde=None, hasta=None):
+    """Devuelve (total_ventas, num_ventas, total_gastos) entre dos fechas (inclusive)."""
+    query = db.session.query(
+        func.coalesce(func.sum(ResumenDiario.total_ventas), 0),
+        func.coalesce(func.sum(ResumenDiario.num_ventas), 0),
+        func.coalesce(func.sum(ResumenDiario.total_gastos), 0),
+    )
+    if desde:
+        query = query.filter(ResumenDiario.fecha >= desde)
+    if hasta:
+        query = query.filter(ResumenDiario.fecha <= hasta)
+    total_ventas, num_ventas, total_gastos = query.one()
+    return float(total_ventas), int(num_ventas), float(total_gastos)
+
+
+def ventas_por_mes(meses=12, hoy=None):
+    """Total de ventas por (año, mes) de los últimos `meses` meses."""
+    hoy = hoy or date.today()
+    anio, mes = hoy.year, hoy.month - (meses - 1)
+    while mes < 1:
+        mes += 12
+        anio -= 1
+    anio_col = extract('year', ResumenDiario.fecha).label('anio')
+    mes_col = extract('month', ResumenDiario.fecha).label('mes')
+    return (
+        db.session.query(anio_col, mes_col, func.sum(ResumenDiario.total_ventas))
+        .filter(ResumenDiario.fecha >= date(anio, mes, 1))
+        .group_by(anio_col, mes_col)
+        .order_by(anio_col, mes_col)
+        .all()
+    )
+
+
+# -------------------------------
+# Comandos CLI
+# -------------------------------
+def configurar_resumen(app):
+    @app.cli.command('reconstruir-resumen')
+    def reconstruir_resumen_cmd():
+        """Crea/rellena la tabla resumen_diario desde ventas y gastos."""
+        dias = reconstruir_resumen()
+        click.echo(f'Resumen diario reconstruido: {dias} días.')
@@ -0,0 +1,258 @@
+from sqlalchemy import bindparam, case, delete, insert, select, update
+
+from app import db
+from app.models.models import Producto, ProductoVariante
+
+# Valores que usa el formulario del catálogo cuando no hay opciones
+COLOR_UNICO = 'Único'
+TALLA_UNICA = 'Única'
+
+# -------------------------------
+# Combinaciones a partir de los textos del formulario
+# -------------------------------
+def separar(texto, largo):
+    """'Negro, Blanco,negro' -> ['Negro', 'Blanco'] (sin vacíos ni repetidos)."""
+    valores = []
+    vistos = set()
+    for valor in (texto or '').split(','):
+        valor = valor.strip()[:largo]
+        if valor and valor.lower() not in vistos:
+            vistos.add(valor.lower())
+            valores.append(valor)
+    return valores
+
+
+def combinaciones(colores, tallas):
+    """Todas las (color, talla) de un producto; sin opciones se usa el valor único."""
+    return [
+        (color, talla)
+        for color in separar(colores, 50) or [COLOR_UNICO]
+        for talla in separar(tallas, 20) or [TALLA_UNICA]
+    ]
+
+
+def repartir(total, partes):
+    """Reparte `total` unidades en `partes` lo más parejo posible."""
+    base, resto = divmod(max(total, 0), partes)
+    return [base + (1 if i < resto else 0) for i in range(partes)]
+
+
+# -------------------------------
+# Sincronización con el producto
+# -------------------------------
+def sincronizar_variantes(producto):
+    """Ajusta las variantes a los colores/tallas del producto y a su stock total.
+
+    Las combinaciones que ya existían conservan su stock; las nuevas
+    empiezan en 0 y las que ya no se ofrecen se eliminan. Después, la
+    diferencia con `producto.stock` se suma (repartida) o se descuenta
+    empezando por las variantes con más unidades, para que el total de
+    las variantes sea siempre el stock del producto.
+    """
+    deseadas = combinaciones(producto.colores, producto.tallas)
+    actuales = {(v.color.lower(), v.talla.lower()): v for v in producto.variantes}
+    variantes = []
+    for color, talla in deseadas:
+        variante = actuales.pop((color.lower(), talla.lower()), None)
+        if variante is None:
+            variante = ProductoVariante(color=color, talla=talla, stock=0)
+            producto.variantes.append(variante)
+        variantes.append(variante)
+    for sobrante in actuales.values():
+        producto.variantes.remove(sobrante)
+
+    for variante, stock in zip(variantes, ajustar_stock([v.stock for v in variantes], producto.stock or 0)):
+        if variante.stock != stock:
+            variante.stock = stock
+
+
+def ajustar_stock(stocks, total):
+    """Stock de cada variante para que sumen `total` (ver sincronizar_variantes)."""
+    stocks = list(stocks)
+    diferencia = total - sum(stocks)
+    if diferencia > 0:
+        for i, extra in enumerate(repartir(diferencia, len(stocks))):
+            stocks[i] += extra
+    elif diferencia < 0:
+        faltan = -diferencia
+        for i in sorted(range(len(stocks)), key=lambda i: stocks[i], reverse=True):
+            quitar = min(stocks[i], faltan)
+            stocks[i] -= quitar
+            faltan -= quitar
+            if not faltan:
+                break
+    return stocks
+
+
+def sincronizar_variantes_lote(connection, producto_ids):
+    """sincronizar_variantes para muchos productos a la vez (escrituras de Core).
+
+    Lee productos y variantes con dos consultas y aplica los cambios con un
+    DELETE, un UPDATE executemany y un INSERT executemany.
+    """
+    producto_ids = sorted(set(producto_ids))
+    if not producto_ids:
+        return
+    actuales = {}
+    for fila in connection.execute(
+        select(ProductoVariante.id, ProductoVariante.producto_id, ProductoVariante.color,
+               ProductoVariante.talla, ProductoVariante.stock)
+        .where(ProductoVariante.producto_id.in_(producto_ids))
+    ):
+        actuales.setdefault(fila.producto_id, {})[(fila.color.lower(), fila.talla.lower())] = fila
+    productos = connection.execute(
+        select(Producto.id, Producto.colores, Producto.tallas, Producto.stock)
+        .where(Producto.id.in_(producto_ids))
+    ).all()
+
+    sobrantes, cambios, nuevas = [], [], []
+    for producto in productos:
+        existentes = actuales.get(producto.id, {})
+        deseadas = [
+            (color, talla, existentes.pop((color.lower(), talla.lower()), None))
+            for color, talla in combinaciones(producto.colores, producto.tallas)
+        ]
+        sobrantes += [variante.id for variante in existentes.values()]
+        stocks = ajustar_stock([v.stock if v else 0 for _, _, v in deseadas], producto.stock or 0)
+        for (color, talla, variante), stock in zip(deseadas, stocks):
+            if variante is None:
+                nuevas.append({'producto_id': producto.id, 'color': color, 'talla': talla, 'stock': stock})
+            elif variante.stock != stock:
+                cambios.append({'variante_id': variante.id, 'nuevo_stock': stock})
+
+    tabla = ProductoVariante.__table__
+    if sobrantes:
+        connection.execute(delete(tabla).where(tabla.c.id.in_(sobrantes)))
+    if cambios:
+        connection.execute(
+            update(tabla).where(tabla.c.id == bindparam('variante_id')).values(stock=bindparam('nuevo_stock')),
+            cambios,
+        )
+    if nuevas:
+        connection.execute(insert(tabla), nuevas)
+
+
+# -------------------------------
+# Consultas
+# -------------------------------
+def filtro_disponible(talla=None, color=None, columna=None):
+    """Condición "producto IN (variantes con stock de esa talla/color)".
+
+    `columna` es la columna con el id de producto (Producto.id por defecto).
+    La subconsulta se resuelve en ix_variantes_talla_stock o
+    ix_variantes_color_stock (índices que cubren producto_id).
+    """
+    subconsulta = select(ProductoVariante.producto_id).where(ProductoVariante.stock > 0)
+    if talla:
+        subconsulta = subconsulta.where(ProductoVariante.talla == talla)
+    if color:
+        subconsulta = subconsulta.where(ProductoVariante.color == color)
+    return (Producto.id if columna is None else columna).in_(subconsulta)
+
+
+def opciones_en_stock(producto):
+    """(colores, tallas, variantes) en stock para el modal del catálogo."""
+    if not producto.variantes:
+        # Producto anterior a la migración de variantes
+        return producto.get_colores(), producto.get_tallas(), []
+    en_stock = [v for v in producto.variantes if v.stock > 0]
+    colores = list(dict.fromkeys(v.color for v in en_stock if v.color != COLOR_UNICO))
+    tallas = list(dict.fromkeys(v.talla for v in en_stock if v.talla != TALLA_UNICA))
+    variantes = [{'color': v.color, 'talla': v.talla, 'stock': v.stock} for v in en_stock]
+    return colores, tallas, variantes
+
+
+def variante_valida(producto, color, talla):
+    """True si (color, talla) es una variante del producto (o si no tiene variantes)."""
+    if not producto.variantes:
+        # Producto anterior a la migración de variantes
+        return True
+    return any(v.color == color and v.talla == talla for v in producto.variantes)
+
+
+# -------------------------------
+# Descuento de stock por variante (checkout)
+# -------------------------------
+# El stock de un producto con variantes es la suma del de sus variantes:
+# cada unidad vendida sale de una variante. Las líneas con color/talla
+# (carrito) usan esa variante; las que no traen opciones (venta desde
+# administración) toman las unidades de las variantes con más stock, igual
+# que ajustar_stock al bajar el total.
+
+def _variantes_de(producto_ids):
+    """Filas (id, producto_id, color, talla, stock, nombre) de todas las variantes de esos productos."""
+    return db.session.execute(
+        select(ProductoVariante.id, ProductoVariante.producto_id, ProductoVariante.color,
+               ProductoVariante.talla, ProductoVariante.stock, Producto.nombre)
+        .join(Producto, Producto.id == ProductoVariante.producto_id)
+        .where(ProductoVariante.producto_id.in_(producto_ids))
+        .order_by(ProductoVariante.id)
+    ).all()
+
+
+def repartir_pedido(lineas):
+    """Reparte las líneas del pedido entre variantes, sin escribir nada.
+
+    Devuelve ({variante_id: cantidad}, filas de variantes leídas, nombres de
+    las líneas cuyo color/talla no existe). Los productos sin variantes solo
+    descuentan el stock del producto.
+    """
+    filas = _variantes_de({int(linea['producto_id']) for linea in lineas})
+    por_producto = {}
+    for fila in filas:
+        por_producto.setdefault(fila.producto_id, []).append(fila)
+
+    cantidades, desconocidas, sin_opciones = {}, [], []
+    for linea in lineas:
+        producto_id, cantidad = int(linea['producto_id']), int(linea['cantidad'])
+        variantes = por_producto.get(producto_id)
+        if not variantes:
+            continue
+        if not (linea.get('color') or linea.get('talla')):
+            sin_opciones.append((variantes, cantidad))
+            continue
+        color, talla = linea.get('color') or COLOR_UNICO, linea.get('talla') or TALLA_UNICA
+        elegida = next((v for v in variantes if v.color == color and v.talla == talla), None)
+        if elegida is None:
+            desconocidas.append(f'{variantes[0].nombre} ({color} / {talla})')
+        else:
+            cantidades[elegida.id] = cantidades.get(elegida.id, 0) + cantidad
+
+    # Después de las elegidas, para no quitarles las unidades
+    for variantes, cantidad in sin_opciones:
+        libres = [max(v.stock - cantidades.get(v.id, 0), 0) for v in variantes]
+        tomadas = [libre - queda for libre, queda in zip(libres, ajustar_stock(libres, sum(libres) - cantidad))]
+        # Si no alcanza, el resto va a la primera y el UPDATE condicional falla
+        tomadas[0] += max(cantidad - sum(libres), 0)
+        for variante, tomada in zip(variantes, tomadas):
+            if tomada:
+                cantidades[variante.id] = cantidades.get(variante.id, 0) + tomada
+    return cantidades, filas, desconocidas
+
+
+def descontar_variantes(cantidades):
+    """Descuenta {variante_id: cantidad} con un único UPDATE condicional.
+
+    Devuelve False si alguna variante no tenía stock suficiente; en ese caso
+    hay que deshacer la transacción.
+    """
+    if not cantidades:
+        return True
+    cantidad = case(cantidades, value=ProductoVariante.id)
+    resultado = db.session.execute(
+        update(ProductoVariante)
+        .where(ProductoVariante.id.in_(list(cantidades)), ProductoVariante.stock >= cantidad)
+        .values(stock=ProductoVariante.stock - cantidad)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount == len(cantidades)
+
+
+def variantes_sin_stock(lineas):
+    """Nombres ('Camisa (Negro / M)') de las variantes pedidas sin stock suficiente."""
+    cantidades, filas, _ = repartir_pedido(lineas)
+    return [
+        f'{fila.nombre} ({fila.color} / {fila.talla})'
+        for fila in filas
+        if fila.stock < cantidades.get(fila.id, 0)
+    ]
@@ -0,0 +1,154 @@
+from sqlalchemy import case, delete, insert, select, update
+
+from app import db
+from app.models.models import DetalleVenta, ItemCarrito, Producto, Venta
+from app.services.cache import subir_version_catalogo
+from app.services.contadores import sumar_cambios_stock
+from app.services.facetas import marcar_facetas
+from app.services.variantes import descontar_variantes, repartir_pedido, variantes_sin_stock
+
+
+class ErrorVenta(Exception):
+    """Pedido inválido: producto inexistente, cantidad incorrecta o stock insuficiente."""
+
+    def __init__(self, mensaje, productos=()):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.productos = list(productos)
+
+
+# -------------------------------
+# Registro atómico de ventas
+# -------------------------------
+# Todo el pedido se resuelve en una transacción y con un número fijo de
+# consultas, sin importar cuántas líneas tenga:
+#   1. un SELECT con los precios de todos los productos,
+#   2. un UPDATE condicional que descuenta el stock de todos a la vez
+#      (WHERE stock >= cantidad) y otro igual para las variantes
+#      (color/talla), repartidas antes con un SELECT; si alguna fila no
+#      cumple, se deshace todo,
+#   3. el INSERT de la venta y un INSERT masivo de sus detalles.
+# El UPDATE bloquea las filas afectadas hasta el commit, así que dos pedidos
+# simultáneos sobre el mismo producto no pueden vender más de lo que hay.
+# Los contadores de stock bajo/crítico se ajustan en la misma transacción.
+
+def _agrupar(lineas):
+    """Cantidad total pedida por producto (un producto puede venir en varios colores/tallas)."""
+    pedidos = {}
+    for linea in lineas:
+        try:
+            producto_id = int(linea['producto_id'])
+            cantidad = int(linea['cantidad'])
+        except (KeyError, TypeError, ValueError):
+            raise ErrorVenta('Línea de pedido inválida.') from None
+        if cantidad <= 0:
+            raise ErrorVenta('Las cantidades deben ser mayores que cero.')
+        pedidos[producto_id] = pedidos.get(producto_id, 0) + cantidad
+    return pedidos
+
+
+def _descontar_stock(pedidos):
+    """Descuenta el stock de todos los productos con un único UPDATE condicional.
+
+    Devuelve True si todas las filas tenían stock suficiente.
+    """
+    cantidad = case(pedidos, value=Producto.id)
+    resultado = db.session.execute(
+        update(Producto)
+        .where(Producto.id.in_(list(pedidos)), Producto.stock >= cantidad)
+        .values(stock=Producto.stock - cantidad)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount == len(pedidos)
+
+
+def _cambios_stock(pedidos):
+    """(destacado, stock anterior, stock nuevo) de cada producto descontado.
+
+    Se lee después del UPDATE, con las filas ya bloqueadas: el valor
+    anterior es exacto aunque otro pedido las haya tocado antes.
+    """
+    filas = db.session.execute(
+        select(Producto.id, Producto.destacado, Producto.stock).where(Producto.id.in_(list(pedidos)))
+    ).all()
+    return [(destacado, stock + pedidos[producto_id], stock) for producto_id, destacado, stock in filas]
+
+
+def _sin_stock(pedidos):
+    filas = db.session.execute(
+        select(Producto.id, Producto.nombre, Producto.stock).where(Producto.id.in_(list(pedidos)))
+    ).all()
+    return [nombre for producto_id, nombre, stock in filas if (stock or 0) < pedidos[producto_id]]
+
+
+def registrar_venta(usuario_id, lineas, vaciar_carrito=False):
+    """Crea una venta con sus detalles y descuenta stock en una sola transacción.
+
+    `lineas` es una lista de dicts con producto_id, cantidad y, opcionalmente,
+    color y talla. Con vaciar_carrito=True el carrito del usuario se borra en
+    la misma transacción. Lanza ErrorVenta (sin dejar cambios) si el pedido
+    no se puede cumplir completo.
+    """
+    if not lineas:
+        raise ErrorVenta('El pedido no tiene productos.')
+    pedidos = _agrupar(lineas)
+
+    try:
+        precios = dict(db.session.execute(
+            select(Producto.id, Producto.precio).where(Producto.id.in_(list(pedidos)))
+        ).all())
+        faltantes = [producto_id for producto_id in pedidos if producto_id not in precios]
+        if faltantes:
+            raise ErrorVenta('Algunos productos ya no existen.', faltantes)
+
+        if not _descontar_stock(pedidos):
+            # Se deshacen los descuentos parciales antes de leer el stock real
+            db.session.rollback()
+            sin_stock = _sin_stock(pedidos)
+            raise ErrorVenta(f"Stock insuficiente para: {', '.join(sin_stock)}.", sin_stock)
+
+        # Cada unidad sale de una variante: el stock del producto sigue
+        # siendo la suma del de sus variantes
+        por_variante, _, desconocidas = repartir_pedido(lineas)
+        if desconocidas:
+            db.session.rollback()
+            raise ErrorVenta(f"Ya no están disponibles: {', '.join(desconocidas)}.", desconocidas)
+        if not descontar_variantes(por_variante):
+            db.session.rollback()
+            sin_stock = variantes_sin_stock(lineas)
+            raise ErrorVenta(f"Stock insuficiente para: {', '.join(sin_stock)}.", sin_stock)
+
+        detalles = []
+        for linea in lineas:
+            producto_id = int(linea['producto_id'])
+            cantidad = int(linea['cantidad'])
+            precio = precios[producto_id]
+            detalles.append({
+                'producto_id': producto_id,
+                'cantidad': cantidad,
+                'precio_unitario': precio,
+                'subtotal': precio * cantidad,
+                'color_seleccionado': linea.get('color'),
+                'talla_seleccionada': linea.get('talla'),
+            })
+
+        # La venta pasa por el ORM (contadores y resumen diario se mantienen por eventos)
+        venta = Venta(usuario_id=usuario_id, total=sum(d['subtotal'] for d in detalles))
+        db.session.add(venta)
+        db.session.flush()
+        for detalle in detalles:
+            detalle['venta_id'] = venta.id
+        db.session.execute(insert(DetalleVenta), detalles)
+        # El UPDATE masivo no pasa por los eventos de Producto (stock bajo/crítico)
+        sumar_cambios_stock(db.session.connection(), _cambios_stock(pedidos))
+        # Ni la caché de páginas: el stock mostrado cambió en todos los workers
+        subir_version_catalogo(db.session.connection())
+        # Productos o variantes agotados dejan de aparecer en sus facetas
+        marcar_facetas(db.session, pedidos)
+        if vaciar_carrito:
+            db.session.execute(delete(ItemCarrito).where(ItemCarrito.usuario_id == usuario_id))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return venta
@@ -0,0 +1,82 @@
+/* admin/dashboard.html */
+// Get CSS variables for chart colors
+const rootStyles = getComputedStyle(document.documentElement);
+const primaryColor = rootStyles.getPropertyValue('--primary-color').trim();
+const textPrimary = rootStyles.getPropertyValue('--text-primary').trim();
+const textSecondary = rootStyles.getPropertyValue('--text-secondary').trim();
+const borderColor = rootStyles.getPropertyValue('--border-color').trim();
+
+const datosVentas = JSON.parse(document.getElementById('datosVentas').textContent);
+const ctx = document.getElementById('ventasChart');
+const ventasChart = new Chart(ctx, {
+  type: 'bar',
+  data: {
+    labels: datosVentas.meses,
+    datasets: [{
+      label: 'Ventas ($)',
+      data: datosVentas.montos,
+      backgroundColor: primaryColor + 'CC',
+      borderColor: primaryColor,
+      borderWidth: 2,
+      borderRadius: 8,
+      borderSkipped: false,
+    }]
+  },
+  options: {
+    responsive: true,
+    maintainAspectRatio: false,
+    plugins: {
+      legend: { 
+        display: false 
+      },
+      tooltip: {
+        backgroundColor: 'rgba(0, 0, 0, 0.9)',
+        titleColor: '#fff',
+        bodyColor: '#fff',
+        borderColor: primaryColor,
+        borderWidth: 1,
+        cornerRadius: 8,
+        displayColors: false,
+        padding: 12,
+        callbacks: {
+          label: function(context) {
+            return `Ventas: $${context.parsed.y.toLocaleString()}`;
+          }
+        }
+      }
+    },
+    scales: {
+      y: {
+        beginAtZero: true,
+        grid: {
+          color: borderColor,
+          drawBorder: false
+        },
+        ticks: {
+          color: textSecondary,
+          callback: function(value) {
+            return '$' + value.toLocaleString();
+          }
+        }
+      },
+      x: {
+        grid: {
+          display: false
+        },
+        ticks: {
+          color: textSecondary
+        }
+      }
+    },
+    interaction: {
+      intersect: false,
+      mode: 'index'
+    },
+    animations: {
+      tension: {
+        duration: 1000,
+        easing: 'easeInOutQuart'
+      }
+    }
+  }
+});
@@ -0,0 +1,62 @@
+/* admin/inventario/editar_productos.html */
+function previewImage(event) {
+  const file = event.target.files[0];
+  const preview = document.getElementById('preview');
+  const noPreview = document.getElementById('noPreview');
+
+  if (file) {
+    const reader = new FileReader();
+    reader.onload = e => {
+      preview.src = e.target.result;
+      preview.classList.remove('d-none');
+      noPreview.classList.add('d-none');
+    };
+    reader.readAsDataURL(file);
+  } else {
+    preview.classList.add('d-none');
+    noPreview.classList.remove('d-none');
+  }
+}
+
+// Validación de formulario
+document.addEventListener('DOMContentLoaded', function() {
+  const form = document.querySelector('.needs-validation');
+
+  form.addEventListener('submit', function(event) {
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+
+      // Scroll al primer campo inválido
+      const firstInvalid = form.querySelector('.is-invalid');
+      if (firstInvalid) {
+        firstInvalid.scrollIntoView({ behavior: 'smooth', block: 'center' });
+      }
+    }
+
+    form.classList.add('was-validated');
+  }, false);
+
+  // Validación en tiempo real para precio
+  const precioInput = document.querySelector('input[name="precio"]');
+  precioInput.addEventListener('input', function() {
+    if (this.value < 0) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+
+  // Validación en tiempo real para stock
+  const stockInput = document.querySelector('input[name="stock"]');
+  stockInput.addEventListener('input', function() {
+    if (this.value < 0) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+
+  // Mostrar noPreview inicialmente
+  document.getElementById('noPreview').classList.remove('d-none');
+});
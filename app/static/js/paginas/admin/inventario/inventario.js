@@ -0,0 +1,53 @@
+/* admin/inventario/inventario.html */
+document.addEventListener("DOMContentLoaded", () => {
+    // Inicializar tooltips
+    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    const tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+        return new bootstrap.Tooltip(tooltipTriggerEl);
+    });
+
+    const inputBusqueda = document.getElementById("busqueda");
+
+    // La búsqueda y los filtros se aplican en el servidor
+
+    // Efectos hover mejorados
+    const inventoryItems = document.querySelectorAll('.inventory-item');
+    inventoryItems.forEach(item => {
+        item.addEventListener('mouseenter', function() {
+            this.style.transform = 'translateX(4px)';
+            this.style.transition = 'transform 0.2s ease';
+        });
+
+        item.addEventListener('mouseleave', function() {
+            this.style.transform = 'translateX(0)';
+        });
+    });
+
+    // Mejorar la experiencia de búsqueda
+    inputBusqueda.addEventListener('focus', function() {
+        this.parentElement.classList.add('shadow-sm');
+    });
+
+    inputBusqueda.addEventListener('blur', function() {
+        this.parentElement.classList.remove('shadow-sm');
+    });
+});
+
+
+function showAlert(message, type) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
+    alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+    alertDiv.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    document.body.appendChild(alertDiv);
+
+    // Auto-remover después de 5 segundos
+    setTimeout(() => {
+        if (alertDiv.parentElement) {
+            alertDiv.remove();
+        }
+    }, 5000);
+}
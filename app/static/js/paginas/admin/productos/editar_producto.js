@@ -0,0 +1,105 @@
+/* admin/productos/editar_producto.html */
+function previewImage(event) {
+  const file = event.target.files[0];
+  const preview = document.getElementById('preview');
+  const noPreview = document.getElementById('noPreview');
+
+  if (file) {
+    const reader = new FileReader();
+    reader.onload = e => {
+      preview.src = e.target.result;
+      preview.classList.remove('d-none');
+      noPreview.classList.add('d-none');
+    };
+    reader.readAsDataURL(file);
+  } else {
+    preview.classList.add('d-none');
+    noPreview.classList.remove('d-none');
+  }
+}
+
+// Función para actualizar la vista previa de colores y tallas
+function actualizarVistaPrevia() {
+  const coloresInput = document.querySelector('input[name="colores"]');
+  const tallasInput = document.querySelector('input[name="tallas"]');
+  const coloresPreview = document.getElementById('colores-preview');
+  const tallasPreview = document.getElementById('tallas-preview');
+
+  // Actualizar colores
+  if (coloresInput.value.trim()) {
+    const colores = coloresInput.value.split(',').map(color => color.trim()).filter(color => color);
+    coloresPreview.innerHTML = '';
+    colores.forEach(color => {
+      const badge = document.createElement('span');
+      badge.className = 'badge bg-primary';
+      badge.textContent = color;
+      coloresPreview.appendChild(badge);
+    });
+  } else {
+    coloresPreview.innerHTML = '<span class="badge bg-secondary">Sin colores definidos</span>';
+  }
+
+  // Actualizar tallas
+  if (tallasInput.value.trim()) {
+    const tallas = tallasInput.value.split(',').map(talla => talla.trim()).filter(talla => talla);
+    tallasPreview.innerHTML = '';
+    tallas.forEach(talla => {
+      const badge = document.createElement('span');
+      badge.className = 'badge bg-success';
+      badge.textContent = talla;
+      tallasPreview.appendChild(badge);
+    });
+  } else {
+    tallasPreview.innerHTML = '<span class="badge bg-secondary">Sin tallas definidas</span>';
+  }
+}
+
+// Validación de formulario
+document.addEventListener('DOMContentLoaded', function() {
+  const form = document.querySelector('.needs-validation');
+
+  // Event listeners para vista previa de colores y tallas
+  const coloresInput = document.querySelector('input[name="colores"]');
+  const tallasInput = document.querySelector('input[name="tallas"]');
+
+  coloresInput.addEventListener('input', actualizarVistaPrevia);
+  tallasInput.addEventListener('input', actualizarVistaPrevia);
+
+  // Inicializar vista previa
+  actualizarVistaPrevia();
+
+  form.addEventListener('submit', function(event) {
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+
+      // Scroll al primer campo inválido
+      const firstInvalid = form.querySelector('.is-invalid');
+      if (firstInvalid) {
+        firstInvalid.scrollIntoView({ behavior: 'smooth', block: 'center' });
+      }
+    }
+
+    form.classList.add('was-validated');
+  }, false);
+
+  // Validación en tiempo real para precio
+  const precioInput = document.querySelector('input[name="precio"]');
+  precioInput.addEventListener('input', function() {
+    if (this.value < 0) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+
+  // Validación en tiempo real para stock
+  const stockInput = document.querySelector('input[name="stock"]');
+  stockInput.addEventListener('input', function() {
+    if (this.value < 0) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+});
@@ -0,0 +1,6 @@
+/* admin/productos/productos.html — Los filtros, el orden y la paginación se aplican en el servidor (formFiltros) */
+document.addEventListener('DOMContentLoaded', () => {
+  // Tooltips
+  const tooltips = document.querySelectorAll('[data-bs-toggle="tooltip"]');
+  tooltips.forEach(t => new bootstrap.Tooltip(t));
+});
@@ -0,0 +1,48 @@
+/* admin/users/editar_usuario.html */
+document.addEventListener('DOMContentLoaded', function() {
+  // Toggle para mostrar/ocultar contraseña
+  const togglePassword = document.getElementById('togglePassword');
+  const passwordInput = document.getElementById('password');
+
+  togglePassword.addEventListener('click', function() {
+    const type = passwordInput.getAttribute('type') === 'password' ? 'text' : 'password';
+    passwordInput.setAttribute('type', type);
+    this.innerHTML = type === 'password' 
+      ? '<i class="bi bi-eye"></i>' 
+      : '<i class="bi bi-eye-slash"></i>';
+
+    // Efecto visual al cambiar
+    this.classList.toggle('btn-warning', type === 'text');
+    this.classList.toggle('btn-outline-secondary', type === 'password');
+  });
+
+  // Validación de formulario
+  const form = document.querySelector('.needs-validation');
+  form.addEventListener('submit', function(event) {
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+    }
+    form.classList.add('was-validated');
+  }, false);
+
+  // Validación en tiempo real para username
+  const usernameInput = document.querySelector('input[name="username"]');
+  usernameInput.addEventListener('input', function() {
+    if (this.value.length < 3 && this.value.length > 0) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+
+  // Confirmación antes de eliminar
+  const deleteBtn = document.querySelector('.btn-outline-danger');
+  if (deleteBtn) {
+    deleteBtn.addEventListener('click', function(e) {
+      if (!confirm(`¿Estás seguro de que deseas eliminar permanentemente al usuario ${this.dataset.username}? Esta acción no se puede deshacer.`)) {
+        e.preventDefault();
+      }
+    });
+  }
+});
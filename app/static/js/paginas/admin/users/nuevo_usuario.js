@@ -0,0 +1,71 @@
+/* admin/users/nuevo_usuario.html */
+document.addEventListener('DOMContentLoaded', function() {
+  // Toggle para mostrar/ocultar contraseña
+  const togglePassword = document.getElementById('togglePassword');
+  const passwordInput = document.getElementById('password');
+  const toggleConfirmPassword = document.getElementById('toggleConfirmPassword');
+  const confirmPasswordInput = document.getElementById('confirm_password');
+
+  function setupPasswordToggle(toggle, input) {
+    toggle.addEventListener('click', function() {
+      const type = input.getAttribute('type') === 'password' ? 'text' : 'password';
+      input.setAttribute('type', type);
+      this.innerHTML = type === 'password' 
+        ? '<i class="bi bi-eye"></i>' 
+        : '<i class="bi bi-eye-slash"></i>';
+
+      // Efecto visual al cambiar
+      this.classList.toggle('btn-primary', type === 'text');
+      this.classList.toggle('btn-outline-secondary', type === 'password');
+    });
+  }
+
+  setupPasswordToggle(togglePassword, passwordInput);
+  setupPasswordToggle(toggleConfirmPassword, confirmPasswordInput);
+
+  // Validación de confirmación de contraseña
+  confirmPasswordInput.addEventListener('input', function() {
+    const password = passwordInput.value;
+    const confirmPassword = this.value;
+
+    if (confirmPassword && password !== confirmPassword) {
+      this.classList.add('is-invalid');
+      document.getElementById('confirmPasswordFeedback').style.display = 'flex';
+    } else {
+      this.classList.remove('is-invalid');
+      document.getElementById('confirmPasswordFeedback').style.display = 'none';
+    }
+  });
+
+  // Validación de formulario
+  const form = document.querySelector('.needs-validation');
+  form.addEventListener('submit', function(event) {
+    // Validar coincidencia de contraseñas
+    const password = passwordInput.value;
+    const confirmPassword = confirmPasswordInput.value;
+
+    if (password !== confirmPassword) {
+      event.preventDefault();
+      event.stopPropagation();
+      confirmPasswordInput.classList.add('is-invalid');
+      document.getElementById('confirmPasswordFeedback').style.display = 'flex';
+    }
+
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+    }
+
+    form.classList.add('was-validated');
+  }, false);
+
+  // Validación en tiempo real para username
+  const usernameInput = document.querySelector('input[name="username"]');
+  usernameInput.addEventListener('input', function() {
+    if (this.value.length < 3 && this.value.length > 0) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+});
@@ -0,0 +1,6 @@
+/* admin/users/usuarios.html — Los filtros y la paginación se aplican en el servidor (formFiltros) */
+document.addEventListener('DOMContentLoaded', () => {
+  // Tooltips
+  const tooltips = document.querySelectorAll('[data-bs-toggle="tooltip"]');
+  tooltips.forEach(t => new bootstrap.Tooltip(t));
+});
@@ -0,0 +1,13 @@
+/* admin/ventas/gestion_ventas.html */
+document.addEventListener('DOMContentLoaded', function() {
+  // Tooltips
+  const tooltips = document.querySelectorAll('[data-bs-toggle="tooltip"]');
+  tooltips.forEach(t => new bootstrap.Tooltip(t));
+
+  // Auto-fecha de hoy para filtros
+  const today = new Date().toISOString().split('T')[0];
+  const fechaHasta = document.querySelector('input[name="fecha_hasta"]');
+  if (fechaHasta && !fechaHasta.value) {
+    fechaHasta.value = today;
+  }
+});
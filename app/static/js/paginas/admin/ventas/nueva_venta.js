@@ -0,0 +1,119 @@
+/* admin/ventas/nueva_venta.html */
+document.addEventListener('DOMContentLoaded', function() {
+  const checkboxes = document.querySelectorAll('.product-checkbox');
+  const quantityInputs = document.querySelectorAll('.quantity-input');
+  const selectedProductsCount = document.getElementById('selected-products-count');
+  const totalItemsCount = document.getElementById('total-items-count');
+  const subtotalAmount = document.getElementById('subtotal-amount');
+  const totalAmount = document.getElementById('total-amount');
+  const submitBtn = document.getElementById('submit-btn');
+
+  // Habilitar/deshabilitar cantidad cuando se selecciona un producto
+  checkboxes.forEach(checkbox => {
+    checkbox.addEventListener('change', function() {
+      const productId = this.value;
+      const quantityInput = document.querySelector(`.quantity-input[data-product-id="${productId}"]`);
+      const productRow = this.closest('.product-row');
+
+      if (this.checked) {
+        quantityInput.disabled = false;
+        productRow.classList.add('table-success');
+      } else {
+        quantityInput.disabled = true;
+        quantityInput.value = 1;
+        productRow.classList.remove('table-success');
+      }
+      updateSummary();
+    });
+  });
+
+  // Actualizar subtotal cuando cambia la cantidad
+  quantityInputs.forEach(input => {
+    input.addEventListener('input', function() {
+      const productId = this.dataset.productId;
+      const price = parseFloat(this.closest('.product-row').dataset.price);
+      const quantity = parseInt(this.value) || 0;
+      const stock = parseInt(this.closest('.product-row').dataset.stock);
+
+      // Validar stock
+      if (quantity > stock) {
+        this.value = stock;
+        showStockAlert(stock);
+      }
+
+      // Actualizar subtotal del producto
+      const subtotalElement = document.querySelector(`.product-subtotal[data-product-id="${productId}"]`);
+      const subtotal = price * (parseInt(this.value) || 0);
+      subtotalElement.textContent = `$${subtotal.toFixed(2)}`;
+
+      updateSummary();
+    });
+  });
+
+  function updateSummary() {
+    let selectedCount = 0;
+    let totalItems = 0;
+    let subtotal = 0;
+
+    checkboxes.forEach(checkbox => {
+      if (checkbox.checked) {
+        selectedCount++;
+        const productId = checkbox.value;
+        const quantityInput = document.querySelector(`.quantity-input[data-product-id="${productId}"]`);
+        const quantity = parseInt(quantityInput.value) || 0;
+        const price = parseFloat(checkbox.closest('.product-row').dataset.price);
+
+        totalItems += quantity;
+        subtotal += price * quantity;
+      }
+    });
+
+    // Actualizar UI
+    selectedProductsCount.textContent = selectedCount;
+    totalItemsCount.textContent = totalItems;
+    subtotalAmount.textContent = `$${subtotal.toFixed(2)}`;
+    totalAmount.textContent = `$${subtotal.toFixed(2)}`;
+
+    // Habilitar/deshabilitar botón de envío
+    submitBtn.disabled = selectedCount === 0;
+  }
+
+  function showStockAlert(stock) {
+    // Podrías implementar un toast o alerta más elegante aquí
+    alert(`⚠️ Solo hay ${stock} unidades disponibles en stock.`);
+  }
+
+  // Validación de formulario
+  const form = document.querySelector('.needs-validation');
+  form.addEventListener('submit', function(event) {
+    let hasSelectedProducts = false;
+
+    checkboxes.forEach(checkbox => {
+      if (checkbox.checked) {
+        hasSelectedProducts = true;
+        const productId = checkbox.value;
+        const quantityInput = document.querySelector(`.quantity-input[data-product-id="${productId}"]`);
+        const quantity = parseInt(quantityInput.value) || 0;
+
+        if (quantity < 1) {
+          event.preventDefault();
+          event.stopPropagation();
+          quantityInput.classList.add('is-invalid');
+        }
+      }
+    });
+
+    if (!hasSelectedProducts) {
+      event.preventDefault();
+      event.stopPropagation();
+      alert('⚠️ Debes seleccionar al menos un producto para realizar la venta.');
+    }
+
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+    }
+
+    form.classList.add('was-validated');
+  }, false);
+});
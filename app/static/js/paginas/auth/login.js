@@ -0,0 +1,27 @@
+/* auth/login.html — Script para mostrar/ocultar la contraseña */
+document.addEventListener("DOMContentLoaded", function() {
+  const togglePassword = document.getElementById("togglePassword");
+  const passwordInput = document.getElementById("password");
+
+  togglePassword.addEventListener("click", function() {
+    const type = passwordInput.getAttribute("type") === "password" ? "text" : "password";
+    passwordInput.setAttribute("type", type);
+    this.innerHTML = type === "password" 
+      ? '<i class="bi bi-eye"></i>' 
+      : '<i class="bi bi-eye-slash"></i>';
+
+    // Efecto visual al cambiar
+    this.classList.toggle('btn-primary', type === 'text');
+    this.classList.toggle('btn-outline-secondary', type === 'password');
+  });
+
+  // Validación de formulario
+  const form = document.querySelector('.needs-validation');
+  form.addEventListener('submit', function(event) {
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+    }
+    form.classList.add('was-validated');
+  }, false);
+});
@@ -0,0 +1,38 @@
+/* auth/register.html — Script para mostrar/ocultar contraseña y validación */
+document.addEventListener("DOMContentLoaded", function() {
+  const togglePassword = document.getElementById("togglePassword");
+  const passwordInput = document.getElementById("password");
+
+  // Toggle password visibility
+  togglePassword.addEventListener("click", function() {
+    const type = passwordInput.getAttribute("type") === "password" ? "text" : "password";
+    passwordInput.setAttribute("type", type);
+    this.innerHTML = type === "password" 
+      ? '<i class="bi bi-eye"></i>' 
+      : '<i class="bi bi-eye-slash"></i>';
+
+    // Efecto visual al cambiar
+    this.classList.toggle('btn-success', type === 'text');
+    this.classList.toggle('btn-outline-secondary', type === 'password');
+  });
+
+  // Validación de formulario
+  const form = document.querySelector('.needs-validation');
+  form.addEventListener('submit', function(event) {
+    if (!form.checkValidity()) {
+      event.preventDefault();
+      event.stopPropagation();
+    }
+    form.classList.add('was-validated');
+  }, false);
+
+  // Validación en tiempo real para username
+  const usernameInput = document.getElementById('username');
+  usernameInput.addEventListener('input', function() {
+    if (this.value.length < 3) {
+      this.classList.add('is-invalid');
+    } else {
+      this.classList.remove('is-invalid');
+    }
+  });
+});
@@ -0,0 +1,40 @@
+/* users/carrito.html */
+document.addEventListener('DOMContentLoaded', function() {
+  // Tooltips
+  const tooltips = document.querySelectorAll('[data-bs-toggle="tooltip"]');
+  tooltips.forEach(t => new bootstrap.Tooltip(t));
+
+  // Efecto hover en items del carrito
+  const cartItems = document.querySelectorAll('.cart-item');
+  cartItems.forEach(item => {
+    item.addEventListener('mouseenter', function() {
+      this.style.backgroundColor = var(--bg-secondary);
+    });
+    item.addEventListener('mouseleave', function() {
+      this.style.backgroundColor = '';
+    });
+  });
+
+  // Animación para el botón de pago
+  const payButton = document.querySelector('.btn-primary.btn-lg');
+  if (payButton) {
+    payButton.addEventListener('mouseenter', function() {
+      this.style.transform = 'translateY(-2px)';
+      this.style.boxShadow = var(--shadow-md);
+    });
+    payButton.addEventListener('mouseleave', function() {
+      this.style.transform = 'translateY(0)';
+      this.style.boxShadow = 'none';
+    });
+  }
+
+  // Confirmación para vaciar carrito
+  const vaciarCarritoBtn = document.querySelector('a[href*="vaciar_carrito"]');
+  if (vaciarCarritoBtn) {
+    vaciarCarritoBtn.addEventListener('click', function(e) {
+      if (!confirm('¿Estás seguro de que quieres vaciar todo el carrito? Esta acción no se puede deshacer.')) {
+        e.preventDefault();
+      }
+    });
+  }
+});
@@ -0,0 +1,181 @@
+/* users/dashboard.html */
+document.addEventListener('DOMContentLoaded', function() {
+  // Tooltips
+  const tooltips = document.querySelectorAll('[data-bs-toggle="tooltip"]');
+  tooltips.forEach(t => new bootstrap.Tooltip(t));
+
+  // Efectos de hover en las tarjetas de producto
+  const productCards = document.querySelectorAll('.product-card');
+  productCards.forEach(card => {
+    card.addEventListener('mouseenter', function() {
+      this.style.transform = 'translateY(-8px)';
+      this.style.boxShadow = '0 12px 30px rgba(0,0,0,0.15)';
+    });
+
+    card.addEventListener('mouseleave', function() {
+      this.style.transform = 'translateY(0)';
+      this.style.boxShadow = '';
+    });
+  });
+
+  // Animación para los badges de stock bajo
+  const lowStockBadges = document.querySelectorAll('.badge.bg-danger');
+  lowStockBadges.forEach(badge => {
+    badge.style.animation = 'pulse 2s infinite';
+  });
+
+  // Cargar el detalle del producto al abrir el modal único
+  const modal = document.getElementById('seleccionModal');
+  if (modal) {
+    modal.addEventListener('show.bs.modal', function(event) {
+      const boton = event.relatedTarget;
+      if (boton && boton.dataset.detalle) {
+        cargarDetalle(boton.dataset.detalle);
+      }
+    });
+  }
+});
+
+let productoActual = null;
+const detallesCargados = {};
+
+function mostrarEstado(estado) {
+  document.getElementById('detalleCargando').classList.toggle('d-none', estado !== 'cargando');
+  document.getElementById('detalleError').classList.toggle('d-none', estado !== 'error');
+  document.getElementById('detalleContenido').classList.toggle('d-none', estado !== 'listo');
+}
+
+function cargarDetalle(url) {
+  if (detallesCargados[url]) {
+    mostrarDetalle(detallesCargados[url]);
+    return;
+  }
+  mostrarEstado('cargando');
+  fetch(url, { headers: { 'Accept': 'application/json' } })
+    .then(respuesta => {
+      if (!respuesta.ok) throw new Error(respuesta.status);
+      return respuesta.json();
+    })
+    .then(producto => {
+      detallesCargados[url] = producto;
+      mostrarDetalle(producto);
+    })
+    .catch(() => mostrarEstado('error'));
+}
+
+// Crea los botones de opción (color o talla) con el mismo estilo del catálogo
+function crearOpciones(contenedor, nombre, valores, columna, claseBoton) {
+  contenedor.replaceChildren();
+  valores.forEach((valor, i) => {
+    const col = document.createElement('div');
+    col.className = columna;
+    const input = document.createElement('input');
+    input.type = 'radio';
+    input.className = 'btn-check';
+    input.name = nombre;
+    input.id = `${nombre}_${i}`;
+    input.value = valor;
+    input.required = true;
+    input.checked = i === 0;
+    input.addEventListener('change', actualizarResumen);
+    const label = document.createElement('label');
+    label.className = `btn ${claseBoton} w-100 rounded-3 py-3 fw-semibold`;
+    label.htmlFor = input.id;
+    label.textContent = valor;
+    col.append(input, label);
+    contenedor.appendChild(col);
+  });
+}
+
+function mostrarDetalle(producto) {
+  productoActual = producto;
+
+  document.getElementById('formAgregarCarrito').action = producto.url_agregar;
+  document.getElementById('detalleNombre').textContent = producto.nombre;
+  document.getElementById('detalleCategoria').textContent = producto.categoria;
+  document.getElementById('detallePrecio').textContent = `$${producto.precio.toFixed(2)}`;
+  document.getElementById('detalleStock').textContent = producto.stock;
+  document.getElementById('detalleDescripcion').textContent = producto.descripcion || '';
+  document.getElementById('resumenNombre').textContent = producto.nombre;
+
+  // Imagen (variantes responsive si existen)
+  const picture = document.getElementById('detalleImagen');
+  const img = picture.querySelector('img');
+  const source = picture.querySelector('source');
+  if (producto.imagen) {
+    img.src = producto.imagen.src;
+    img.alt = producto.nombre;
+    img.srcset = producto.imagen.srcset.jpg || '';
+    source.srcset = producto.imagen.srcset.webp || '';
+  }
+  picture.classList.toggle('d-none', !producto.imagen);
+  document.getElementById('detalleSinImagen').classList.toggle('d-none', !!producto.imagen);
+
+  // Colores y tallas: si no hay opciones se envía el valor único oculto
+  const hayColores = producto.colores.length > 0;
+  const hayTallas = producto.tallas.length > 0;
+  crearOpciones(document.getElementById('opcionesColores'), 'color', producto.colores, 'col-4', 'btn-outline-primary');
+  crearOpciones(document.getElementById('opcionesTallas'), 'talla', producto.tallas, 'col-3', 'btn-outline-success');
+  document.getElementById('bloqueColores').classList.toggle('d-none', !hayColores);
+  document.getElementById('bloqueTallas').classList.toggle('d-none', !hayTallas);
+  document.getElementById('colorUnico').disabled = hayColores;
+  document.getElementById('tallaUnica').disabled = hayTallas;
+
+  const cantidad = document.getElementById('cantidad');
+  cantidad.value = 1;
+  cantidad.max = producto.stock;
+  document.getElementById('cantidadMaxima').textContent = producto.stock;
+
+  mostrarEstado('listo');
+  actualizarResumen();
+}
+
+// Funciones para manejar cantidad
+function incrementarCantidad() {
+  const input = document.getElementById('cantidad');
+  const max = parseInt(input.max);
+  const current = parseInt(input.value);
+  if (current < max) {
+    input.value = current + 1;
+    actualizarResumen();
+  }
+}
+
+function decrementarCantidad() {
+  const input = document.getElementById('cantidad');
+  const current = parseInt(input.value);
+  if (current > 1) {
+    input.value = current - 1;
+    actualizarResumen();
+  }
+}
+
+// Actualizar resumen de selección
+function actualizarResumen() {
+  if (!productoActual) return;
+  const modal = document.getElementById('seleccionModal');
+  const colorSeleccionado = modal.querySelector('input[name="color"]:checked');
+  const tallaSeleccionada = modal.querySelector('input[name="talla"]:checked');
+
+  const color = colorSeleccionado ? colorSeleccionado.value : 'Único';
+  const talla = tallaSeleccionada ? tallaSeleccionada.value : 'Única';
+  document.getElementById('resumenColor').textContent = color;
+  document.getElementById('resumenTalla').textContent = talla;
+
+  // Con variantes, el máximo es el stock de la combinación color/talla elegida
+  if (productoActual.variantes && productoActual.variantes.length) {
+    const variante = productoActual.variantes.find(v => v.color === color && v.talla === talla);
+    const maximo = variante ? variante.stock : 0;
+    const input = document.getElementById('cantidad');
+    input.max = maximo;
+    if (parseInt(input.value) > maximo) input.value = Math.max(maximo, 1);
+    document.getElementById('cantidadMaxima').textContent = maximo;
+  }
+
+  const cantidad = parseInt(document.getElementById('cantidad').value) || 1;
+  document.getElementById('resumenTotal').textContent = `$${(productoActual.precio * cantidad).toFixed(2)}`;
+}
+
+document.addEventListener('input', function(event) {
+  if (event.target.id === 'cantidad') actualizarResumen();
+});
@@ -0,0 +1,53 @@
+/* Reportes PDF en segundo plano: encola, consulta el estado y descarga */
+document.addEventListener('DOMContentLoaded', function() {
+  document.querySelectorAll('a[data-reporte]').forEach(enlace => {
+    enlace.addEventListener('click', function(event) {
+      event.preventDefault();
+      if (enlace.classList.contains('disabled')) return;
+      generarReporte(enlace);
+    });
+  });
+});
+
+const INTERVALO_REPORTE = 1000;  // ms entre consultas de estado
+
+function pedirEstado(url) {
+  return fetch(url, { headers: { 'Accept': 'application/json' } })
+    .then(respuesta => {
+      if (!respuesta.ok && respuesta.status !== 202) throw new Error(respuesta.status);
+      return respuesta.json();
+    });
+}
+
+function generarReporte(enlace) {
+  const contenidoOriginal = enlace.innerHTML;
+  enlace.classList.add('disabled');
+  enlace.setAttribute('aria-disabled', 'true');
+  enlace.innerHTML = '<span class="spinner-border spinner-border-sm me-2" role="status"></span>Generando...';
+
+  function terminar() {
+    enlace.classList.remove('disabled');
+    enlace.removeAttribute('aria-disabled');
+    enlace.innerHTML = contenidoOriginal;
+  }
+
+  function seguir(trabajo) {
+    if (trabajo.estado === 'listo') {
+      terminar();
+      window.location.href = trabajo.url_descarga;
+    } else if (trabajo.estado === 'error') {
+      terminar();
+      alert('No se pudo generar el reporte PDF.');
+    } else {
+      setTimeout(() => pedirEstado(trabajo.url_estado).then(seguir).catch(fallo), INTERVALO_REPORTE);
+    }
+  }
+
+  function fallo() {
+    // Sin respuesta JSON: página de estado del servidor (se recarga sola)
+    terminar();
+    window.location.href = enlace.href;
+  }
+
+  pedirEstado(enlace.href).then(seguir).catch(fallo);
+}
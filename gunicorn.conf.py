@@ -0,0 +1,64 @@
+"""Configuración de gunicorn para producción: `gunicorn -c gunicorn.conf.py main:app`.
+
+Todo se ajusta con variables de entorno, así el mismo contenedor sirve
+para máquinas de distinto tamaño. `python main.py` queda solo para
+desarrollo (un proceso: un PDF lento bloquea a todos).
+
+Señales al proceso maestro:
+- TERM / INT: apagado ordenado (espera GUNICORN_GRACEFUL_TIMEOUT).
+- HUP: recarga la configuración y reemplaza los workers de a uno. Con
+  preload_app el código no se recarga: para desplegar, reiniciar el
+  contenedor.
+- TTIN / TTOU: suma o quita un worker.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5050')}"
+
+# Procesos pre-forkeados (WEB_CONCURRENCY es la variable estándar de gunicorn)
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Hilos por worker. Con 1 se usa el worker "sync": GUNICORN_TIMEOUT corta
+# cualquier petición que tarde más. Con más de 1 (worker "gthread") el
+# timeout solo detecta workers colgados, no peticiones lentas sueltas.
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+
+# La app se importa una vez en el maestro y los workers la heredan al
+# hacer fork (arranque más rápido, memoria compartida copy-on-write).
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Reciclado: cada worker se reinicia tras N peticiones (0 = nunca); el
+# jitter evita que todos se reinicien a la vez.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Latidos de los workers en memoria (en Docker /tmp puede estar en disco)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def post_fork(server, worker):
+    # Con preload_app el maestro pudo abrir conexiones al crear la app: un
+    # socket compartido entre procesos mezcla respuestas. Cada worker
+    # descarta las heredadas sin cerrarlas (siguen siendo del maestro).
+    if not server.cfg.preload_app:
+        return
+    from app import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for motor in db.engines.values():
+            motor.dispose(close=False)
+
+
+def worker_abort(worker):
+    worker.log.warning('Worker %s superó GUNICORN_TIMEOUT (%ss); se reinicia.', worker.pid, timeout)
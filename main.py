@@ -2,5 +2,6 @@ from app import create_app
 
 app = create_app()
 
+# Solo desarrollo; en producción: gunicorn -c gunicorn.conf.py main:app
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=5050)
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import pytest
+
+# Base SQLite propia: nunca la del .env (Config lee DATABASE_URI al importarse)
+_carpeta = tempfile.mkdtemp(prefix='tienda-tests-')
+os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(_carpeta, 'tests.db')
+os.environ.setdefault('METRICS_ENABLED', '0')
+os.environ['REPORT_STORAGE_DIR'] = os.path.join(_carpeta, 'reportes')
+
+from app import create_app, db  # noqa: E402
+from app.models.models import Categoria, Producto, Usuario  # noqa: E402
+from app.services.cache import paginas_publicas  # noqa: E402
+from app.services.migraciones import migrar, versiones  # noqa: E402
+from app.services.reportes import cola_reportes  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config.update(TESTING=True, PAGE_CACHE_ENABLED=False)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def bd(app):
+    """Esquema recién migrado en cada prueba."""
+    with app.app_context():
+        db.session.remove()
+        # Solo el primario: las pruebas de réplicas registran su bind en `db`
+        db.drop_all(bind_key=None)
+        versiones.drop(db.engine, checkfirst=True)
+        # Conexiones nuevas: SQLite puede reflejar índices viejos con
+        # sentencias PRAGMA ya preparadas antes del drop_all
+        db.engine.dispose()
+        migrar()
+        paginas_publicas.limpiar()
+        cola_reportes.invalidar()
+        yield db
+        db.session.remove()
+
+
+def crear_usuario(email, is_admin=False):
+    usuario = Usuario(username=email.split('@')[0], email=email, is_admin=is_admin)
+    usuario.set_password('x')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+def crear_producto(nombre='Camisa', precio=10.0, stock=5, colores='', tallas='', categoria=None):
+    from app.services.variantes import sincronizar_variantes
+
+    if categoria is None:
+        categoria = Categoria.query.filter_by(nombre='Camisas').first() or Categoria(nombre='Camisas')
+    producto = Producto(nombre=nombre, precio=precio, stock=stock, colores=colores, tallas=tallas,
+                        categoria=categoria)
+    db.session.add(producto)
+    sincronizar_variantes(producto)
+    db.session.commit()
+    return producto
+
+
+def iniciar_sesion(app, email):
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': email, 'password': 'x'})
+    return cliente
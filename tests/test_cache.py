@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import select
+
+from app import db
+from app.models.models import Contador
+from app.services.cache import VERSION_CATALOGO, subir_version_catalogo
+from tests.conftest import crear_producto
+
+
+@pytest.fixture
+def con_cache(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_CACHE_ENABLED', True)
+    return app.test_client()
+
+
+def _version():
+    return db.session.scalar(select(Contador.valor).where(Contador.nombre == VERSION_CATALOGO))
+
+
+def test_portada_se_sirve_de_la_cache(con_cache):
+    assert con_cache.get('/inicio').headers['X-Page-Cache'] == 'MISS'
+    assert con_cache.get('/inicio').headers['X-Page-Cache'] == 'HIT'
+
+
+def test_escritura_de_otro_worker_invalida_la_portada(app, con_cache):
+    con_cache.get('/inicio')
+    # Otro proceso confirma un cambio: esta memoria no se limpió
+    with db.engine.begin() as conexion:
+        subir_version_catalogo(conexion)
+
+    assert con_cache.get('/inicio').headers['X-Page-Cache'] == 'MISS'
+
+
+def test_cambio_por_orm_sube_la_version_en_la_misma_transaccion(app):
+    producto = crear_producto()
+    antes = _version()
+
+    producto.precio = 12.0
+    db.session.commit()
+
+    assert _version() == antes + 1
@@ -0,0 +1,34 @@
+from sqlalchemy import func, select
+
+from app import db
+from app.models.models import ItemCarrito, Venta
+from app.services.carrito import agregar_item
+from tests.conftest import crear_producto, crear_usuario, iniciar_sesion
+
+
+def _lineas_carrito(usuario_id):
+    return db.session.scalar(select(func.count(ItemCarrito.id)).where(ItemCarrito.usuario_id == usuario_id))
+
+
+def test_pedido_vacia_el_carrito_junto_con_la_venta(app):
+    cliente = crear_usuario('c@x')
+    producto = crear_producto(stock=3)
+    agregar_item(cliente.id, producto.id, None, None, 2)
+
+    respuesta = iniciar_sesion(app, 'c@x').post('/procesar_pedido')
+
+    assert respuesta.status_code == 200
+    assert db.session.scalar(select(func.count(Venta.id))) == 1
+    assert _lineas_carrito(cliente.id) == 0
+
+
+def test_pedido_rechazado_conserva_el_carrito(app):
+    cliente = crear_usuario('c@x')
+    producto = crear_producto(stock=1)
+    agregar_item(cliente.id, producto.id, None, None, 2)
+
+    respuesta = iniciar_sesion(app, 'c@x').post('/procesar_pedido')
+
+    assert respuesta.status_code == 302
+    assert db.session.scalar(select(func.count(Venta.id))) == 0
+    assert _lineas_carrito(cliente.id) == 1
@@ -0,0 +1,58 @@
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import pytest
+
+from app import db
+from app.models.models import DetalleVenta, Usuario, Venta
+from app.services.benchmark import ContadorSQL
+from app.services.reportes import cola_reportes
+from tests.conftest import crear_producto, crear_usuario, iniciar_sesion
+
+DESDE = datetime(2024, 1, 1)
+FILTROS = {'fecha_desde': '2024-01-01', 'fecha_hasta': '2024-03-01'}
+
+
+def _crear_ventas(producto, desde, cantidad):
+    """Ventas de clientes distintos, con dos líneas cada una, dentro de FILTROS."""
+    for i in range(desde, desde + cantidad):
+        # Sin hash real: estos clientes nunca inician sesión
+        cliente = Usuario(username=f'cliente{i}', email=f'cliente{i}@x', password_hash='-')
+        venta = Venta(usuario=cliente, total=20.0, fecha=DESDE + timedelta(hours=i))
+        db.session.add(venta)
+        for _ in range(2):
+            db.session.add(DetalleVenta(venta=venta, producto_id=producto.id, cantidad=1,
+                                        precio_unitario=10.0, subtotal=10.0))
+    db.session.commit()
+
+
+def _esperar_reporte(ubicacion):
+    """Espera al trabajo leyendo su estado del disco (sin consultas por HTTP)."""
+    trabajo_id = urlsplit(ubicacion).path.rsplit('/', 1)[-1]
+    while cola_reportes.obtener(trabajo_id).estado in ('pendiente', 'en_proceso'):
+        time.sleep(0.01)
+    assert cola_reportes.obtener(trabajo_id).estado == 'listo'
+
+
+def _contar(cliente, ruta):
+    with ContadorSQL() as contador:
+        respuesta = cliente.get(ruta, query_string=FILTROS)
+        if 'exportar_pdf' in ruta:
+            assert respuesta.status_code == 302
+            _esperar_reporte(respuesta.headers['Location'])
+        else:
+            assert respuesta.status_code == 200
+    return contador.total
+
+
+@pytest.mark.parametrize('ruta', ['/admin/admin/gestion_ventas', '/admin/admin/exportar_pdf'])
+def test_consultas_no_crecen_con_las_ventas(app, ruta):
+    crear_usuario('admin@x', is_admin=True)
+    producto = crear_producto(stock=1000)
+    cliente = iniciar_sesion(app, 'admin@x')
+
+    _crear_ventas(producto, 0, 1)
+    con_una = _contar(cliente, ruta)
+    _crear_ventas(producto, 1, 49)
+    assert _contar(cliente, ruta) == con_una
@@ -0,0 +1,94 @@
+import logging
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.services import diagnostico
+
+
+@pytest.fixture
+def motor():
+    motor = create_engine('sqlite://')
+    event.listen(motor, 'before_cursor_execute', diagnostico._antes)
+    event.listen(motor, 'after_cursor_execute', diagnostico._despues)
+    event.listen(motor, 'handle_error', diagnostico._error)
+    yield motor
+    motor.dispose()
+
+
+def _ejecutar(motor):
+    with motor.connect() as conexion:
+        for _ in range(5):
+            conexion.execute(text('SELECT 1'))
+        with pytest.raises(OperationalError):
+            conexion.execute(text('SELECT * FROM no_existe'))
+        return conexion.info.get('diagnostico_pila')
+
+
+def test_la_pila_no_crece_fuera_de_la_app(motor):
+    # Un hilo propio no hereda el contexto de aplicación de la prueba
+    pilas = []
+    hilo = threading.Thread(target=lambda: pilas.append(_ejecutar(motor)))
+    hilo.start()
+    hilo.join()
+    assert pilas == [[]]
+
+
+def test_la_pila_no_crece_dentro_de_la_app(motor):
+    assert _ejecutar(motor) == []
+
+
+def _consultar_en_peticion(app, motor, veces):
+    """`veces` SELECT por clave primaria dentro de una misma petición."""
+    with app.test_request_context('/productos'):
+        with motor.begin() as conexion:
+            conexion.execute(text('CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, nombre TEXT)'))
+        with motor.connect() as conexion:
+            for i in range(veces):
+                conexion.execute(text('SELECT nombre FROM t WHERE id = :id'), {'id': i})
+        diagnostico._revisar_repetidas()
+
+
+def _avisos(caplog):
+    return [registro.getMessage() for registro in caplog.records if registro.levelno == logging.WARNING]
+
+
+def test_avisa_n_mas_uno_al_pasar_el_limite(app, motor, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, 'N_PLUS_ONE_THRESHOLD', 3)
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 10_000)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        _consultar_en_peticion(app, motor, 5)
+
+    avisos = _avisos(caplog)
+    assert len(avisos) == 1
+    assert 'Posible N+1' in avisos[0]
+    assert '5 veces en GET /productos' in avisos[0]
+    assert 'SELECT nombre FROM t WHERE id = ?' in avisos[0]
+
+
+def test_consulta_lenta_se_registra_con_su_plan(app, motor, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, 'N_PLUS_ONE_THRESHOLD', 10)
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 0)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        _consultar_en_peticion(app, motor, 1)
+
+    lentas = [aviso for aviso in _avisos(caplog) if 'SELECT nombre FROM t' in aviso]
+    assert len(lentas) == 1
+    assert lentas[0].startswith('Consulta lenta')
+    assert '[GET /productos]' in lentas[0]
+    assert 'Parámetros: (int)' in lentas[0]
+    assert 'Plan: índices:' in lentas[0] and 'SEARCH t' in lentas[0]
+
+
+def test_nada_se_registra_bajo_los_limites(app, motor, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, 'N_PLUS_ONE_THRESHOLD', 10)
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 10_000)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        _consultar_en_peticion(app, motor, 10)
+
+    assert _avisos(caplog) == []
@@ -0,0 +1,38 @@
+import csv
+import io
+
+from openpyxl import load_workbook
+
+from app.services.exportacion import respuesta_csv, respuesta_xlsx
+from app.services.importacion import leer_csv
+
+PELIGROSOS = ['=HYPERLINK("http://x")', '+1+1', '-2+3', '@SUM(A1)']
+
+
+def _csv(app, filas):
+    with app.test_request_context():
+        respuesta = respuesta_csv('x.csv', ['texto', 'numero'], filas)
+        return ''.join(respuesta.response).lstrip('\ufeff')
+
+
+def test_csv_escapa_textos_que_serian_formulas(app):
+    contenido = _csv(app, [(texto, -5) for texto in PELIGROSOS] + [('normal', 1)])
+    filas = list(csv.reader(io.StringIO(contenido)))[1:]
+    assert [fila[0] for fila in filas] == ["'" + texto for texto in PELIGROSOS] + ['normal']
+    # Los números negativos no son texto: salen sin apóstrofo
+    assert {fila[1] for fila in filas} == {'-5', '1'}
+
+
+def test_importar_quita_el_escape_de_la_exportacion(app):
+    contenido = _csv(app, [(texto, 1) for texto in PELIGROSOS + ["'ya con apostrofo"]])
+    _, filas = leer_csv(io.BytesIO(contenido.replace('texto,numero', 'nombre,precio').encode('utf-8')))
+    assert [datos['nombre'] for _, datos in filas] == PELIGROSOS + ["'ya con apostrofo"]
+
+
+def test_xlsx_guarda_formulas_como_texto(app):
+    with app.test_request_context():
+        respuesta = respuesta_xlsx('x.xlsx', ['texto'], [(PELIGROSOS[0],)])
+        contenido = b''.join(respuesta.response)
+        respuesta.close()
+    celda = load_workbook(io.BytesIO(contenido)).active['A2']
+    assert celda.data_type == 's' and celda.value == PELIGROSOS[0]
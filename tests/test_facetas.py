@@ -0,0 +1,120 @@
+from sqlalchemy import event, func, select
+
+from app import db
+from app.models.models import ConteoFaceta, FacetaProducto, Producto
+from app.services.facetas import contar_facetas, reindexar_facetas
+from app.services.ventas import registrar_venta
+from tests.conftest import crear_producto, crear_usuario
+
+
+def _conteos(opciones, faceta):
+    return {valor: (conteo, elegido) for valor, _, conteo, elegido in opciones[faceta]}
+
+
+def _catalogo():
+    crear_producto('Polo negro', precio=10, stock=5, colores='Negro')
+    crear_producto('Polo mixto', precio=30, stock=4, colores='Negro, Blanco', tallas='M')
+    crear_producto('Polo agotado', precio=30, stock=0, colores='Blanco')
+
+
+def test_cada_faceta_cuenta_con_los_filtros_de_las_demas(app):
+    _catalogo()
+
+    opciones, total = contar_facetas({'color': 'Negro'})
+
+    assert total == 2
+    # El filtro de color no se aplica a su propia faceta; el agotado no tiene color
+    assert _conteos(opciones, 'color') == {'Negro': (2, True), 'Blanco': (1, False)}
+    assert _conteos(opciones, 'precio') == {'0-25': (1, False), '25-50': (1, False)}
+    assert _conteos(opciones, 'talla') == {'M': (1, False)}
+
+
+def test_la_busqueda_limita_los_conteos(app):
+    _catalogo()
+    busqueda = select(Producto.id).where(Producto.nombre.like('%mixto%'))
+
+    opciones, total = contar_facetas({}, busqueda)
+
+    assert total == 1
+    assert _conteos(opciones, 'color') == {'Negro': (1, False), 'Blanco': (1, False)}
+
+
+def test_la_opcion_elegida_se_muestra_sin_productos(app):
+    _catalogo()
+
+    opciones, total = contar_facetas({'color': 'Negro', 'talla': 'XL'})
+
+    assert total == 0
+    assert _conteos(opciones, 'talla') == {'M': (1, False), 'XL': (0, True)}
+
+
+def _conteos_guardados():
+    return dict(
+        ((faceta, valor), conteo)
+        for faceta, valor, conteo in db.session.execute(
+            select(ConteoFaceta.faceta, ConteoFaceta.valor, ConteoFaceta.conteo).where(ConteoFaceta.conteo > 0))
+    )
+
+
+def _conteos_del_indice():
+    return dict(
+        ((faceta, valor), conteo)
+        for faceta, valor, conteo in db.session.execute(
+            select(FacetaProducto.faceta, FacetaProducto.valor, func.count())
+            .group_by(FacetaProducto.faceta, FacetaProducto.valor))
+    )
+
+
+def test_conteos_siguen_al_indice_en_cada_escritura(app):
+    _catalogo()
+    assert _conteos_guardados() == _conteos_del_indice()
+
+    mixto = db.session.scalar(select(Producto).where(Producto.nombre == 'Polo mixto'))
+    mixto.precio = 120
+    db.session.commit()
+    assert _conteos_guardados()[('precio', '100+')] == 1
+    assert _conteos_guardados() == _conteos_del_indice()
+
+    # La venta agota el producto con un UPDATE de Core
+    cliente = crear_usuario('c@x')
+    negro = db.session.scalar(select(Producto).where(Producto.nombre == 'Polo negro'))
+    registrar_venta(cliente.id, [{'producto_id': negro.id, 'cantidad': 5, 'color': 'Negro', 'talla': None}])
+    assert ('disponible', '1') in _conteos_guardados()
+    assert _conteos_guardados() == _conteos_del_indice()
+
+    db.session.delete(mixto)
+    db.session.commit()
+    assert _conteos_guardados() == _conteos_del_indice()
+
+    antes = _conteos_guardados()
+    reindexar_facetas()
+    assert _conteos_guardados() == antes
+
+
+def test_sin_filtros_los_conteos_no_agrupan_el_indice(app):
+    _catalogo()
+    sentencias = []
+
+    def anotar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', anotar)
+    try:
+        opciones, total = contar_facetas({})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', anotar)
+
+    assert total == 3
+    assert _conteos(opciones, 'color') == {'Negro': (2, False), 'Blanco': (1, False)}
+    assert _conteos(opciones, 'disponible') == {'1': (2, False)}
+    assert not any('facetas_productos' in sentencia for sentencia in sentencias)
+
+
+def test_una_faceta_elegida_toma_su_conteo_y_el_total_de_la_tabla(app):
+    _catalogo()
+
+    opciones, total = contar_facetas({'precio': '25-50'})
+
+    assert total == 2
+    assert _conteos(opciones, 'precio') == {'0-25': (1, False), '25-50': (2, True)}
+    assert _conteos(opciones, 'color') == {'Negro': (1, False), 'Blanco': (1, False)}
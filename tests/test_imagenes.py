@@ -0,0 +1,34 @@
+from PIL import Image
+
+from app.services import imagenes
+
+
+def _guardar(carpeta, nombre, tamanio):
+    Image.new('RGB', tamanio, (200, 30, 30)).save(carpeta / nombre)
+
+
+def test_srcset_usa_el_ancho_real_de_cada_variante(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(imagenes, 'CARPETA_ORIGINALES', str(tmp_path))
+    _guardar(tmp_path, 'foto.png', (300, 150))
+    imagenes.generar_variantes('foto.png')
+
+    with app.test_request_context():
+        datos = imagenes.imagen_responsive('foto.png')
+
+    # 160 px se reduce; 480 y 960 no se agrandan y quedan en 300 (una sola vez)
+    for srcset in datos['srcset'].values():
+        assert [parte.rsplit(' ', 1)[1] for parte in srcset.split(', ')] == ['160w', '300w']
+
+
+def test_variantes_no_se_pisan_entre_extensiones(tmp_path, monkeypatch):
+    monkeypatch.setattr(imagenes, 'CARPETA_ORIGINALES', str(tmp_path))
+    _guardar(tmp_path, 'foto.png', (600, 600))
+    _guardar(tmp_path, 'foto.jpg', (400, 400))
+    imagenes.generar_variantes('foto.png')
+    imagenes.generar_variantes('foto.jpg')
+
+    carpeta = tmp_path / imagenes.SUBCARPETA_VARIANTES
+    with Image.open(carpeta / imagenes.nombre_variante('foto.png', 'modal', 'jpg')) as imagen:
+        assert imagen.width == 600
+    with Image.open(carpeta / imagenes.nombre_variante('foto.jpg', 'modal', 'jpg')) as imagen:
+        assert imagen.width == 400
@@ -0,0 +1,143 @@
+import io
+
+from sqlalchemy import event, func, select
+
+from app import db
+from app.models.models import (
+    Categoria, ConteoFaceta, Contador, FacetaProducto, Producto, ProductoVariante, TerminoBusqueda,
+)
+from app.services.contadores import NOMBRES, contar_real, reconciliar_contadores
+from app.services.importacion import importar_productos
+from tests.conftest import crear_producto
+
+
+def _csv(texto):
+    return io.BytesIO(texto.encode('utf-8'))
+
+
+def _producto(nombre):
+    return db.session.scalar(select(Producto).where(Producto.nombre == nombre))
+
+
+def test_actualiza_existentes_y_crea_nuevos(app):
+    existente = crear_producto('Camisa', precio=10, stock=5)
+
+    resultado = importar_productos(_csv(
+        'id,sku,nombre,precio,stock\n'
+        f'{existente.id},CAM-1,Camisa lino,15,8\n'
+        ',POL-1,Polo,20,3\n'
+    ))
+
+    assert (resultado.actualizados, resultado.creados, resultado.errores) == (1, 1, [])
+    db.session.expire_all()
+    assert (existente.sku, existente.nombre, existente.precio, existente.stock) == ('CAM-1', 'Camisa lino', 15, 8)
+    polo = _producto('Polo')
+    assert (polo.sku, polo.precio, polo.stock) == ('POL-1', 20, 3)
+    assert db.session.scalar(
+        select(func.sum(ProductoVariante.stock)).where(ProductoVariante.producto_id == polo.id)) == 3
+    # El sku ya registrado actualiza en lugar de duplicar
+    importar_productos(_csv('sku,precio\nPOL-1,25\n'))
+    db.session.expire_all()
+    assert polo.precio == 25
+    assert db.session.scalar(select(func.count(Producto.id))) == 2
+
+
+def test_filas_invalidas_se_informan_con_su_linea(app):
+    resultado = importar_productos(_csv(
+        'nombre,precio,stock\n'
+        'Polo,20,3\n'
+        'Gorra,abc,1\n'
+        'Bufanda,12\n'
+        ',10,1\n'
+        'Polo,-5,2\n'
+        'Media,3,2\n'
+    ))
+
+    assert resultado.filas == 6
+    assert resultado.creados == 2
+    assert resultado.errores == [
+        (3, 'precio no es un número: "abc"'),
+        (4, 'se esperaban 3 valores'),
+        (5, 'falta el nombre'),
+        (6, 'precio no puede ser negativo: "-5"'),
+    ]
+    assert sorted(db.session.scalars(select(Producto.nombre))) == ['Media', 'Polo']
+
+
+def test_categorias_nuevas_y_existentes_con_una_consulta(app):
+    crear_producto('Camisa')  # categoría Camisas
+    sentencias = []
+
+    def anotar(conn, cursor, statement, parameters, context, executemany):
+        if 'categorias' in statement and 'productos' not in statement:
+            sentencias.append(statement.split()[0])
+
+    event.listen(db.engine, 'before_cursor_execute', anotar)
+    try:
+        resultado = importar_productos(_csv(
+            'nombre,precio,categoria\n'
+            'Polo,20,camisas\n'
+            'Gorra,8,Accesorios\n'
+            'Bufanda,12,accesorios\n'
+            'Jean,30,Pantalones\n'
+            'Short,18,CAMISAS\n'
+        ), crear_categorias=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', anotar)
+
+    assert resultado.errores == []
+    assert resultado.categorias_creadas == 2
+    # Carga inicial, un INSERT para las nuevas y un SELECT de sus ids
+    assert sentencias == ['SELECT', 'INSERT', 'SELECT']
+    categorias = dict(db.session.execute(select(Categoria.nombre, Categoria.id)).all())
+    assert sorted(categorias) == ['Accesorios', 'Camisas', 'Pantalones']
+    assert _producto('Short').categoria_id == categorias['Camisas']
+    assert _producto('Bufanda').categoria_id == categorias['Accesorios']
+
+
+def test_sin_crear_categorias_la_desconocida_es_un_error(app):
+    resultado = importar_productos(_csv('nombre,precio,categoria\nGorra,8,Accesorios\n'))
+
+    assert resultado.errores == [(2, 'la categoría "Accesorios" no existe')]
+    assert db.session.scalar(select(func.count(Categoria.id))) == 0
+
+
+def test_contadores_busqueda_y_facetas_quedan_al_dia(app):
+    existente = crear_producto('Camisa', precio=10, stock=5)
+    reconciliar_contadores()
+
+    importar_productos(_csv(
+        'id,nombre,precio,stock,destacado,categoria,colores\n'
+        f'{existente.id},Camisa,10,1,1,Camisas,Negro\n'
+        ',Gorra tejida,60,20,0,Accesorios,Rojo\n'
+        ',Polo,20,0,1,Camisas,\n'
+    ), crear_categorias=True)
+
+    # Sin reconciliar: los contadores guardados ya son los reales
+    guardados = dict(db.session.execute(
+        select(Contador.nombre, Contador.valor).where(Contador.nombre.in_(NOMBRES))).all())
+    with db.engine.connect() as conexion:
+        assert guardados == contar_real(conexion)
+    assert guardados['productos'] == 3
+    assert guardados['productos_destacados'] == 2
+    assert guardados['productos_stock_critico'] == 2
+    assert guardados['categorias'] == 2
+
+    gorra = _producto('Gorra tejida')
+    terminos = set(db.session.scalars(select(TerminoBusqueda.termino).where(TerminoBusqueda.producto_id == gorra.id)))
+    assert {'gorra', 'tejida', 'accesorios'} <= terminos
+
+    facetas = set(db.session.execute(
+        select(FacetaProducto.faceta, FacetaProducto.valor).where(FacetaProducto.producto_id == gorra.id)))
+    assert facetas == {('categoria', str(gorra.categoria_id)), ('precio', '50-100'),
+                       ('disponible', '1'), ('color', 'Rojo')}
+    guardados = dict(
+        ((faceta, valor), conteo) for faceta, valor, conteo in db.session.execute(
+            select(ConteoFaceta.faceta, ConteoFaceta.valor, ConteoFaceta.conteo).where(ConteoFaceta.conteo > 0))
+    )
+    del_indice = dict(
+        ((faceta, valor), conteo) for faceta, valor, conteo in db.session.execute(
+            select(FacetaProducto.faceta, FacetaProducto.valor, func.count())
+            .group_by(FacetaProducto.faceta, FacetaProducto.valor))
+    )
+    assert guardados == del_indice
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import inspect, select, text
+
+from app import db
+from app.models.models import FacetaProducto, ProductoVariante
+from app.services.explicar import _rutas_acceso, indices_usados, plan_de_consulta
+from app.services.migraciones import migrar, versiones
+
+
+def test_migraciones_dejan_el_esquema_de_los_modelos(app):
+    inspector = inspect(db.engine)
+    for tabla in db.metadata.sorted_tables:
+        columnas = {columna['name'] for columna in inspector.get_columns(tabla.name)}
+        assert columnas == set(tabla.columns.keys()), tabla.name
+        indices = {indice['name'] for indice in inspector.get_indexes(tabla.name)}
+        assert {indice.name for indice in tabla.indexes} <= indices, tabla.name
+
+
+def test_variantes_y_facetas_de_productos_anteriores(app):
+    db.drop_all(bind_key=None)
+    versiones.drop(db.engine)
+    db.engine.dispose()
+    migrar(hasta=2)
+    with db.engine.begin() as conexion:
+        conexion.execute(text("INSERT INTO categorias (id, nombre) VALUES (1, 'Camisas')"))
+        conexion.execute(text(
+            "INSERT INTO productos (id, nombre, precio, stock, colores, tallas, categoria_id) "
+            "VALUES (1, 'Camisa', 30, 5, 'Negro, Blanco', 'M', 1)"
+        ))
+
+    migrar()
+
+    variantes = db.session.execute(
+        select(ProductoVariante.color, ProductoVariante.talla, ProductoVariante.stock)
+        .order_by(ProductoVariante.color)
+    ).all()
+    assert variantes == [('Blanco', 'M', 2), ('Negro', 'M', 3)]
+    facetas = set(db.session.execute(select(FacetaProducto.faceta, FacetaProducto.valor)))
+    assert facetas == {('categoria', '1'), ('precio', '25-50'), ('disponible', '1'),
+                       ('color', 'Negro'), ('color', 'Blanco'), ('talla', 'M')}
+
+
+@pytest.mark.parametrize('ruta', sorted(_rutas_acceso()))
+def test_cada_ruta_de_acceso_usa_su_indice(app, ruta):
+    indice, sentencia = _rutas_acceso()[ruta]
+    with db.engine.connect() as conexion:
+        plan = plan_de_consulta(conexion, sentencia)
+    assert indice in indices_usados(plan), plan
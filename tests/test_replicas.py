@@ -0,0 +1,99 @@
+import pytest
+from flask import jsonify
+from sqlalchemy import select
+
+from app import create_app, db
+from app.config import Config
+from app.models.models import Categoria
+from app.services.migraciones import migrar
+from app.services.replicas import BIND_REPLICA, estado_replica, lectura_en_replica
+
+
+def _nombres():
+    return sorted(db.session.scalars(select(Categoria.nombre)))
+
+
+@pytest.fixture
+def crear_app(tmp_path, monkeypatch):
+    """App aparte: primario y réplica en dos archivos SQLite distintos."""
+    apps = []
+
+    def crear(replica=None, **config):
+        propia = replica is None
+        replica = replica or 'sqlite:///' + str(tmp_path / 'replica.db')
+        monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'primario.db'))
+        monkeypatch.setattr(Config, 'SQLALCHEMY_BINDS', {BIND_REPLICA: replica})
+        monkeypatch.setattr(Config, 'REPLICA_LAG_CHECK_SECONDS', 0)
+        for nombre, valor in config.items():
+            monkeypatch.setattr(Config, nombre, valor)
+        app = create_app()
+        app.config.update(TESTING=True)
+
+        @app.route('/_nombres')
+        @lectura_en_replica
+        def nombres():
+            return jsonify(_nombres())
+
+        @app.route('/_crear', methods=['POST'])
+        @lectura_en_replica
+        def crear_categoria():
+            db.session.add(Categoria(nombre='nueva'))
+            db.session.flush()
+            antes_del_commit = _nombres()
+            db.session.commit()
+            return jsonify(antes_del_commit)
+
+        with app.app_context():
+            migrar()
+            db.session.add(Categoria(nombre='en-primario'))
+            db.session.commit()
+            if propia:
+                # Mismo esquema y datos distintos: se ve de qué archivo sale cada lectura
+                motor = db.engines[BIND_REPLICA]
+                db.metadata.create_all(motor)
+                with motor.begin() as conexion:
+                    conexion.execute(Categoria.__table__.insert().values(nombre='en-replica'))
+            db.session.remove()
+        apps.append(app)
+        return app
+
+    yield crear
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for motor in db.engines.values():
+                motor.dispose()
+    estado_replica.reiniciar()
+
+
+def test_lectura_marcada_va_a_la_replica(crear_app):
+    cliente = crear_app().test_client()
+
+    assert cliente.get('/_nombres').get_json() == ['en-replica']
+    assert estado_replica.resumen()['lecturas'] >= 1
+
+
+def test_escritura_y_siguiente_peticion_quedan_en_el_primario(crear_app):
+    cliente = crear_app().test_client()
+
+    # Tras el flush la transacción sigue en el primario (ve lo que escribió)
+    assert cliente.post('/_crear').get_json() == ['en-primario', 'nueva']
+    # El mismo usuario lee del primario durante REPLICA_STICKY_SECONDS
+    assert cliente.get('/_nombres').get_json() == ['en-primario', 'nueva']
+    # Otro usuario sigue leyendo de la réplica
+    assert cliente.application.test_client().get('/_nombres').get_json() == ['en-replica']
+
+
+def test_retraso_excesivo_lee_del_primario(crear_app):
+    cliente = crear_app(REPLICA_LAG_QUERY='SELECT 30', REPLICA_MAX_LAG_SECONDS=5).test_client()
+
+    assert cliente.get('/_nombres').get_json() == ['en-primario']
+    assert estado_replica.resumen()['retraso'] == 30
+
+
+def test_replica_inaccesible_lee_del_primario(crear_app, tmp_path):
+    inaccesible = 'sqlite:///' + str(tmp_path / 'no-existe' / 'replica.db')
+    cliente = crear_app(replica=inaccesible).test_client()
+
+    assert cliente.get('/_nombres').get_json() == ['en-primario']
+    assert estado_replica.resumen()['error']
@@ -0,0 +1,67 @@
+import time
+
+from app.controllers import controller
+from app.services.reportes import ColaReportes, cola_reportes
+from tests.conftest import crear_usuario, iniciar_sesion
+
+JSON = {'Accept': 'application/json'}
+
+
+def _admin(app):
+    crear_usuario('admin@x', is_admin=True)
+    return iniciar_sesion(app, 'admin@x')
+
+
+def _esperar(cliente, url):
+    for _ in range(500):
+        datos = cliente.get(url, headers=JSON).get_json()
+        if datos['estado'] not in ('pendiente', 'en_proceso'):
+            return datos
+        time.sleep(0.01)
+    raise AssertionError('el reporte no terminó')
+
+
+def test_otro_worker_responde_estado_y_descarga(app, monkeypatch):
+    cliente = _admin(app)
+    trabajo = cliente.get('/admin/admin/exportar_pdf', headers=JSON).get_json()
+    _esperar(cliente, trabajo['url_estado'])
+
+    # Otro proceso: cola propia y sin memoria, mismo directorio compartido
+    otro = ColaReportes(directorio=cola_reportes.directorio)
+    monkeypatch.setattr(controller, 'cola_reportes', otro)
+
+    estado = cliente.get(trabajo['url_estado'], headers=JSON)
+    assert estado.status_code == 200
+    assert estado.get_json()['estado'] == 'listo'
+    pdf = cliente.get(estado.get_json()['url_descarga'])
+    assert pdf.mimetype == 'application/pdf'
+    assert pdf.data.startswith(b'%PDF')
+    # Mismos filtros: se reutiliza el trabajo en lugar de generarlo de nuevo
+    assert cliente.get('/admin/admin/exportar_pdf', headers=JSON).get_json()['id'] == trabajo['id']
+
+
+def test_sin_javascript_redirige_a_la_pagina_de_estado(app):
+    cliente = _admin(app)
+
+    respuesta = cliente.get('/admin/admin/exportar_pdf')
+
+    assert respuesta.status_code == 302
+    assert '/admin/admin/reportes/' in respuesta.headers['Location']
+    pagina = cliente.get(respuesta.headers['Location'])
+    if pagina.status_code == 202:
+        assert pagina.headers['Refresh'] == '1'
+        _esperar(cliente, respuesta.headers['Location'])
+        pagina = cliente.get(respuesta.headers['Location'])
+    assert pagina.status_code == 302
+    assert cliente.get(pagina.headers['Location']).data.startswith(b'%PDF')
+
+
+def test_invalidar_en_otro_worker_regenera_el_reporte(app):
+    cliente = _admin(app)
+    antes = cliente.get('/admin/admin/exportar_pdf', headers=JSON).get_json()
+    _esperar(cliente, antes['url_estado'])
+
+    # La generación compartida cambia aunque la invalide otro proceso
+    ColaReportes(directorio=cola_reportes.directorio).invalidar()
+
+    assert cliente.get('/admin/admin/exportar_pdf', headers=JSON).get_json()['id'] != antes['id']
@@ -0,0 +1,65 @@
+from datetime import date, datetime
+
+from app import db
+from app.models.models import Gasto, ResumenDiario, Venta
+from tests.conftest import crear_usuario, iniciar_sesion
+
+
+def _fila(dia):
+    db.session.expire_all()
+    fila = db.session.get(ResumenDiario, dia)
+    if fila is None:
+        return None
+    return fila.total_ventas, fila.num_ventas, fila.total_gastos, fila.neto
+
+
+def test_crear_y_eliminar_venta_y_gasto_actualiza_el_resumen():
+    venta = Venta(total=30)
+    gasto = Gasto(descripcion='luz', monto=5)
+    db.session.add(venta)
+    db.session.add(gasto)
+    db.session.commit()
+    hoy = venta.fecha.date()
+    assert _fila(hoy) == (30, 1, 5, 25)
+
+    db.session.delete(venta)
+    db.session.commit()
+    assert _fila(hoy) == (0, 0, 5, -5)
+
+    db.session.delete(gasto)
+    db.session.commit()
+    assert _fila(hoy) == (0, 0, 0, 0)
+
+
+def test_editar_importe_y_fecha_mueve_el_aporte():
+    venta = Venta(total=10, fecha=datetime(2024, 3, 1, 12))
+    db.session.add(venta)
+    db.session.commit()
+
+    venta.total = 15
+    db.session.commit()
+    assert _fila(date(2024, 3, 1)) == (15, 1, 0, 15)
+
+    # Con los atributos expirados tras el commit: el valor anterior sale de la base
+    venta.fecha = datetime(2024, 3, 2, 9)
+    db.session.commit()
+    assert _fila(date(2024, 3, 1)) == (0, 0, 0, 0)
+    assert _fila(date(2024, 3, 2)) == (15, 1, 0, 15)
+
+
+def test_rollback_no_toca_el_resumen():
+    db.session.add(Venta(total=8, fecha=datetime(2024, 5, 5)))
+    db.session.flush()
+    db.session.rollback()
+    assert _fila(date(2024, 5, 5)) is None
+
+
+def test_rutas_de_gastos(app):
+    crear_usuario('a@a', is_admin=True)
+    admin = iniciar_sesion(app, 'a@a')
+    admin.post('/admin/admin/nuevo_gasto', data={'descripcion': 'agua', 'monto': '7', 'categoria': 'servicios'})
+    gasto = Gasto.query.one()
+    assert _fila(gasto.fecha.date())[2] == 7
+
+    admin.post(f'/admin/admin/eliminar_gasto/{gasto.id}')
+    assert _fila(gasto.fecha.date())[2] == 0
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+from sqlalchemy import func, select
+
+from app import db
+from app.models.models import Contador, ItemCarrito, Producto, ProductoVariante, Venta
+from app.services.contadores import NOMBRES, contar_real, reconciliar_contadores
+from app.services.ventas import ErrorVenta, registrar_venta
+from tests.conftest import crear_producto, crear_usuario, iniciar_sesion
+
+COMPRADORES = 12
+STOCK = 5
+
+
+def _contadores():
+    return dict(db.session.execute(
+        select(Contador.nombre, Contador.valor).where(Contador.nombre.in_(NOMBRES))
+    ).all())
+
+
+def test_venta_ajusta_contadores_de_stock_en_la_transaccion(app):
+    cliente = crear_usuario('c@x')
+    producto = crear_producto(stock=12)
+    reconciliar_contadores()
+
+    registrar_venta(cliente.id, [{'producto_id': producto.id, 'cantidad': 10}])
+
+    db.session.expire_all()
+    contadores = _contadores()
+    assert contadores['productos_stock_bajo'] == contadores['productos_stock_critico'] == 1
+    assert contadores == contar_real(db.session.connection())
+
+
+def test_compras_simultaneas_no_venden_mas_que_el_stock(app):
+    cliente = crear_usuario('c@x')
+    producto_id = crear_producto(stock=STOCK).id
+    usuario_id = cliente.id
+    reconciliar_contadores()
+
+    salida = threading.Barrier(COMPRADORES)
+    resultados = []
+
+    def comprar():
+        with app.app_context():
+            salida.wait()
+            try:
+                registrar_venta(usuario_id, [{'producto_id': producto_id, 'cantidad': 1}])
+                resultados.append('vendida')
+            except ErrorVenta:
+                resultados.append('sin stock')
+            finally:
+                db.session.remove()
+
+    hilos = [threading.Thread(target=comprar) for _ in range(COMPRADORES)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    db.session.expire_all()
+    assert sorted(resultados) == ['sin stock'] * (COMPRADORES - STOCK) + ['vendida'] * STOCK
+    assert db.session.scalar(select(func.count(Venta.id))) == STOCK
+    assert db.session.get(Producto, producto_id).stock == 0
+    assert _contadores() == contar_real(db.session.connection())
+
+
+def _stock_variantes(producto_id):
+    return sorted(db.session.scalars(
+        select(ProductoVariante.stock).where(ProductoVariante.producto_id == producto_id)
+    ))
+
+
+def test_venta_sin_opciones_descuenta_de_las_variantes(app):
+    cliente = crear_usuario('c@x')
+    producto_id = crear_producto(stock=5, colores='Negro, Blanco').id
+
+    registrar_venta(cliente.id, [{'producto_id': producto_id, 'cantidad': 4}])
+
+    db.session.expire_all()
+    assert db.session.get(Producto, producto_id).stock == 1
+    assert sum(_stock_variantes(producto_id)) == 1
+
+
+def test_venta_con_variante_elegida_y_sin_opciones_del_mismo_producto(app):
+    cliente = crear_usuario('c@x')
+    producto_id = crear_producto(stock=6, colores='Negro, Blanco').id
+
+    registrar_venta(cliente.id, [
+        {'producto_id': producto_id, 'cantidad': 3, 'color': 'Negro', 'talla': 'Única'},
+        {'producto_id': producto_id, 'cantidad': 2},
+    ])
+
+    db.session.expire_all()
+    assert _stock_variantes(producto_id) == [0, 1]
+
+
+def test_variante_inexistente_se_rechaza(app):
+    cliente = crear_usuario('c@x')
+    producto_id = crear_producto(stock=5, colores='Negro').id
+
+    with pytest.raises(ErrorVenta):
+        registrar_venta(cliente.id, [{'producto_id': producto_id, 'cantidad': 1, 'color': 'Rojo', 'talla': 'Única'}])
+
+    db.session.expire_all()
+    assert db.session.get(Producto, producto_id).stock == 5
+    assert _stock_variantes(producto_id) == [5]
+
+
+def test_carrito_no_acepta_variantes_inexistentes(app):
+    crear_usuario('c@x')
+    producto_id = crear_producto(stock=5, colores='Negro').id
+    cliente = iniciar_sesion(app, 'c@x')
+
+    cliente.post(f'/agregar_carrito/{producto_id}', data={'color': 'Rojo', 'talla': 'Única'})
+    cliente.post(f'/agregar_carrito/{producto_id}', data={'color': 'Negro', 'talla': 'Única'})
+
+    assert [(item.color, item.talla) for item in ItemCarrito.query.all()] == [('Negro', 'Única')]